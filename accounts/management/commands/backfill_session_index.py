@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.sessions import SessionStore
+
+
+class Command(BaseCommand):
+    help = (
+        'Adds the authenticated sessions saved before the per-user session index existed to it, '
+        'so password reset and email change log them out too. Run it once after deploying the index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Keys per SCAN call')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE != 'accounts.sessions':
+            raise CommandError(f'SESSION_ENGINE is "{settings.SESSION_ENGINE}", not "accounts.sessions"')
+
+        indexed = SessionStore.backfill_user_sessions(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{indexed} authenticated sessions indexed'))
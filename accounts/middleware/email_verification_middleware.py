@@ -1,9 +1,10 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.shortcuts import redirect
 from django.urls import reverse, resolve, Resolver404
 
 from django.conf import settings
 
-from shared.permissions.utils import is_authenticated
+from shared.permissions.utils import aget_request_user, is_authenticated
 
 import logging
 
@@ -11,8 +12,14 @@ logger = logging.getLogger(__name__)
 
 
 class EmailVerificationMiddleware:
+    # async-capable, so async views under ASGI aren't adapted to a thread and back by this middleware
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
         # For static routes
         self.exempt_urls = [
@@ -37,6 +44,15 @@ class EmailVerificationMiddleware:
             self.exempt_prefixes += ['/static/', '/media/', '/favicon.ico']
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._verification_redirect(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        await aget_request_user(request)
+        return self._verification_redirect(request) or await self.get_response(request)
+
+    def _verification_redirect(self, request):
         static_path = request.path
         # logger.info(f'🙏🏻 Start of middleware pipline: {static_path=}')
         try:
@@ -44,7 +60,7 @@ class EmailVerificationMiddleware:
             dynamic_path = resolve(request.path_info).url_name
         except Resolver404:
             # logger.info(f'Resolver404 invoked with attempt to resolve {request.path_info}')
-            return self.get_response(request)
+            return None
 
         is_static_or_media = any(static_path.startswith(prefix) for prefix in self.exempt_prefixes)
 
@@ -53,4 +69,4 @@ class EmailVerificationMiddleware:
                 # logger.info(f'Access blocked: {static_path=} | {dynamic_path=} | {is_static_or_media}')
                 return redirect(reverse('accounts:email_sent'))
             # logger.info(f'Access allowed: {static_path=} | {dynamic_path=} | {is_static_or_media}')
-        return self.get_response(request)
+        return None
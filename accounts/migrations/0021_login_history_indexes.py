@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 13:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False  # indexes are built concurrently, without locking writes to hot tables
+
+    dependencies = [
+        ('accounts', '0020_alter_userprofile_role_delete_sellerprofile'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='userloginhistory',
+            index=models.Index(fields=['user', '-timestamp'], name='login_history_user_ts_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userloginhistory',
+            index=models.Index(fields=['-timestamp'], name='login_history_ts_idx'),
+        ),
+    ]
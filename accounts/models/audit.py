@@ -9,4 +9,12 @@ class UserLoginHistory(models.Model):
 
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Login logs of a user, newest first
+            models.Index(fields=['user', '-timestamp'], name='login_history_user_ts_idx'),
+            # Backoffice: all login logs, newest first or within a day range
+            models.Index(fields=['-timestamp'], name='login_history_ts_idx'),
+        ]
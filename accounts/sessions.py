@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+from django.core.cache import caches
+
+
+class SessionStore(CacheSessionStore):
+    """
+    Cache session backend keeping a Redis set of session keys per user (SESSION_ENGINE = 'accounts.sessions').
+    - every save of an authenticated session refreshes the membership and the set TTL,
+      so the set always outlives the sessions it points to
+    - logout removes the key (accounts.signals), expired sessions left in the set are harmless to delete
+    - invalidating a user costs O(sessions of that user) instead of a scan of all sessions
+    - sessions saved before the index existed are added once by backfill_user_sessions (backfill_session_index)
+    """
+    USER_SESSIONS_PREFIX = 'user_sessions'
+
+    def save(self, must_create=False):
+        super().save(must_create=must_create)
+        if user_pk := self._get_session().get(SESSION_KEY):
+            self.add_user_session(user_pk, self.session_key)
+
+    @classmethod
+    def _user_sessions_key(cls, user_pk):
+        return f'{cls.USER_SESSIONS_PREFIX}:{user_pk}'
+
+    @staticmethod
+    def _get_cache():
+        return caches[settings.SESSION_CACHE_ALIAS]
+
+    @classmethod
+    def add_user_session(cls, user_pk, session_key):
+        key = cls._user_sessions_key(user_pk)
+        with cls._get_cache().client.get_client().pipeline() as pipe:
+            pipe.sadd(key, session_key)
+            pipe.expire(key, settings.SESSION_COOKIE_AGE)
+            pipe.execute()
+
+    @classmethod
+    def remove_user_session(cls, user_pk, session_key):
+        cls._get_cache().client.get_client().srem(cls._user_sessions_key(user_pk), session_key)
+
+    @classmethod
+    def get_user_session_keys(cls, user_pk) -> list[str]:
+        members = cls._get_cache().client.get_client().smembers(cls._user_sessions_key(user_pk))
+        return [key.decode() for key in members]
+
+    @classmethod
+    def delete_user_sessions(cls, user_pk) -> int:
+        session_keys = cls.get_user_session_keys(user_pk)
+        if session_keys:
+            cls._get_cache().delete_many([cls.cache_key_prefix + key for key in session_keys])
+        cls._get_cache().client.get_client().delete(cls._user_sessions_key(user_pk))
+        return len(session_keys)
+
+    @classmethod
+    def backfill_user_sessions(cls, batch_size=500) -> int:
+        """ Indexes authenticated sessions not saved since the index was introduced, returns their count """
+        cache = cls._get_cache()
+        indexed = 0
+        for session_keys in cls.scan_session_keys(batch_size):
+            sessions = cache.get_many([cls.cache_key_prefix + key for key in session_keys])
+            for session_key in session_keys:
+                session = sessions.get(cls.cache_key_prefix + session_key) or {}
+                if user_pk := session.get(SESSION_KEY):
+                    cls.add_user_session(user_pk, session_key)
+                    indexed += 1
+        return indexed
+
+    @classmethod
+    def scan_session_keys(cls, batch_size=500):
+        """ Yields the keys of all stored sessions in batches (SCAN, doesn't block Redis like KEYS) """
+        cache = cls._get_cache()
+        client = cache.client.get_client()
+        pattern = cache.make_key(f'{cls.cache_key_prefix}*')
+        cursor = 0
+        while True:
+            cursor, keys = client.scan(cursor, match=pattern, count=batch_size)
+            if keys:
+                yield [key.decode().split(cls.cache_key_prefix, 1)[-1] for key in keys]
+            if cursor == 0:
+                return
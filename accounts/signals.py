@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -23,4 +23,11 @@ def create_specific_profile(sender, instance, **kwargs):
 def create_login_record(sender, request, user, **kwargs):
     ip = request.META.get('REMOTE_ADDR', '')
     ua = request.META.get('HTTP_USER_AGENT', '')
-    UserLoginHistory.objects.create(user=user, email=user.email, ip_address=ip, user_agent=ua)
\ No newline at end of file
+    UserLoginHistory.objects.create(user=user, email=user.email, ip_address=ip, user_agent=ua)
+
+
+@receiver(user_logged_out)
+def remove_user_session_from_index(sender, request, user, **kwargs):
+    # only the indexed backend (accounts.sessions) keeps per-user session sets
+    if user and request.session.session_key and hasattr(request.session, 'remove_user_session'):
+        request.session.remove_user_session(user.pk, request.session.session_key)
@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from accounts.sessions import SessionStore
+from accounts.utils import invalidate_all_user_sessions
+
+User = get_user_model()
+
+
+@override_settings(SESSION_ENGINE='accounts.sessions')
+class UserSessionIndexTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='sessions@mail.ru', email_verified=True, password='StrongPas123')
+        SessionStore.delete_user_sessions(self.user.pk)
+
+    def _login(self):
+        client = Client()
+        client.post(reverse('accounts:login'), {'username': self.user.email, 'password': 'StrongPas123'})
+        return client
+
+    def test_login_and_logout_maintain_index(self):
+        first, second = self._login(), self._login()
+        self.assertCountEqual(
+            SessionStore.get_user_session_keys(self.user.pk),
+            [first.session.session_key, second.session.session_key]
+        )
+
+        first.post(reverse('accounts:logout'))
+        self.assertEqual(SessionStore.get_user_session_keys(self.user.pk), [second.session.session_key])
+
+    def test_invalidation_touches_only_user_sessions(self):
+        clients = [self._login(), self._login()]
+        anonymous = SessionStore()
+        anonymous['session_order'] = {'items': {}}
+        anonymous.create()
+
+        invalidate_all_user_sessions(self.user)
+
+        for client in clients:
+            self.assertNotIn('_auth_user_id', SessionStore(session_key=client.session.session_key).load())
+        self.assertEqual(SessionStore.get_user_session_keys(self.user.pk), [])
+        self.assertTrue(SessionStore().exists(anonymous.session_key))
+
+    def test_backfill_indexes_sessions_saved_before_the_index(self):
+        indexed = self._login()
+        legacy = SessionStore()
+        legacy[SESSION_KEY] = str(self.user.pk)
+        legacy._session_key = legacy._get_new_session_key()
+        CacheSessionStore.save(legacy, must_create=True)  # saved without the index, as before the deploy
+        self.assertEqual(SessionStore.get_user_session_keys(self.user.pk), [indexed.session.session_key])
+
+        call_command('backfill_session_index', stdout=StringIO())
+        # assertIn: sessions of an earlier test user with the same pk may be in the shared Redis as well
+        self.assertIn(legacy.session_key, SessionStore.get_user_session_keys(self.user.pk))
+
+        invalidate_all_user_sessions(self.user)
+        self.assertFalse(SessionStore().exists(legacy.session_key))
@@ -8,6 +8,8 @@ from django.contrib.sessions.models import Session
 from django.core.cache import cache
 from django.utils import timezone
 
+from accounts.sessions import SessionStore as IndexedSessionStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +29,12 @@ def link_lifetime_check(email_sent_at):
 
 
 def invalidate_all_user_sessions(user):
-    if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db':
+    if settings.SESSION_ENGINE == 'accounts.sessions':
+        # per-user index, touches only the sessions of this user
+        deleted_count = IndexedSessionStore.delete_user_sessions(user.pk)
+        logger.info(f'Deleted {deleted_count} Redis sessions for user {user.email}')
+
+    elif settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db':
         # using ORM
         user_sessions = Session.objects.filter(expire_date__gte=timezone.now())
         for session in user_sessions:
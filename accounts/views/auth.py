@@ -5,6 +5,7 @@ from django.views.decorators.csrf import csrf_protect
 
 from accounts.forms import UserLoginForm
 from core.services.order_builder import OrderBuilderService
+from core.services.session_cart import SessionCart
 
 
 class UserLoginView(LoginView):
@@ -20,9 +21,7 @@ class UserLoginView(LoginView):
 
     def form_valid(self, form):
         response = super().form_valid(form)
-        if session_order := self.request.session.get('session_order', {}):
-            OrderBuilderService(session_order=session_order, user=self.request.user).build()  # Merge session with order
-            del self.request.session['session_order']
+        OrderBuilderService.merge_session_cart(SessionCart(self.request.session), user=self.request.user)
         return response
 
 
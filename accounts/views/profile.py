@@ -6,13 +6,20 @@ from django.views.generic.edit import View
 
 from accounts.forms import ShippingInfoForm
 from accounts.models import UserLoginHistory
+from core.services.catalog_cache import CatalogCacheService
 from shared.permissions.mixins import BackofficeAccessRequiredMixin, AuthRequiredMixin
 from shared.permissions.utils import is_backoffice_member
+from shared.utils import local_day_range
 
 
 class BackofficeDashboardView(BackofficeAccessRequiredMixin, TemplateView):
     template_name = 'accounts/backoffice_dashboard.html'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['catalog_cache_stats'] = CatalogCacheService.stats()
+        return context
+
 
 class CustomerAccountView(AuthRequiredMixin, TemplateView):
     template_name = 'accounts/customer_account.html'
@@ -41,7 +48,8 @@ class UserLoginLogsListView(AuthRequiredMixin, ListView):
         if date_str:
             date = parse_date(date_str)
             if date:
-                qs = qs.filter(timestamp__date=date)
+                day_start, day_end = local_day_range(date)
+                qs = qs.filter(timestamp__gte=day_start, timestamp__lt=day_end)
 
         return qs.order_by('-timestamp')
 
@@ -11,6 +11,7 @@ from django.views.generic.edit import FormView
 from accounts.forms import UserRegistrationForm
 from accounts.utils import generate_verification_token, link_lifetime_check
 from core.services.order_builder import OrderBuilderService
+from core.services.session_cart import SessionCart
 from shared.tasks import send_email_task
 
 logger = logging.getLogger(__name__)
@@ -89,9 +90,7 @@ class UserRegisterConfirmView(TemplateView):
 
         logger.info(f'Verification attempt succeeded: {user.email}')
 
-        if session_order := request.session.get('session_order', {}):
-            OrderBuilderService(session_order=session_order, user=user).build()  # Create order based on the session
-            del request.session['session_order']
+        OrderBuilderService.merge_session_cart(SessionCart(request.session), user=user)
         del request.session['pending_user']
 
         return redirect(f"{reverse('accounts:login')}?info=account_created")
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+Benchmark cases of benchmarks.suite. A case receives the dataset context and returns the callable to time.
+Setup runs once per case, every call is rolled back, so each iteration starts from the same state.
+"""
+from dataclasses import dataclass
+from unittest.mock import Mock, patch
+
+from django.db.models import F
+from django.test import Client
+from django.urls import reverse
+
+from core.domain import OrderStatus
+from core.models import Order, OrderItem, Product
+from core.services.catalog_cache import CatalogCacheService
+from core.services.order_amount_calc import OrderOrchestrationService
+from core.services.order_builder import OrderBuilderService
+from core.services.order_item_price_sync import OrderItemPriceSyncService
+from core.services.stock_counter import RedisStockCounter
+from core.services.stock_reservation import StockReservationService
+from payments.domain import PaymentMethod, PaymentStatus
+from payments.models import Payment
+from payments.services.process_webhook import process_webhook
+from payments.services.webhook_inbox import receive_webhook
+
+CASES = {}
+
+
+def case(name):
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+
+@dataclass
+class Context:
+    user: object  # UserProfile of a customer with a pending order and an order history
+    password: str
+    pending_order: Order
+    products: list  # active in-stock products
+
+
+@case('order_builder.build')
+def order_builder_build(ctx):
+    # 10-item session cart merged into a pending order, half of the products already in it
+    in_order = set(ctx.pending_order.items.values_list('product_pk_snapshot', flat=True))
+    products = sorted(ctx.products[:10], key=lambda product: product.pk not in in_order)
+    session_order = {'items': {
+        str(product.pk): {
+            'product_pk': product.pk,
+            'product_name': product.name,
+            'product_image_url': product.primary_image_url,
+            'quantity': 1,
+        }
+        for product in products
+    }}
+    return lambda: OrderBuilderService(session_order=session_order, user=ctx.user).build()
+
+
+@case('order_item_price_sync.sync')
+def order_item_price_sync(ctx):
+    # every item is out of sync, the worst case of a review after a repricing
+    order = ctx.pending_order
+    OrderItem.objects.filter(order=order).update(product_unit_price=F('product_unit_price') + 1)
+    return lambda: OrderItemPriceSyncService(order=Order.objects.prefetch_related('items').get(pk=order.pk)).sync()
+
+
+@case('order_orchestration.update_price')
+def order_orchestration_update_price(ctx):
+    return lambda: OrderOrchestrationService(order=ctx.pending_order).update_price()
+
+
+@case('stock_reservation.reserve_release')
+def stock_reservation_reserve_release(ctx):
+    product = ctx.products[0]
+
+    def run():
+        StockReservationService(product_pk=product.pk).reserve_stock()
+        StockReservationService.release_quantities({product.pk: 1})
+        if StockReservationService.uses_redis_engine():
+            RedisStockCounter().release({product.pk: 1})  # the on_commit release is dropped with the rollback
+    return run
+
+
+@case('view.product_list')
+def product_list_view(ctx):
+    client = Client()
+    url = reverse('core:product_list')
+    return lambda: client.get(url)
+
+
+@case('view.product_list.category')
+def product_list_category_view(ctx):
+    client = Client()
+    url = reverse('core:product_list')
+    category = Product.objects.filter(pk=ctx.products[0].pk).values_list('category__name', flat=True).get()
+    return lambda: client.get(url, {'category': category})
+
+
+@case('view.product_list.miss')
+def product_list_miss_view(ctx):
+    # the hit cases above answer from the catalog cache without SQL, this one times the render it falls back to
+    client = Client()
+    url = reverse('core:product_list')
+
+    def run():
+        CatalogCacheService.invalidate_all()
+        return client.get(url)
+    return run
+
+
+@case('view.product_list.category.miss')
+def product_list_category_miss_view(ctx):
+    client = Client()
+    url = reverse('core:product_list')
+    category = Product.objects.filter(pk=ctx.products[0].pk).values_list('category__name', flat=True).get()
+
+    def run():
+        CatalogCacheService.invalidate_all()
+        return client.get(url, {'category': category})
+    return run
+
+
+@case('view.order_list')
+def order_list_view(ctx):
+    client = Client()
+    client.post(reverse('accounts:login'), {'username': ctx.user.email, 'password': ctx.password})
+    url = reverse('core:order_list')
+    return lambda: client.get(url)
+
+
+@case('process_webhook')
+def process_webhook_case(ctx):
+    # the provider round trip is replaced by a canned "paid" response, only our processing is timed
+    order = Order.objects.filter(user=ctx.user.customer_profile).exclude(status=OrderStatus.PENDING).first()
+    payment = Payment.objects.create(
+        order=order,
+        payment_method=PaymentMethod.TWINT,
+        payment_status=PaymentStatus.INITIATED,
+        transaction='tr_benchmark_webhook'
+    )
+    response = Mock(status_code=200, json=Mock(return_value={'status': 'paid'}))
+
+    def run():
+        with patch('payments.services.gateways.mollie.mollie_http.get', return_value=response):
+            process_webhook({'id': payment.transaction})
+    return run
+
+
+@case('webhook_inbox.receive')
+def receive_webhook_case(ctx):
+    # what the provider waits for: the webhook view only stores the event
+    return lambda: receive_webhook('mollie', {'id': 'tr_benchmark_inbox'})
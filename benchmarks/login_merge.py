@@ -0,0 +1,95 @@
+"""
+Login with an anonymous cart: POST to accounts:login, which merges the SessionCart into the pending order.
+
+For every cart size a fresh customer logs in once with a cold order and once with all items already in the order
+(the update branch of the merge). Reports wall time and SQL query count per login, --fast-hasher takes
+the password hashing (the bulk of a login) out of the timing. Everything is written in one
+transaction rolled back at the end, the Redis carts are cleared. Needs a migrated database:
+
+    python -m benchmarks.login_merge --items 1 10 100 --fast-hasher
+"""
+import argparse
+import os
+import time
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'doom_market.settings.dev')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from core.models import Product  # noqa: E402
+from core.services.session_cart import SessionCart  # noqa: E402
+
+User = get_user_model()
+PASSWORD = 'BenchmarkPas123'
+
+
+class Rollback(Exception):
+    pass
+
+
+def anonymous_client_with_cart(products):
+    client = Client()
+    session = client.session  # new session bound to the client cookie
+    cart = SessionCart(session)
+    for product in products:
+        cart.add(product)
+    session.save()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    return client
+
+
+def timed_login(client, email):
+    with CaptureQueriesContext(connection) as queries:
+        started_at = time.perf_counter()
+        response = client.post(reverse('accounts:login'), {'username': email, 'password': PASSWORD})
+        elapsed = time.perf_counter() - started_at
+    assert response.status_code == 302, f'Login failed with {response.status_code}'
+    return elapsed, len(queries)
+
+
+def run(items_count):
+    products = Product.objects.bulk_create([
+        Product(name=f'Benchmark login {items_count}-{i}', price=Decimal('9.99'), quantity=1000)
+        for i in range(items_count)
+    ])
+    email = f'benchmark_login_{items_count}@mail.ru'
+    User.objects.create_user(email=email, email_verified=True, password=PASSWORD)
+
+    results = []
+    for label in ('new items', 'existing items'):
+        client = anonymous_client_with_cart(products)
+        elapsed, queries_count = timed_login(client, email)
+        results.append((label, elapsed, queries_count))
+        client.post(reverse('accounts:logout'))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--fast-hasher', action='store_true')
+    args = parser.parse_args()
+
+    hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if args.fast_hasher else settings.PASSWORD_HASHERS
+    print(f'{"items":>6} {"merge":<16} {"time":>10} {"queries":>8}')
+    try:
+        with override_settings(PASSWORD_HASHERS=hashers), transaction.atomic():
+            for items_count in args.items:
+                for label, elapsed, queries_count in run(items_count):
+                    print(f'{items_count:>6} {label:<16} {elapsed * 1000:>7.1f} ms {queries_count:>8}')
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Anonymous cart footprint: session_order pickled into the session vs SessionCart hash + cart id in the session.
+
+Writes one cart of each kind per item count, reports Redis MEMORY USAGE of the keys (payload length when
+the server has no MEMORY command) and removes them. Run against a disposable Redis database only:
+
+    python -m benchmarks.session_cart_memory --items 1 5 20 --description-length 300
+"""
+import argparse
+import os
+from decimal import Decimal
+from types import SimpleNamespace
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'doom_market.settings.dev')
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from redis.exceptions import ResponseError  # noqa: E402
+
+from accounts.sessions import SessionStore  # noqa: E402
+from core.services.session_cart import SessionCart  # noqa: E402
+from core.services.session_cart_index import SessionCartIndex  # noqa: E402
+
+PRODUCT_PK_OFFSET = 2 ** 31 - 10_000  # far from real product ids, nothing is read from the DB
+
+
+def legacy_session_order(items_count, description_length):
+    items = {}
+    for pk in range(PRODUCT_PK_OFFSET, PRODUCT_PK_OFFSET + items_count):
+        items[str(pk)] = {
+            'product_pk': pk,
+            'product_name': f'Benchmark product {pk}',
+            'description': 'x' * description_length,
+            'quantity': 2,
+            'unit_price': '19.99',
+            'total_price': '39.98',
+            'product_image_url': f'/media/products/{pk}/primary.webp',
+        }
+    amount = f'{Decimal("39.98") * items_count}'
+    return {
+        'items': items,
+        'items_amount': amount,
+        'delivery_amount': '0.00',
+        'total_amount': amount,
+        'modified_at': timezone.now().isoformat(),
+    }
+
+
+def key_size(client, key):
+    try:
+        return client.memory_usage(key, samples=0)
+    except ResponseError:
+        key_type = client.type(key)
+        if key_type == b'hash':
+            return sum(len(field) + len(value) for field, value in client.hgetall(key).items())
+        return len(client.get(key) or b'')
+
+
+def measure(items_count, description_length):
+    legacy = SessionStore()
+    legacy['session_order'] = legacy_session_order(items_count, description_length)
+    legacy.save()
+
+    compact = SessionStore()
+    cart = SessionCart(compact)
+    for pk in range(PRODUCT_PK_OFFSET, PRODUCT_PK_OFFSET + items_count):
+        product = SimpleNamespace(pk=pk, price=Decimal('19.99'))  # add() reads nothing else
+        cart.add(product)
+        cart.add(product)
+    compact.save()
+
+    client = cart.client
+    try:
+        legacy_size = key_size(client, legacy._cache.make_key(legacy.cache_key))
+        session_size = key_size(client, compact._cache.make_key(compact.cache_key))
+        hash_size = key_size(client, SessionCart.key(cart.cart_id))
+        return legacy_size, session_size + hash_size
+    finally:
+        legacy.delete()
+        SessionCartIndex().remove(cart.cart_id)
+        cart.clear()
+        compact.delete()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--description-length', type=int, default=300)
+    args = parser.parse_args()
+
+    print(f'{"items":>6} {"session_order":>16} {"SessionCart":>14} {"ratio":>8}')
+    for items_count in args.items:
+        legacy_size, compact_size = measure(items_count, args.description_length)
+        print(f'{items_count:>6} {legacy_size:>14} B {compact_size:>12} B {legacy_size / compact_size:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+invalidate_all_user_sessions: full SCAN (plain cache backend) vs per-user index (accounts.sessions).
+
+Seeds N anonymous sessions plus a few sessions of one user, times both strategies and removes the seeded keys.
+Run against a disposable Redis database only:
+
+    python -m benchmarks.session_invalidation --sessions 1000000 --user-sessions 5
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'doom_market.settings.dev')
+django.setup()
+
+from django.contrib.auth import SESSION_KEY  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from accounts.sessions import SessionStore  # noqa: E402
+from accounts.utils import invalidate_all_user_sessions  # noqa: E402
+
+User = get_user_model()
+CHUNK_SIZE = 10_000
+
+
+def seed_sessions(count, data):
+    store = SessionStore()
+    session_keys = []
+    for offset in range(0, count, CHUNK_SIZE):
+        chunk = [store._get_new_session_key() for _ in range(min(CHUNK_SIZE, count - offset))]
+        store._cache.set_many({SessionStore.cache_key_prefix + key: data for key in chunk}, store.get_expiry_age())
+        session_keys.extend(chunk)
+    return session_keys
+
+
+def seed_user_sessions(user, count, indexed):
+    session_keys = seed_sessions(count, {SESSION_KEY: str(user.pk)})
+    for session_key in session_keys if indexed else ():
+        SessionStore.add_user_session(user.pk, session_key)
+    return session_keys
+
+
+def timed(label, func):
+    started_at = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started_at
+    print(f'{label:<32} {elapsed * 1000:>12.1f} ms')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--user-sessions', type=int, default=5)
+    args = parser.parse_args()
+
+    user = User(pk=2 ** 31 - 1, email='benchmark_sessions@mail.ru')  # only pk/email are used, no DB rows needed
+    print(f'Seeding {args.sessions} anonymous sessions...')
+    anonymous_keys = seed_sessions(args.sessions, {'session_order': {'items': {}}})
+
+    try:
+        seed_user_sessions(user, args.user_sessions, indexed=False)
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache'):
+            timed('SCAN of all sessions', lambda: invalidate_all_user_sessions(user))
+
+        seed_user_sessions(user, args.user_sessions, indexed=True)
+        with override_settings(SESSION_ENGINE='accounts.sessions'):
+            timed('per-user session index', lambda: invalidate_all_user_sessions(user))
+    finally:
+        store = CacheSessionStore()
+        for offset in range(0, len(anonymous_keys), CHUNK_SIZE):
+            chunk = anonymous_keys[offset:offset + CHUNK_SIZE]
+            store._cache.delete_many([SessionStore.cache_key_prefix + key for key in chunk])
+
+
+if __name__ == '__main__':
+    main()
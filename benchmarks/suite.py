@@ -0,0 +1,167 @@
+"""
+In-process benchmark suite of the hot services and views (cases in benchmarks/cases.py).
+
+Creates a separate test database (test_<NAME>, like the test runner) on the configured Postgres, seeds it with
+seed_benchmark and times every case: warmup calls first, then --iterations calls, each one rolled back.
+Reports median/p95 wall time and the SQL query count, and compares them to benchmarks/baselines.json:
+the run fails when a query count grows beyond --queries-threshold or a median beyond --latency-threshold.
+Latency baselines are only meaningful on the machine they were recorded on, record them with
+--update-baseline in the docker-compose environment (Postgres + Redis up) before comparing:
+
+    docker exec -it petit_django-backend-1 python -m benchmarks.suite --update-baseline
+    docker exec -it petit_django-backend-1 python -m benchmarks.suite --keepdb
+
+A case without a recorded median fails the run before anything is measured, record it with --update-baseline.
+INFO logs are silenced, console output would otherwise dominate the timings.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'doom_market.settings.dev')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+
+from accounts.models import UserProfile  # noqa: E402
+from core.domain import OrderStatus  # noqa: E402
+from core.models import Order, Product  # noqa: E402
+from core.services.catalog_cache import CatalogCacheService  # noqa: E402
+from benchmarks.cases import CASES, Context  # noqa: E402
+
+BASELINES_PATH = Path(__file__).with_name('baselines.json')
+PREFIX = 'suite'
+PASSWORD = 'BenchmarkPas123'
+SCALES = {
+    'small': {'categories': 10, 'products': 500, 'customers': 1_000, 'orders': 10_000, 'login_logs': 5_000},
+    'medium': {'categories': 20, 'products': 2_000, 'customers': 10_000, 'orders': 100_000, 'login_logs': 50_000},
+}
+
+
+def prepare_database(scale, keepdb, migrate):
+    # upstream migrations are replayed only on demand, the schema is what matters for the timings
+    connection.settings_dict['TEST']['MIGRATE'] = migrate
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+
+    if not UserProfile.objects.filter(email__startswith=f'{PREFIX}-').exists():
+        print(f'Seeding the "{scale}" dataset...')
+        call_command('seed_benchmark', prefix=PREFIX, password=PASSWORD, **SCALES[scale])
+    CatalogCacheService.invalidate_all()
+    return old_name
+
+
+def load_context():
+    """ The customer with a non-empty cart and the longest order history, products in stock """
+    pending_order = (
+        Order.objects
+        .filter(status=OrderStatus.PENDING, user__user__email__startswith=f'{PREFIX}-')
+        .annotate(items_count=Count('items', distinct=True), history=Count('user__orders', distinct=True))
+        .filter(items_count__gt=0)
+        .select_related('user__user')
+        .order_by('-history', 'pk')
+        .first()
+    )
+    if pending_order is None:
+        sys.exit('The dataset has no pending order with items, reseed it (drop --keepdb)')
+
+    products = list(Product.objects.filter(is_active=True, quantity__gt=0).order_by('pk')[:10])
+    return Context(user=pending_order.user.user, password=PASSWORD, pending_order=pending_order, products=products)
+
+
+def measure(name, ctx, warmup, iterations):
+    timings, queries = [], 0
+    with transaction.atomic():
+        run = CASES[name](ctx)
+        for i in range(warmup + iterations):
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    run()
+                    elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                queries = max(queries, len(captured))
+        transaction.set_rollback(True)
+
+    timings.sort()
+    return {
+        'queries': queries,
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+    }
+
+
+def compare(name, result, baseline, latency_threshold, queries_threshold):
+    """ Returns the regressions of one case against its baseline """
+    regressions = []
+    if baseline.get('queries') is not None and result['queries'] > baseline['queries'] + queries_threshold:
+        regressions.append(f'{name}: {result["queries"]} queries, baseline {baseline["queries"]}')
+    if result['median_ms'] > baseline['median_ms'] * (1 + latency_threshold):
+        regressions.append(f'{name}: median {result["median_ms"]} ms, baseline {baseline["median_ms"]} ms')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), help='Run these cases only')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--latency-threshold', type=float, default=0.25, help='Allowed median growth, 0.25 = +25%%')
+    parser.add_argument('--queries-threshold', type=int, default=0, help='Allowed extra queries per call')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baselines')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the seeded test database of a previous run')
+    parser.add_argument('--migrate', action='store_true', help='Build the test database by running migrations')
+    args = parser.parse_args()
+
+    if getattr(settings, 'PROFILING', False):
+        sys.exit('Profiling (DJANGO_PROFILING=1) skews the timings, run the suite without it')
+
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    if not args.update_baseline:
+        if missing := [name for name in args.only or CASES if not (baselines.get(name) or {}).get('median_ms')]:
+            sys.exit(f'No median baseline for {", ".join(missing)}, record them with --update-baseline first')
+
+    logging.disable(logging.INFO)
+    setup_test_environment()
+    old_name = prepare_database(args.scale, args.keepdb, args.migrate)
+
+    results, regressions = {}, []
+    try:
+        ctx = load_context()
+        print(f'{"case":<36} {"median ms":>10} {"p95 ms":>10} {"queries":>8}')
+        for name in args.only or CASES:
+            result = results[name] = measure(name, ctx, args.warmup, args.iterations)
+            case_regressions = [] if args.update_baseline else compare(
+                name, result, baselines[name], args.latency_threshold, args.queries_threshold
+            )
+            regressions += case_regressions
+            flag = '  REGRESSION' if case_regressions else ''
+            print(f'{name:<36} {result["median_ms"]:>10.3f} {result["p95_ms"]:>10.3f} {result["queries"]:>8}{flag}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    if args.update_baseline:
+        baselines.update(results)
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+        print(f'Baselines written to {BASELINES_PATH}')
+    elif regressions:
+        print('\nRegressions:\n' + '\n'.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import UserLoginHistory
+from core.domain import OrderStatus
+from core.models import Order, OrderItem, Product
+from payments.models import Payment
+from shared.utils import local_day_range
+
+# Small lookup tables, a sequential scan of them is the right plan
+IGNORED_RELATIONS = {'core_category', 'core_deliverysettings'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs EXPLAIN ANALYZE on the hot queries against the current (seeded) database '
+        'and fails when any of them scans a table sequentially.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-seqscan', action='store_true',
+            help='SET enable_seqscan = off: on a small dataset checks that an index path exists at all'
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help='Print full JSON plans')
+
+    def handle(self, *args, **options):
+        queries = self._hot_queries()
+        failures = []
+
+        with transaction.atomic():
+            if options['no_seqscan']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in queries:
+                plan = json.loads(queryset.explain(analyze=True, format='json'))[0]
+                nodes = list(self._walk(plan['Plan']))
+                seq_scans = sorted({
+                    node['Relation Name'] for node in nodes
+                    if node['Node Type'] == 'Seq Scan' and node['Relation Name'] not in IGNORED_RELATIONS
+                })
+                scans = sorted({
+                    f"{node['Node Type']}({node.get('Index Name') or node['Relation Name']})"
+                    for node in nodes if 'Relation Name' in node or 'Index Name' in node
+                })
+
+                style = self.style.ERROR if seq_scans else self.style.SUCCESS
+                self.stdout.write(style(f"{name:<32} {plan['Execution Time']:>9.3f} ms  {', '.join(scans)}"))
+                if options['verbose_plans']:
+                    self.stdout.write(json.dumps(plan, indent=2))
+                if seq_scans:
+                    failures.append(f'{name}: {", ".join(seq_scans)}')
+
+        if failures:
+            raise CommandError('Sequential scans found:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'{len(queries)} hot queries use indexes'))
+
+    def _walk(self, node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from self._walk(child)
+
+    def _hot_queries(self):
+        """ The hot queries of the views and tasks, filled with values sampled from the dataset """
+        order = Order.objects.filter(items__isnull=False).order_by('-pk').first()
+        payment = Payment.objects.filter(transaction__isnull=False).order_by('-pk').first()
+        login = UserLoginHistory.objects.order_by('-pk').first()
+        product = Product.objects.filter(category__isnull=False).order_by('-pk').first()
+        if not (order and payment and login and product):
+            raise CommandError('Dataset is missing orders, payments, login logs or products. Seed it first')
+
+        item = order.items.first()
+        day_start, day_end = local_day_range(timezone.localdate(order.created_at))
+        login_day_start, login_day_end = local_day_range(timezone.localdate(login.timestamp))
+        catalog = Product.objects.filter(is_active=True, quantity__gt=0).order_by('-updated_at', '-price', '-id')
+
+        return [
+            ('pending order (cart views)', Order.objects.filter(user_id=order.user_id, status=OrderStatus.PENDING)),
+            ('customer order list', (
+                Order.objects
+                .filter(user_id=order.user_id)
+                .exclude(status__in=[OrderStatus.PENDING, OrderStatus.EXPIRED])
+                .order_by('-updated_at', '-pk')
+            )),
+            ('expired pending orders', (
+                Order.objects
+                .filter(status=OrderStatus.PENDING, updated_at__lt=timezone.now() - timedelta(hours=24))
+                .values_list('pk', flat=True)[:500]
+            )),
+            ('orders of a day (backoffice)', Order.objects.filter(created_at__gte=day_start, created_at__lt=day_end)),
+            ('catalog page', catalog[:24]),
+            ('catalog category page', catalog.filter(category_id=product.category_id)[:24]),
+            ('order item of a product', OrderItem.objects.filter(order=order, product_pk_snapshot=item.product_pk_snapshot)),
+            ('order items of a product', OrderItem.objects.filter(product_pk_snapshot=item.product_pk_snapshot)),
+            ('payment by transaction', Payment.objects.filter(transaction=payment.transaction)),
+            ('login logs of a user', UserLoginHistory.objects.filter(user_id=login.user_id).order_by('-timestamp')[:50]),
+            ('login logs of a day', (
+                UserLoginHistory.objects
+                .filter(timestamp__gte=login_day_start, timestamp__lt=login_day_end)
+                .order_by('-timestamp')[:50]
+            )),
+        ]
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.sessions import SessionStore
+from core.services.session_cart import SessionCart
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves anonymous carts pickled in sessions ("session_order") into SessionCart hashes, so they show up '
+        'in the cart again and their stock is released by the expiry job. Run it once after deploying SessionCart.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Keys per SCAN call')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE != 'accounts.sessions':
+            raise CommandError(f'SESSION_ENGINE is "{settings.SESSION_ENGINE}", not "accounts.sessions"')
+
+        migrated = 0
+        for session_keys in SessionStore.scan_session_keys(batch_size=options['batch_size']):
+            for session_key in session_keys:
+                session = SessionStore(session_key=session_key)
+                if session_order := session.get('session_order'):
+                    SessionCart(session).import_session_order(session_order)
+                    del session['session_order']
+                    session.save()
+                    migrated += 1
+        self.stdout.write(self.style.SUCCESS(f'{migrated} legacy carts migrated'))
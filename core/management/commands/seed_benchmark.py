@@ -0,0 +1,379 @@
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.domain import UserRole
+from accounts.models import CustomerProfile, ShippingInfo, UserLoginHistory
+from core.domain import OrderStatus
+from core.models import Category, DeliverySettings, Order, OrderItem, Product, ProductImage
+from core.services.catalog_cache import CatalogCacheService
+from payments.domain import PaymentMethod, PaymentStatus
+from payments.models import Payment
+
+User = get_user_model()
+
+FIRST_NAMES = ['Anna', 'Luca', 'Mia', 'Noah', 'Elena', 'Jonas', 'Sofia', 'Leon', 'Lea', 'David']
+LAST_NAMES = ['Muller', 'Meier', 'Schmid', 'Keller', 'Weber', 'Huber', 'Frei', 'Baumann', 'Graf', 'Brunner']
+CITIES = [('Zurich', '8001'), ('Geneva', '1201'), ('Basel', '4051'), ('Bern', '3011'), ('Lausanne', '1003')]
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/128.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 Version/17.5 Safari/605.1.15',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+]
+# historical (non-pending) orders, weights roughly of a running shop
+HISTORY_STATUSES = [OrderStatus.DELIVERED, OrderStatus.SHIPPED, OrderStatus.PAID, OrderStatus.EXPIRED]
+HISTORY_WEIGHTS = [70, 8, 7, 15]
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a deterministic benchmark dataset: categories, products with images, customers with '
+        'shipping info, historical orders with items and payments, pending carts and login history. '
+        'Large tables are written with COPY. Use a dedicated database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--anchor', default='2026-01-01', help='Date the history ends at (YYYY-MM-DD)')
+        parser.add_argument('--days', type=int, default=365, help='Length of the order/login history')
+        parser.add_argument('--prefix', default='bench', help='Prefix of generated names and emails')
+        parser.add_argument('--password', default='BenchmarkPas123', help='Password of every generated customer')
+
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--products', type=int, default=2_000)
+        parser.add_argument('--images-per-product', type=int, default=2)
+        parser.add_argument('--customers', type=int, default=10_000)
+        parser.add_argument('--orders', type=int, default=100_000, help='Historical (non-pending) orders')
+        parser.add_argument('--max-items', type=int, default=5, help='Max items per order')
+        parser.add_argument('--pending-ratio', type=float, default=0.05, help='Share of customers with a cart')
+        parser.add_argument('--stale-payment-ratio', type=float, default=0.0,
+                            help='Share of carts with an initiated payment whose webhook never came')
+        parser.add_argument('--login-logs', type=int, default=50_000)
+
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--flush', action='store_true', help='Delete data generated with the same prefix first')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        self.anchor = timezone.make_aware(datetime.fromisoformat(options['anchor']))
+        self.delivery_settings = DeliverySettings.load()
+
+        if options['max_items'] > options['products']:
+            raise CommandError('--max-items cannot exceed --products')
+        if options['flush']:
+            self._timed('flush', self._flush)
+        elif User.objects.filter(email__startswith=f'{self.prefix}-').exists():
+            raise CommandError(f'Data with prefix "{self.prefix}" exists. Use --flush or another --prefix')
+
+        self.category_pks = self._timed('categories', self._seed_categories)
+        self.products = self._timed('products + images', self._seed_products)
+        self.customer_pks = self._timed('customers + shipping', self._seed_customers)
+        self._timed('backoffice manager', self._seed_manager)
+        self._timed('orders + items + payments', self._seed_orders)
+        self._timed('pending carts', self._seed_pending_orders)
+        self._timed('login history', self._seed_login_history)
+
+        with connection.cursor() as cursor:
+            for model in (Order, OrderItem, Payment, UserLoginHistory, Product, ProductImage):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        CatalogCacheService.invalidate_all()  # bulk inserts bypass the model signals
+        self.stdout.write(self.style.SUCCESS(f'Dataset "{self.prefix}" seeded (seed={options["seed"]})'))
+
+    def _timed(self, label, func):
+        started_at = time.monotonic()
+        with transaction.atomic():
+            result = func()
+        self.stdout.write(f'{label:<28} {time.monotonic() - started_at:>8.1f} s')
+        return result
+
+    # --- catalog ---
+
+    def _seed_categories(self) -> list[int]:
+        categories = Category.objects.bulk_create([
+            Category(name=f'{self.prefix}-category-{i}', description=f'Benchmark category {i}')
+            for i in range(self.options['categories'])
+        ])
+        return [category.pk for category in categories]
+
+    def _seed_products(self) -> list[tuple]:
+        """ Returns [(pk, name, price, description, primary_image_url)], popular products first """
+        images_per_product = self.options['images_per_product']
+        products = []
+        for i in range(self.options['products']):
+            image_urls = [f'{settings.MEDIA_URL}product_images/{self.prefix}-{i}-{n}.webp' for n in range(images_per_product)]
+            updated_at = self._past(self.options['days'])
+            products.append(Product(
+                category_id=self.rng.choice(self.category_pks),
+                name=f'{self.prefix}-product-{i}',
+                price=self._price(Decimal('2.00'), Decimal('400.00')),
+                quantity=0 if self.rng.random() < 0.05 else self.rng.randint(1, 500),
+                description=f'Benchmark product {i}',
+                is_active=self.rng.random() > 0.02,
+                images_count=images_per_product,
+                primary_image_url=image_urls[0] if image_urls else '',
+                primary_image_alt=f'Product {i}' if image_urls else '',
+                secondary_image_url=image_urls[1] if len(image_urls) > 1 else '',
+                secondary_image_alt=f'Product {i}' if len(image_urls) > 1 else '',
+                created_at=updated_at,
+                updated_at=updated_at,
+            ))
+
+        history = [product.updated_at for product in products]
+        created = Product.objects.bulk_create(products, batch_size=self.batch_size)
+        # auto_now* fields are overwritten on insert, restore the generated history for the catalog ordering
+        for product, updated_at in zip(created, history):
+            product.created_at = product.updated_at = updated_at
+        Product.objects.bulk_update(created, ['created_at', 'updated_at'], batch_size=self.batch_size)
+
+        ProductImage.objects.bulk_create([
+            ProductImage(
+                product_id=product.pk,
+                image=f'product_images/{self.prefix}-{i}-{n}.webp',  # files aren't generated, only rows
+                is_primary=n == 0,
+                position=n + 1,
+                alt_text=f'Product {i}',
+            )
+            for i, product in enumerate(created) for n in range(images_per_product)
+        ], batch_size=self.batch_size)
+
+        return [(p.pk, p.name, p.price, p.description, p.primary_image_url) for p in created]
+
+    # --- customers ---
+
+    def _seed_customers(self) -> list[int]:
+        """ Returns customer profile pks in creation order """
+        password = make_password(self.options['password'], salt=f'{self.prefix}{self.options["seed"]}')
+        customer_pks = []
+        for offset in range(0, self.options['customers'], self.batch_size):
+            indexes = range(offset, min(offset + self.batch_size, self.options['customers']))
+            users = User.objects.bulk_create([
+                User(email=self._email(i), password=password, email_verified=True) for i in indexes
+            ])
+            profiles = CustomerProfile.objects.bulk_create([CustomerProfile(user_id=user.pk) for user in users])
+            ShippingInfo.objects.bulk_create([
+                ShippingInfo(user_id=profile.pk, email=self._email(i), **self._shipping(i))
+                for i, profile in zip(indexes, profiles)
+            ])
+            customer_pks.extend(profile.pk for profile in profiles)
+        return customer_pks
+
+    def _seed_manager(self):
+        # backoffice account of the load tests, a regular save: the profile signal must see its role
+        User.objects.create_user(
+            email=f'{self.prefix}-manager@bench.local', password=self.options['password'],
+            role=UserRole.MANAGER, email_verified=True
+        )
+
+    def _email(self, index):
+        return f'{self.prefix}-{index}@bench.local'
+
+    def _shipping(self, index) -> dict:
+        city, postal_code = CITIES[index % len(CITIES)]
+        return {
+            'first_name': FIRST_NAMES[index % len(FIRST_NAMES)],
+            'last_name': LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)],
+            'phone': f'+4179{index:07d}'[:24],
+            'country': 'Switzerland',
+            'city': city,
+            'postal_code': postal_code,
+            'street': 'Bahnhofstrasse',
+            'house_number': str(index % 200 + 1),
+        }
+
+    # --- orders ---
+
+    def _seed_orders(self):
+        total = self.options['orders']
+        for offset in range(0, total, self.batch_size):
+            count = min(self.batch_size, total - offset)
+            statuses = self.rng.choices(HISTORY_STATUSES, HISTORY_WEIGHTS, k=count)
+            customers = [self.rng.randrange(len(self.customer_pks)) for _ in range(count)]
+            self._write_orders(customers, statuses)
+
+    def _seed_pending_orders(self):
+        # one cart per customer (unique pending order), idle up to 48h: some are due for the expiry job
+        count = int(len(self.customer_pks) * self.options['pending_ratio'])
+        customers = sorted(self.rng.sample(range(len(self.customer_pks)), count))
+        for offset in range(0, count, self.batch_size):
+            chunk = customers[offset:offset + self.batch_size]
+            self._write_orders(chunk, [OrderStatus.PENDING] * len(chunk))
+
+    def _write_orders(self, customers, statuses):
+        first_order_pk = self._reserve_pks(Order, len(customers))
+        order_rows, item_rows, payment_rows = [], [], []
+
+        for n, (customer, status) in enumerate(zip(customers, statuses)):
+            order_pk = first_order_pk + n
+            if status == OrderStatus.PENDING:
+                created_at = self.anchor - timedelta(seconds=self.rng.randint(0, 48 * 3600))
+            else:
+                created_at = self._past(self.options['days'])
+
+            items_amount = Decimal('0.00')
+            for product_index in self._pick_products():
+                pk, name, price, description, image_url = self.products[product_index]
+                quantity = self.rng.choice([1, 1, 1, 2, 2, 3])
+                total_price = (price * quantity).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                items_amount += total_price
+                item_rows.append([
+                    order_pk, pk, image_url, name, quantity, description, price, total_price, created_at, created_at
+                ])
+
+            delivery_amount = (
+                self.delivery_settings.delivery_price
+                if items_amount < self.delivery_settings.delivery_threshold else Decimal('0.00')
+            )
+            paid_at = created_at + timedelta(minutes=self.rng.randint(1, 30))
+            shipping = self._shipping(customer)
+            updated_at = {
+                OrderStatus.PENDING: created_at,
+                OrderStatus.EXPIRED: created_at + timedelta(days=1),
+                OrderStatus.PAID: paid_at,
+            }.get(status, paid_at + timedelta(days=self.rng.randint(1, 5)))
+
+            order_rows.append([
+                order_pk, self.customer_pks[customer], status, items_amount, delivery_amount,
+                items_amount + delivery_amount,
+                paid_at if status in (OrderStatus.PAID, OrderStatus.SHIPPED, OrderStatus.DELIVERED) else None,
+                updated_at if status in (OrderStatus.SHIPPED, OrderStatus.DELIVERED) else None,
+                updated_at if status == OrderStatus.DELIVERED else None,
+                updated_at if status == OrderStatus.EXPIRED else None,
+                self._email(customer), shipping['first_name'], shipping['last_name'], shipping['phone'],
+                shipping['country'], shipping['city'], shipping['postal_code'], shipping['street'],
+                shipping['house_number'], 0, created_at, updated_at,
+            ])
+
+            if status != OrderStatus.PENDING:
+                payment_status = PaymentStatus.FAILED if status == OrderStatus.EXPIRED else PaymentStatus.SUCCEEDED
+                transaction_id = f'tr_{self.prefix}{self.rng.getrandbits(64):016x}'
+                payment_rows.append([
+                    order_pk, self.rng.choice(PaymentMethod.values), payment_status,
+                    transaction_id, f'https://www.mollie.com/checkout/{transaction_id}',
+                    paid_at if payment_status == PaymentStatus.SUCCEEDED else None,
+                    created_at, paid_at,
+                ])
+            elif self.options['stale_payment_ratio'] and self.rng.random() < self.options['stale_payment_ratio']:
+                transaction_id = f'tr_{self.prefix}{self.rng.getrandbits(64):016x}'
+                initiated_at = created_at + timedelta(minutes=self.rng.randint(1, 30))
+                payment_rows.append([
+                    order_pk, PaymentMethod.TWINT, PaymentStatus.INITIATED,
+                    transaction_id, f'https://www.mollie.com/checkout/{transaction_id}',
+                    None, initiated_at, initiated_at,
+                ])
+
+        self._copy(Order, [
+            'id', 'user', 'status', 'items_amount', 'delivery_amount', 'total_amount',
+            'paid_at', 'shipped_at', 'delivered_at', 'expired_at',
+            'shipping_email', 'shipping_first_name', 'shipping_last_name', 'shipping_phone', 'shipping_country',
+            'shipping_city', 'shipping_postal_code', 'shipping_street', 'shipping_house_number',
+            'price_epoch', 'created_at', 'updated_at',
+        ], order_rows)
+
+        first_item_pk = self._reserve_pks(OrderItem, len(item_rows))
+        self._copy(OrderItem, [
+            'id', 'order', 'product_pk_snapshot', 'product_image_url', 'product_name', 'product_quantity',
+            'product_description', 'product_unit_price', 'product_total_price', 'created_at', 'updated_at',
+        ], [[first_item_pk + n, *row] for n, row in enumerate(item_rows)])
+
+        self._copy(Payment, [
+            'order', 'payment_method', 'payment_status', 'transaction', 'checkout_url', 'paid_at', 'created_at',
+            'updated_at',
+        ], payment_rows)
+
+    def _pick_products(self) -> list[int]:
+        """ Distinct product indexes (unique per order), skewed towards the first, popular products """
+        count = self.rng.randint(1, self.options['max_items'])
+        picked = set()
+        while len(picked) < count:
+            picked.add(int(len(self.products) * self.rng.random() ** 3))
+        return sorted(picked)
+
+    # --- login history ---
+
+    def _seed_login_history(self):
+        total = self.options['login_logs']
+        user_pks = dict(CustomerProfile.objects.filter(pk__in=self.customer_pks).values_list('pk', 'user_id'))
+        for offset in range(0, total, self.batch_size):
+            rows = []
+            for _ in range(min(self.batch_size, total - offset)):
+                customer = self.rng.randrange(len(self.customer_pks))
+                rows.append([
+                    user_pks[self.customer_pks[customer]], self._email(customer),
+                    f'10.{self.rng.randint(0, 255)}.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}',
+                    self.rng.choice(USER_AGENTS), self._past(self.options['days']),
+                ])
+            self._copy(UserLoginHistory, ['user', 'email', 'ip_address', 'user_agent', 'timestamp'], rows)
+
+    # --- helpers ---
+
+    def _past(self, days):
+        return self.anchor - timedelta(seconds=self.rng.randint(0, days * 24 * 3600))
+
+    def _price(self, low: Decimal, high: Decimal) -> Decimal:
+        cents = self.rng.randint(int(low * 100), int(high * 100))
+        return Decimal(cents) / 100
+
+    @staticmethod
+    def _reserve_pks(model, count) -> int:
+        """ Moves the identity sequence past a block of pks, rows written with COPY use them explicitly """
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {table} IN EXCLUSIVE MODE')
+            cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+            first_pk = cursor.fetchone()[0] + 1
+            if count:
+                cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [table, first_pk + count - 1])
+        return first_pk
+
+    @staticmethod
+    def _copy(model, fields, rows):
+        if not rows:
+            return
+        columns = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [['' if value is None else value.isoformat() if isinstance(value, datetime) else value for value in row]
+             for row in rows]
+        )
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {model._meta.db_table} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+    def _flush(self):
+        prefix = f'{self.prefix}-%'
+        order_table, item_table, payment_table = Order._meta.db_table, OrderItem._meta.db_table, Payment._meta.db_table
+        user_table, profile_table = User._meta.db_table, CustomerProfile._meta.db_table
+        seeded_profiles = (
+            f'SELECT p.id FROM {profile_table} p JOIN {user_table} u ON u.id = p.user_id WHERE u.email LIKE %s'
+        )
+        seeded_orders = f'SELECT id FROM {order_table} WHERE user_id IN ({seeded_profiles})'
+        statements = [
+            f'DELETE FROM {payment_table} WHERE order_id IN ({seeded_orders})',
+            f'DELETE FROM {item_table} WHERE order_id IN ({seeded_orders})',
+            f'DELETE FROM {order_table} WHERE user_id IN ({seeded_profiles})',
+            f'DELETE FROM {ShippingInfo._meta.db_table} WHERE user_id IN ({seeded_profiles})',
+            f'DELETE FROM {UserLoginHistory._meta.db_table} WHERE user_id IN '
+            f'(SELECT id FROM {user_table} WHERE email LIKE %s)',
+            f'DELETE FROM {profile_table} WHERE id IN ({seeded_profiles})',
+            f'DELETE FROM {user_table} WHERE email LIKE %s',
+            f'DELETE FROM {ProductImage._meta.db_table} WHERE product_id IN '
+            f'(SELECT id FROM {Product._meta.db_table} WHERE name LIKE %s)',
+            f'DELETE FROM {Product._meta.db_table} WHERE name LIKE %s',
+            f'DELETE FROM {Category._meta.db_table} WHERE name LIKE %s',
+        ]
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement, [prefix])
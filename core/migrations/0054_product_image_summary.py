@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+def fill_image_summary(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    ProductImage = apps.get_model('core', 'ProductImage')
+
+    images_by_product = {}
+    for image in ProductImage.objects.order_by('product_id', '-is_primary', 'position', 'pk'):
+        images_by_product.setdefault(image.product_id, []).append(image)
+
+    products = list(Product.objects.filter(pk__in=images_by_product.keys()))
+    for product in products:
+        images = images_by_product[product.pk]
+        primary = images[0] if images else None
+        secondary = images[1] if len(images) > 1 else None
+
+        product.images_count = len(images)
+        product.primary_image_url = primary.image.url if primary else ''
+        product.primary_image_alt = (primary.alt_text or '') if primary else ''
+        product.secondary_image_url = secondary.image.url if secondary else ''
+        product.secondary_image_alt = (secondary.alt_text or '') if secondary else ''
+
+    Product.objects.bulk_update(
+        products,
+        ['images_count', 'primary_image_url', 'primary_image_alt', 'secondary_image_url', 'secondary_image_alt'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0053_alter_order_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='images_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='primary_image_alt',
+            field=models.CharField(blank=True, max_length=256),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='secondary_image_alt',
+            field=models.CharField(blank=True, max_length=256),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='secondary_image_url',
+            field=models.URLField(blank=True),
+        ),
+        migrations.RunPython(fill_image_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0054_product_image_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('quantity__gt', 0)), fields=['-updated_at', '-price', '-id'], name='product_catalog_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0055_product_catalog_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReconciliationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('batch_id', models.CharField(max_length=32, unique=True)),
+                ('products_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 09:01
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_items(apps, schema_editor):
+    """ Concurrent get_or_create could leave the same product twice in an order, keep one row per product """
+    OrderItem = apps.get_model('core', 'OrderItem')
+
+    duplicates = (
+        OrderItem.objects
+        .values('order_id', 'product_pk_snapshot')
+        .annotate(rows=Count('pk'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        items = list(
+            OrderItem.objects
+            .filter(order_id=duplicate['order_id'], product_pk_snapshot=duplicate['product_pk_snapshot'])
+            .order_by('pk')
+        )
+        kept, extra = items[0], items[1:]
+        kept.product_quantity += sum(item.product_quantity for item in extra)
+        kept.product_total_price += sum(item.product_total_price for item in extra)
+        kept.save(update_fields=['product_quantity', 'product_total_price'])
+        OrderItem.objects.filter(pk__in=[item.pk for item in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0056_stockreconciliationbatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='orderitem',
+            constraint=models.UniqueConstraint(fields=('order', 'product_pk_snapshot'), name='unique_product_per_order'),
+        ),
+    ]
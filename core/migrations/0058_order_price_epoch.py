@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0057_orderitem_unique_product_per_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='price_epoch',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['product_pk_snapshot'], name='orderitem_product_pk_idx'),
+        ),
+    ]
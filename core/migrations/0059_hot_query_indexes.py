@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 13:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False  # indexes are built concurrently, without locking writes to hot tables
+
+    dependencies = [
+        ('accounts', '0021_login_history_indexes'),
+        ('core', '0058_order_price_epoch'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['user', 'status'], name='order_user_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['updated_at'], name='order_pending_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['created_at'], name='order_created_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('quantity__gt', 0)), fields=['category', '-updated_at', '-price', '-id'], name='product_category_keyset_idx'),
+        ),
+    ]
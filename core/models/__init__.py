@@ -3,3 +3,4 @@ from .delivery import DeliverySettings
 from .order import Order
 from .order_item import OrderItem
 from .product import Product, ProductImage
+from .stock import StockReconciliationBatch
@@ -1,12 +1,65 @@
+import time
 from decimal import Decimal
 
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 
 
 class DeliverySettings(models.Model):
+    """
+    Singleton (pk=1). Hot paths read it through load_cached():
+    - process-local copy for LOCAL_TTL seconds, then one Redis GET of the version key to revalidate it
+    - shared copy in Redis stored under the current version
+    - save() bumps the version after commit, every process picks the change up within LOCAL_TTL
+    """
+    VERSION_KEY = 'delivery_settings:version'
+    LOCAL_TTL = 30
+    SHARED_TTL = 60 * 60 * 24  # old versions expire on their own
+
+    _local_cache = None  # (version, expires_at, instance)
+
     delivery_threshold = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('50.00'))
     delivery_price = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('8.50'))
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        type(self)._local_cache = None
+        transaction.on_commit(type(self).invalidate_cache)
+
     @classmethod
     def load(cls):
-        return cls.objects.get_or_create(pk=1)[0]
\ No newline at end of file
+        return cls.objects.get_or_create(pk=1)[0]
+
+    @classmethod
+    def load_cached(cls):
+        now = time.monotonic()
+        if cls._local_cache and cls._local_cache[1] > now:
+            return cls._local_cache[2]
+
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            cache.add(cls.VERSION_KEY, time.time_ns() // 1000, None)
+            version = cache.get(cls.VERSION_KEY)
+
+        if cls._local_cache and cls._local_cache[0] == version:
+            instance = cls._local_cache[2]
+        else:
+            instance = cache.get(cls._data_key(version))
+            if instance is None:
+                instance = cls.load()
+                cache.set(cls._data_key(version), instance, cls.SHARED_TTL)
+
+        cls._local_cache = (version, now + cls.LOCAL_TTL, instance)
+        return instance
+
+    @classmethod
+    def invalidate_cache(cls):
+        cls._local_cache = None
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, time.time_ns() // 1000, None)
+
+    @classmethod
+    def _data_key(cls, version):
+        return f'delivery_settings:{version}'
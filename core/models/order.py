@@ -17,6 +17,18 @@ class Order(TimeStampedModel):
                 name='unique_pending_order_per_user'
             )
         ]
+        indexes = [
+            # Orders of a customer by status (order list, cart views outside the pending partial index)
+            models.Index(fields=['user', 'status'], name='order_user_status_idx'),
+            # cleanup_expired_pending_orders: pending orders idle since the cutoff
+            models.Index(
+                fields=['updated_at'],
+                condition=models.Q(status=OrderStatus.PENDING),
+                name='order_pending_updated_idx'
+            ),
+            # Day filter of OrderListView, a range on created_at
+            models.Index(fields=['created_at'], name='order_created_at_idx'),
+        ]
 
     user = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE, related_name='orders')
     tracking_info = models.CharField(max_length=128, blank=True, null=True)
@@ -25,6 +37,7 @@ class Order(TimeStampedModel):
     items_amount = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
     delivery_amount = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
     total_amount = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
+    price_epoch = models.PositiveBigIntegerField(default=0)  # Product price epoch of the last item price sync
 
     paid_at = models.DateTimeField(blank=True, null=True)
     shipped_at = models.DateTimeField(blank=True, null=True)
@@ -7,6 +7,19 @@ from .order import Order
 
 
 class OrderItem(TimeStampedModel):
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['order', 'product_pk_snapshot'],
+                name='unique_product_per_order'
+            )
+        ]
+        indexes = [
+            # Pending orders holding a repriced product (ProductRepricingService)
+            models.Index(fields=['product_pk_snapshot'], name='orderitem_product_pk_idx'),
+        ]
+
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product_pk_snapshot = models.PositiveIntegerField()
     product_image_url = models.URLField(blank=True)
@@ -1,19 +1,81 @@
+import time
 from decimal import Decimal
 
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 
 from shared.models import TimeStampedModel
 from .category import Category
 
 
 class Product(TimeStampedModel):
+    IMAGE_SUMMARY_FIELDS = [
+        'images_count', 'primary_image_url', 'primary_image_alt', 'secondary_image_url', 'secondary_image_alt'
+    ]
+    # Global price epoch, bumped after every committed price change (see Order.price_epoch)
+    PRICE_EPOCH_KEY = 'product_prices:epoch'
+
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='products')
     name = models.CharField(max_length=56, unique=True)
     price = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
     quantity = models.PositiveIntegerField(default=1)
     description = models.CharField(max_length=256, blank=True)
     is_active = models.BooleanField(default=True)
+    # Denormalized image summary, kept in sync by ProductImage.save() and ProductImageSyncService
+    images_count = models.PositiveSmallIntegerField(default=0)
     primary_image_url = models.URLField(blank=True)
+    primary_image_alt = models.CharField(max_length=256, blank=True)
+    secondary_image_url = models.URLField(blank=True)
+    secondary_image_alt = models.CharField(max_length=256, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the buyer catalog, matches ProductListView ordering
+            models.Index(
+                fields=['-updated_at', '-price', '-id'],
+                condition=models.Q(is_active=True, quantity__gt=0),
+                name='product_catalog_keyset_idx'
+            ),
+            # Same for a single category of the buyer catalog
+            models.Index(
+                fields=['category', '-updated_at', '-price', '-id'],
+                condition=models.Q(is_active=True, quantity__gt=0),
+                name='product_category_keyset_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_price = instance.__dict__.get('price')  # None when deferred
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        price_changed = (
+            not self._state.adding
+            and (update_fields is None or 'price' in update_fields)
+            and self.price != getattr(self, '_loaded_price', None)
+        )
+        super().save(*args, **kwargs)
+        self._loaded_price = self.price
+        if price_changed:
+            transaction.on_commit(type(self).bump_price_epoch)
+
+    @classmethod
+    def current_price_epoch(cls) -> int:
+        # microsecond start value: an epoch recreated after a Redis flush is still ahead of the stored ones
+        if (epoch := cache.get(cls.PRICE_EPOCH_KEY)) is None:
+            cache.add(cls.PRICE_EPOCH_KEY, time.time_ns() // 1000, None)
+            epoch = cache.get(cls.PRICE_EPOCH_KEY)
+        return epoch
+
+    @classmethod
+    def bump_price_epoch(cls):
+        try:
+            cache.incr(cls.PRICE_EPOCH_KEY)
+        except ValueError:
+            cache.set(cls.PRICE_EPOCH_KEY, time.time_ns() // 1000, None)
 
     def get_primary_image(self):
         if 'images' in getattr(self, '_prefetched_objects_cache', {}):
@@ -25,6 +87,25 @@ class Product(TimeStampedModel):
             return next((img for img in self._prefetched_objects_cache['images'] if not img.is_primary), None)
         return self.images.filter(is_primary=False).first()
 
+    def update_image_summary(self, images=None):
+        """
+        Rebuilds denormalized image summary, so the catalog renders cards without touching ProductImage.
+        `images` is expected in canonical order (primary first), otherwise it is fetched from DB.
+        The first image is displayed as primary even if the flagged one was deleted.
+        """
+        if images is None:
+            images = list(self.images.order_by('-is_primary', 'position', 'pk'))
+
+        primary = images[0] if images else None
+        secondary = images[1] if len(images) > 1 else None
+
+        self.images_count = len(images)
+        self.primary_image_url = primary.image.url if primary else ''
+        self.primary_image_alt = (primary.alt_text or '') if primary else ''
+        self.secondary_image_url = secondary.image.url if secondary else ''
+        self.secondary_image_alt = (secondary.alt_text or '') if secondary else ''
+        self.save(update_fields=self.IMAGE_SUMMARY_FIELDS)
+
     def __str__(self):
         return f'{self.name}'
 
@@ -62,7 +143,10 @@ class ProductImage(TimeStampedModel):
             self.position = images_qs.count() + 1
 
         super().save(*args, **kwargs)
+        self.product.update_image_summary()
 
-        if self.is_primary:
-            self.product.primary_image_url = self.image.url
-            self.product.save(update_fields=['primary_image_url'])
\ No newline at end of file
+    def delete(self, *args, **kwargs):
+        product = self.product
+        result = super().delete(*args, **kwargs)
+        product.update_image_summary()
+        return result
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.db import models
+
+from shared.models import TimeStampedModel
+
+
+class StockReconciliationBatch(TimeStampedModel):
+    """ Journal of Redis stock batches applied to Product.quantity, guarantees exactly-once application """
+    batch_id = models.CharField(max_length=32, unique=True)
+    products_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'Stock batch {self.batch_id}'
@@ -0,0 +1,104 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.domain import OrderStatus
+from core.models import DeliverySettings, Order, OrderItem
+from .order_amount_calc import OrderOrchestrationService
+from .stock_reservation import StockReservationService
+
+
+class AddToCartService:
+    """
+    Add-to-cart for authenticated users in three statements within one transaction:
+    1. stock reservation (conditional UPDATE ... RETURNING, or the Redis counter)
+    2. pending order + item upsert (INSERT ... ON CONFLICT on both unique constraints, single CTE)
+    3. totals UPDATE: items SUM as a subquery, or the item delta in the incremental totals mode
+    """
+    def __init__(self, customer_profile, product_pk):
+        self.customer_profile = customer_profile
+        self.product_pk = product_pk
+
+    def add(self) -> dict:
+        reservation = StockReservationService(product_pk=self.product_pk)
+        try:
+            with transaction.atomic():
+                response = reservation.reserve_stock()
+                if product := response.get('product', None):
+                    order_pk, items_delta = self._upsert_item(product)
+                    self._update_totals(order_pk, items_delta)
+        except Exception:
+            reservation.cancel_reservation()  # the DB decrement is rolled back, the Redis one is not
+            raise
+        return response
+
+    def _upsert_item(self, product) -> tuple[int, object]:
+        """ Returns the pending order id and the change of the item total """
+        now = timezone.now()
+        order_columns, order_values = self._insert_values(
+            Order(user=self.customer_profile, status=OrderStatus.PENDING, created_at=now, updated_at=now)
+        )
+        item_columns, item_values = self._insert_values(
+            OrderItem(
+                order_id=0,  # replaced by the upserted order id
+                product_pk_snapshot=product.pk,
+                product_name=product.name,
+                product_unit_price=product.price,
+                product_total_price=product.price,
+                product_description=product.description,
+                product_image_url=product.primary_image_url,
+                created_at=now,
+                updated_at=now
+            ),
+            exclude=('order',)
+        )
+
+        order_table, item_table = Order._meta.db_table, OrderItem._meta.db_table
+        sql = (
+            f'WITH pending_order AS ('
+            f'INSERT INTO {order_table} ({", ".join(order_columns)}) VALUES ({", ".join(["%s"] * len(order_values))}) '
+            f"ON CONFLICT (user_id) WHERE status = '{OrderStatus.PENDING}' DO UPDATE SET updated_at = EXCLUDED.updated_at "
+            f'RETURNING id) '
+            f'INSERT INTO {item_table} (order_id, {", ".join(item_columns)}) '
+            f'SELECT pending_order.id, {", ".join(["%s"] * len(item_values))} FROM pending_order '
+            f'ON CONFLICT (order_id, product_pk_snapshot) DO UPDATE SET '
+            f'product_quantity = {item_table}.product_quantity + 1, '
+            f'product_total_price = ROUND({item_table}.product_unit_price * ({item_table}.product_quantity + 1), 2), '
+            f'updated_at = EXCLUDED.updated_at '
+            # computed from the row this statement locked and wrote, one unit more than before:
+            # a concurrent add of the same product is applied after it, never from the same old total
+            f'RETURNING order_id, product_total_price - ROUND(product_unit_price * (product_quantity - 1), 2)'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, order_values + item_values)
+            return cursor.fetchone()
+
+    def _update_totals(self, order_pk, items_delta):
+        if OrderOrchestrationService.uses_incremental_totals():
+            OrderOrchestrationService(order=Order(pk=order_pk)).update_price(items_delta=items_delta)
+            return
+
+        delivery_settings = DeliverySettings.load_cached()
+        order_table, item_table = Order._meta.db_table, OrderItem._meta.db_table
+        sql = (
+            f'UPDATE {order_table} AS o SET '
+            f'items_amount = s.amount, '
+            f'delivery_amount = CASE WHEN s.amount < %s THEN %s ELSE 0 END, '
+            f'total_amount = s.amount + CASE WHEN s.amount < %s THEN %s ELSE 0 END, '
+            f'updated_at = %s '
+            f'FROM (SELECT COALESCE(SUM(product_total_price), 0) AS amount FROM {item_table} WHERE order_id = %s) AS s '
+            f'WHERE o.id = %s'
+        )
+        threshold, price = delivery_settings.delivery_threshold, delivery_settings.delivery_price
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [threshold, price, threshold, price, timezone.now(), order_pk, order_pk])
+
+    @staticmethod
+    def _insert_values(instance, exclude=()) -> tuple[list, list]:
+        """ Column names and DB-ready values of a new row, the same way Model.save() prepares them """
+        fields = [
+            field for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in exclude
+        ]
+        columns = [connection.ops.quote_name(field.column) for field in fields]
+        values = [field.get_db_prep_save(field.pre_save(instance, add=True), connection) for field in fields]
+        return columns, values
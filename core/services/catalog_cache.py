@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+
+from shared.permissions.utils import is_authenticated
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCacheService:
+    """
+    Versioned cache of rendered catalog fragments for anonymous buyers.
+    - fragment key = (global version, scope version, key parts), so a version bump orphans stale entries
+    - scopes: "category:<name>" for list pages ("category:" is the unfiltered catalog), "product:<pk>" for details
+    - CSRF token is stored as a placeholder and substituted per request, fragments are shared between visitors
+    - hit/miss counters are sampled: one lookup in STATS_SAMPLE_RATE is counted with that weight, so stats()
+      is an estimate and most requests make no Redis write for it
+    """
+    PREFIX = 'catalog'
+    GLOBAL_SCOPE = 'global'
+    HITS_KEY = f'{PREFIX}:cache:hits'
+    MISSES_KEY = f'{PREFIX}:cache:misses'
+    CSRF_PLACEHOLDER = '__catalog_csrf_token__'
+    TIMEOUT = 60 * 15
+    STATS_SAMPLE_RATE = 20
+
+    def __init__(self, request, scope: str, key_parts: tuple):
+        self.request = request
+        self.scope = scope
+        self.key_parts = key_parts
+
+    @classmethod
+    def for_request(cls, request, scope: str, key_parts: tuple, allowed_params=()):
+        """ Returns None when the request can't be served from the shared cache """
+        if request.method != 'GET' or is_authenticated(request):
+            return None
+        if not set(request.GET.keys()) <= set(allowed_params):
+            return None  # e.g. redirect messages would leak into the shared fragment
+        return cls(request, scope, key_parts)
+
+    def get(self) -> dict | None:
+        fragments = cache.get(self._get_fragment_key())
+        if fragments is None:
+            self._count(self.MISSES_KEY)
+            return None
+
+        self._count(self.HITS_KEY)
+        return self._with_csrf_token(fragments)
+
+    async def aget(self) -> dict | None:
+        """
+        get() for async views as a single thread hop: django-redis async methods are sync_to_async wrappers,
+        so the lookup done call by call would switch threads for every Redis round trip
+        """
+        return await sync_to_async(self.get)()
+
+    def render(self, templates: dict, context: dict) -> dict:
+        context = {**context, 'csrf_token': self.CSRF_PLACEHOLDER}
+        fragments = {
+            name: render_to_string(template_name, context, request=self.request)
+            for name, template_name in templates.items()
+        }
+        cache.set(self._get_fragment_key(), fragments, self.TIMEOUT)
+        return self._with_csrf_token(fragments)
+
+    @classmethod
+    def invalidate_all(cls):
+        cls._bump(cls._version_key(cls.GLOBAL_SCOPE))
+        logger.info('Catalog cache invalidated')
+
+    @classmethod
+    def invalidate_product(cls, product):
+        category_name = product.category.name if product.category_id else ''
+        for scope in (f'product:{product.pk}', f'category:{category_name}', 'category:'):
+            cls._bump(cls._version_key(scope))
+
+    @classmethod
+    def stats(cls) -> dict:
+        counters = cache.get_many([cls.HITS_KEY, cls.MISSES_KEY])
+        hits, misses = counters.get(cls.HITS_KEY, 0), counters.get(cls.MISSES_KEY, 0)
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': round(hits / total * 100, 2) if total else 0}
+
+    def _get_fragment_key(self):
+        version_keys = [self._version_key(self.GLOBAL_SCOPE), self._version_key(self.scope)]
+        versions = cache.get_many(version_keys)
+        for key in version_keys:
+            if key not in versions:
+                cache.add(key, self._initial_version(), None)
+                versions[key] = cache.get(key)
+
+        digest = hashlib.md5(json.dumps(self.key_parts).encode()).hexdigest()
+        return f'{self.PREFIX}:fragment:{versions[version_keys[0]]}:{versions[version_keys[1]]}:{digest}'
+
+    def _with_csrf_token(self, fragments: dict) -> dict:
+        token = get_token(self.request)
+        return {name: html.replace(self.CSRF_PLACEHOLDER, token) for name, html in fragments.items()}
+
+    @classmethod
+    def _version_key(cls, scope):
+        return f'{cls.PREFIX}:version:{scope}'
+
+    @staticmethod
+    def _initial_version():
+        # time-based start, so a lost version key never falls back to an already used value
+        return time.time_ns() // 1000
+
+    @classmethod
+    def _bump(cls, key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, cls._initial_version(), None)
+
+    @classmethod
+    def _count(cls, key):
+        if random.random() < 1 / cls.STATS_SAMPLE_RATE:
+            cls._incr(key, cls.STATS_SAMPLE_RATE)
+
+    @staticmethod
+    def _incr(key, delta):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.add(key, 0, None)
+            cache.incr(key, delta)
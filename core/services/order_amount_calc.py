@@ -1,11 +1,15 @@
+import logging
 from decimal import Decimal, ROUND_HALF_UP
 
-from django.db.models import Sum
+from django.conf import settings
+from django.db.models import Case, DecimalField, F, Sum, Value, When
 from django.utils import timezone
 
-from core.models import DeliverySettings
+from core.models import DeliverySettings, Order, Product
 from .order_item_price_sync import OrderItemPriceSyncService
 
+logger = logging.getLogger(__name__)
+
 
 class OrderOrchestrationService:
     def __init__(self, order=None, session_order=None):
@@ -17,7 +21,19 @@ class OrderOrchestrationService:
             session_items=session_order.get('items', None) if session_order else None
         )
 
-    def update_price(self):
+    @staticmethod
+    def uses_incremental_totals():
+        return getattr(settings, 'ORDER_TOTALS_MODE', 'aggregate') == 'incremental'
+
+    def update_price(self, items_delta: Decimal | None = None):
+        """
+        items_delta: change of the items amount caused by a single cart mutation.
+        In the incremental mode it's applied in one UPDATE instead of re-aggregating all items,
+        drift is fixed by verify_totals() on checkout and by the periodic verifier.
+        """
+        if self.order and items_delta is not None and self.uses_incremental_totals():
+            return self._apply_items_delta(items_delta)
+
         if self.order:
             items_amount = self.calc.get_items_amount()
             self.order.items_amount = items_amount
@@ -34,12 +50,42 @@ class OrderOrchestrationService:
             self.session_order['modified_at'] = timezone.now().isoformat()
             return self.session_order
 
+    def _apply_items_delta(self, items_delta: Decimal):
+        threshold = self.calc.delivery_settings.delivery_threshold
+        # SET expressions see the old items_amount, so "old + delta < threshold" is the new amount's condition
+        delivery_amount = Case(
+            When(items_amount__lt=threshold - items_delta, then=Value(self.calc.delivery_settings.delivery_price)),
+            default=Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=5, decimal_places=2)
+        )
+        Order.objects.filter(pk=self.order.pk).update(
+            items_amount=F('items_amount') + items_delta,
+            delivery_amount=delivery_amount,
+            total_amount=F('items_amount') + items_delta + delivery_amount,
+            updated_at=timezone.now()
+        )
+        return self.order
+
+    def verify_totals(self) -> bool:
+        """ Recomputes the totals from the items, returns True when a drift had to be fixed """
+        items_amount = self.calc.get_items_amount()
+        self.order.refresh_from_db(fields=['items_amount', 'delivery_amount', 'total_amount'])
+        expected = (items_amount, self.calc.get_delivery_amount(items_amount), self.calc.get_total_amount(items_amount))
+        if (self.order.items_amount, self.order.delivery_amount, self.order.total_amount) == expected:
+            return False
+
+        logger.warning(
+            f'Order #{self.order.pk} totals drifted | stored={self.order.items_amount}, actual={items_amount}'
+        )
+        self.update_price()
+        return True
+
 
 class OrderCalcService:
     def __init__(self, order=None, session_items=None):
         self.order = order
         self.session_items = session_items
-        self.delivery_settings = DeliverySettings.load()
+        self.delivery_settings = DeliverySettings.load_cached()
 
     def get_items_amount(self) -> Decimal:
         if self.order:
@@ -60,6 +106,19 @@ class OrderRecalcService:
         self.order = order
 
     def recalculate(self) -> bool:
-        if price_diff := OrderItemPriceSyncService(order=self.order).sync():
-            OrderOrchestrationService(order=self.order).update_price()
-        return price_diff
\ No newline at end of file
+        """
+        Item prices are synced only when some product price changed since the order's last sync (Product price epoch).
+        The epoch is read before the sync: a price committed meanwhile bumps it past the stored value,
+        so the next call syncs again.
+        """
+        price_diff = False
+        epoch = Product.current_price_epoch()
+        if self.order.price_epoch != epoch:
+            if price_diff := OrderItemPriceSyncService(order=self.order).sync():
+                OrderOrchestrationService(order=self.order).update_price()
+            Order.objects.filter(pk=self.order.pk).update(price_epoch=epoch)
+            self.order.price_epoch = epoch
+
+        if not price_diff and OrderOrchestrationService.uses_incremental_totals():
+            OrderOrchestrationService(order=self.order).verify_totals()  # checkout must see exact totals
+        return price_diff
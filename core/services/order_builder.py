@@ -2,6 +2,7 @@ import logging
 from decimal import Decimal, ROUND_HALF_UP
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
 from core.domain import OrderStatus
 from core.models import Product, Order, OrderItem
@@ -24,55 +25,88 @@ class OrderBuilderService:
             self._handle_backoffice_member_session()
             return None
 
-        order, _ = Order.objects.get_or_create(user=self.user.customer_profile, status=OrderStatus.PENDING)
-        items = list(self.session_items.values())
-        built_items = []
+        with transaction.atomic():
+            # the order row lock serializes the merge with add-to-cart (its upsert updates the order row first),
+            # so no item can be inserted between reading the quantities below and the upsert overwriting them
+            order, _ = (
+                Order.objects
+                .select_for_update()
+                .get_or_create(user=self.user.customer_profile, status=OrderStatus.PENDING)
+            )
+            items = list(self.session_items.values())
+            built_items = []
 
-        product_pks = [item['product_pk'] for item in items]
-        products = {p.pk: p for p in Product.objects.filter(pk__in=product_pks)}
+            product_pks = [item['product_pk'] for item in items]
+            products = {p.pk: p for p in Product.objects.filter(pk__in=product_pks)}
+            # one query for all items already in the order, locked until the upsert below
+            existing_quantities = dict(
+                OrderItem.objects
+                .select_for_update()
+                .filter(order=order, product_pk_snapshot__in=products)
+                .values_list('product_pk_snapshot', 'product_quantity')
+            )
 
-        for item in items:
-            if product := products.get(item['product_pk'], None):
-                order_item, created = OrderItem.objects.get_or_create(order=order, product_pk_snapshot=product.pk)
-                order_item.product_pk_snapshot = product.pk
-                order_item.product_image_url = item['product_image_url']
-                order_item.product_name = product.name
-                order_item.product_description = product.description
-                order_item.product_quantity = order_item.product_quantity + item['quantity'] if not created else item['quantity']
-                order_item.product_unit_price = product.price
-                order_item.product_total_price = Decimal(product.price * order_item.product_quantity).quantize(
-                    Decimal('0.01'), rounding=ROUND_HALF_UP)
-                built_items.append(order_item)
+            for item in items:
+                if product := products.get(item['product_pk'], None):
+                    old_quantity = existing_quantities.get(product.pk, 0)
+                    quantity = old_quantity + item['quantity']
+                    built_items.append(OrderItem(
+                        order=order,
+                        product_pk_snapshot=product.pk,
+                        product_image_url=item['product_image_url'],
+                        product_name=product.name,
+                        product_description=product.description,
+                        product_quantity=quantity,
+                        product_unit_price=product.price,
+                        product_total_price=Decimal(product.price * quantity).quantize(
+                            Decimal('0.01'), rounding=ROUND_HALF_UP),
+                    ))
 
-                logger.info(
-                    f'Updated OrderItem: "{order_item.product_name}" | '
-                    f'Old quantity: {order_item.product_quantity - item["quantity"]} | '
-                    f'New quantity: {order_item.product_quantity}' if not created else
-                    f'Created OrderItem: "{order_item.product_name}"'
-                )
-            else:
-                logger.warning(
-                    f'Product "{item["product_name"]}" (pk=#{item["product_pk"]}) does not exist anymore '
-                    f'Skipping order_item building for this session_item'
+                    logger.info(
+                        f'Updated OrderItem: "{product.name}" | '
+                        f'Old quantity: {old_quantity} | '
+                        f'New quantity: {quantity}' if old_quantity else
+                        f'Created OrderItem: "{product.name}"'
+                    )
+                else:
+                    logger.warning(
+                        f'Product "{item["product_name"]}" (pk=#{item["product_pk"]}) does not exist anymore '
+                        f'Skipping order_item building for this session_item'
+                    )
+                    continue
+
+            if built_items:
+                OrderItem.objects.bulk_create(
+                    built_items,
+                    update_conflicts=True,
+                    unique_fields=['order', 'product_pk_snapshot'],
+                    update_fields=[
+                        'product_name',
+                        'product_image_url',
+                        'product_description',
+                        'product_quantity',
+                        'product_unit_price',
+                        'product_total_price',
+                        'updated_at',
+                    ],
                 )
-                continue
+                OrderOrchestrationService(order=order).update_price()
 
-        if built_items:
-            OrderItem.objects.bulk_update(
-                built_items,
-                fields=[
-                    'product_name',
-                    'product_image_url',
-                    'product_description',
-                    'product_quantity',
-                    'product_unit_price',
-                    'product_total_price',
-                ],
-            )
-            OrderOrchestrationService(order=order).update_price()
+    @classmethod
+    def merge_session_cart(cls, session_cart, user: User):
+        """
+        Moves the anonymous cart into the user's pending order (login/registration).
+        The cart is dropped first and the order is built from the dropped snapshot,
+        so an item added by another tab meanwhile is neither merged twice nor lost.
+        """
+        if not (session_order := session_cart.pop_session_order()):
+            return
+        try:
+            cls(session_order=session_order, user=user).build()
+        except Exception:
+            StockReservationService.bulk_release(session_order['items'].values())  # the cart is gone, nothing else would
+            raise
 
     def _handle_backoffice_member_session(self):
-        for item in self.session_items.values():
-            StockReservationService(cart_item=item).release_reserved_stock()
-            logger.info(f'SessionItem "{item["product_name"]}" (pk=#{item["product_pk"]}) '
-                        f'was released for a back office member {self.user}')
\ No newline at end of file
+        StockReservationService.bulk_release(self.session_items.values())
+        logger.info(f'{len(self.session_items)} SessionItems were released for a back office member {self.user}')
\ No newline at end of file
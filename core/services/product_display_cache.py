@@ -0,0 +1,33 @@
+from django.core.cache import cache
+
+from core.models import Product
+
+
+class ProductDisplayCache:
+    """
+    Shared display fields of products, resolved at render time for carts stored without them (SessionCart).
+    - one get_many per cart, one DB query for the missing products only
+    - dropped by core.signals whenever a product changes
+    """
+    PREFIX = 'product:display'
+    FIELDS = ('name', 'description', 'primary_image_url')
+    TIMEOUT = 60 * 60
+
+    @classmethod
+    def get_many(cls, product_pks) -> dict[int, dict]:
+        keys = {cls._key(pk): pk for pk in product_pks}
+        display = {keys[key]: data for key, data in cache.get_many(keys).items()}
+
+        if missing_pks := [pk for pk in keys.values() if pk not in display]:
+            fresh = {row.pop('pk'): row for row in Product.objects.filter(pk__in=missing_pks).values('pk', *cls.FIELDS)}
+            cache.set_many({cls._key(pk): data for pk, data in fresh.items()}, cls.TIMEOUT)
+            display.update(fresh)
+        return display
+
+    @classmethod
+    def invalidate(cls, product_pk):
+        cache.delete(cls._key(product_pk))
+
+    @classmethod
+    def _key(cls, product_pk):
+        return f'{cls.PREFIX}:{product_pk}'
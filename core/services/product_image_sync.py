@@ -11,6 +11,7 @@ class ProductImageSyncService:
     - primary image always first
     - positions normalized starting from 1
     - alt_text regenerated based on final order
+    - product image summary (count, primary/secondary url & alt) refreshed
     """
     def __init__(self, product):
         self.product = product
@@ -30,6 +31,8 @@ class ProductImageSyncService:
             ProductImage.objects.bulk_update(synced_images, ['position', 'alt_text'])
             logger.info(f'Images synchronized for "{self.product.name}"')
 
+        self.product.update_image_summary(images=self.images)
+
     def _generate_alt_text(self, idx):
         category = self.product.category.name if self.product.category else 'General'
         return f"img. #{idx}, {self.product.name} - {category}"
\ No newline at end of file
@@ -0,0 +1,87 @@
+import logging
+
+from django.db import connection, transaction
+
+from core.domain import OrderStatus
+from core.models import Order, OrderItem, Product
+from .catalog_cache import CatalogCacheService
+from .order_amount_calc import OrderOrchestrationService
+
+logger = logging.getLogger(__name__)
+
+
+class ProductRepricingService:
+    """
+    Backoffice bulk repricing, set-based:
+    1. prices UPDATE of the products whose price actually changes
+    2. item prices UPDATE of the pending orders holding them, found through the product_pk_snapshot index,
+       stamped with the epoch the bump after commit will produce
+    3. totals of those orders, then the price epoch bump after commit
+    Reviews of untouched orders keep skipping the sync, repriced ones are already in sync.
+    """
+    def __init__(self, prices: dict):
+        self.prices = prices  # {product_pk: new price}
+
+    def reprice(self) -> tuple[int, int]:
+        """ Returns the number of repriced products and re-synced pending orders """
+        if not self.prices:
+            return 0, 0
+
+        with transaction.atomic():
+            epoch = Product.current_price_epoch()  # read before the sync, like OrderRecalcService
+            repriced_pks = self._update_prices()
+            order_pks = self._sync_pending_items(repriced_pks, epoch) if repriced_pks else []
+            for order_pk in order_pks:
+                OrderOrchestrationService(order=Order(pk=order_pk)).update_price()
+            if repriced_pks:
+                transaction.on_commit(Product.bump_price_epoch)
+
+        for product in Product.objects.select_related('category').filter(pk__in=repriced_pks):
+            CatalogCacheService.invalidate_product(product)
+
+        logger.info(f'Repricing: {len(repriced_pks)} products, {len(order_pks)} pending orders re-synced')
+        return len(repriced_pks), len(order_pks)
+
+    def _update_prices(self) -> list[int]:
+        values = ', '.join(['(%s, %s::numeric)'] * len(self.prices))
+        params = [value for pk, price in self.prices.items() for value in (pk, price)]
+        table = Product._meta.db_table
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS p '
+                f'SET price = v.price, updated_at = NOW() '
+                f'FROM (VALUES {values}) AS v(id, price) '
+                f'WHERE p.id = v.id AND p.price <> v.price '
+                f'RETURNING p.id',
+                params
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def _sync_pending_items(product_pks, epoch) -> list[int]:
+        """
+        Returns the pending orders whose items were re-priced.
+        Orders that were in sync at epoch get epoch + 1, the value of the bump after commit: any other price change
+        bumps the epoch as well, so those orders re-sync on review then. Orders already behind keep their epoch.
+        """
+        item_table, product_table, order_table = OrderItem._meta.db_table, Product._meta.db_table, Order._meta.db_table
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'WITH synced AS ('
+                f'UPDATE {item_table} AS i '
+                f'SET product_unit_price = p.price, '
+                f'product_total_price = ROUND(p.price * i.product_quantity, 2), '
+                f'updated_at = NOW() '
+                f'FROM {product_table} AS p, {order_table} AS o '
+                f'WHERE i.product_pk_snapshot = ANY(%s) AND p.id = i.product_pk_snapshot '
+                f'AND o.id = i.order_id AND o.status = %s AND i.product_unit_price <> p.price '
+                f'RETURNING i.order_id), '
+                f'stamped AS ('
+                f'UPDATE {order_table} SET price_epoch = %s '
+                f'WHERE id IN (SELECT order_id FROM synced) AND price_epoch = %s) '
+                f'SELECT DISTINCT order_id FROM synced',
+                [list(product_pks), OrderStatus.PENDING, epoch + 1, epoch]
+            )
+            return sorted(row[0] for row in cursor.fetchall())
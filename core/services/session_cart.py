@@ -0,0 +1,231 @@
+import uuid
+from datetime import UTC, datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from redis.exceptions import WatchError
+
+from .order_amount_calc import OrderOrchestrationService
+from .product_display_cache import ProductDisplayCache
+from .session_cart_index import SessionCartIndex
+
+# KEYS: cart | ARGV: product_pk, unit_price, modified, ttl, modified field
+# one field per product ("quantity|unit_price"), so concurrent adds from several tabs can't overwrite each other
+ADD_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+local quantity = 1
+if current then
+    quantity = tonumber(string.match(current, '^(%d+)|')) + 1
+end
+redis.call('HSET', KEYS[1], ARGV[1], quantity .. '|' .. ARGV[2], ARGV[5], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return quantity
+"""
+
+# KEYS: cart | ARGV: product_pk, modified, ttl, modified field
+# returns {removed value, 1 when the cart became empty and was dropped} or nil when the product isn't in the cart
+REMOVE_SCRIPT = """
+local value = redis.call('HGET', KEYS[1], ARGV[1])
+if not value then return nil end
+redis.call('HDEL', KEYS[1], ARGV[1])
+if redis.call('HLEN', KEYS[1]) <= 1 then
+    redis.call('DEL', KEYS[1])
+    return {value, 1}
+end
+redis.call('HSET', KEYS[1], ARGV[4], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {value, 0}
+"""
+
+# KEYS: cart | ARGV: modified, ttl, modified field, product_pk_1, "quantity|unit_price"_1, ...
+# adds the quantities to the products already in the cart (keeping their price), returns the resulting modified time
+IMPORT_SCRIPT = """
+for i = 4, #ARGV, 2 do
+    local quantity, unit_price = string.match(ARGV[i + 1], '^(%d+)|(.+)$')
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if current then
+        local current_quantity, current_price = string.match(current, '^(%d+)|(.+)$')
+        quantity = tonumber(current_quantity) + tonumber(quantity)
+        unit_price = current_price
+    end
+    redis.call('HSET', KEYS[1], ARGV[i], quantity .. '|' .. unit_price)
+end
+local modified = math.max(tonumber(redis.call('HGET', KEYS[1], ARGV[3]) or 0), tonumber(ARGV[1]))
+redis.call('HSET', KEYS[1], ARGV[3], modified)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return modified
+"""
+
+
+class SessionCart:
+    """
+    Anonymous cart in its own Redis hash "cart:<cart_id>", outside the pickled session:
+    - fields: product_pk -> "quantity|unit_price", plus the last modification time (unix) under MODIFIED_FIELD
+    - the session keeps only the cart id, which survives the key cycling on login
+    - display fields come from ProductDisplayCache, totals are computed on read
+    - add/remove change a single field atomically (Lua), the session itself is written only when the cart is created
+    - index entries are dropped by the expiry job only: a cart re-created by another tab right after
+      it was emptied keeps its entry and its stock is still released
+    - to_session_order() returns the legacy "session_order" shape for templates and OrderBuilderService
+    """
+    SESSION_KEY = 'cart_id'
+    PREFIX = 'cart'
+    MODIFIED_FIELD = '_m'
+    TTL = 60 * 60 * 48  # outlives the 23h expiry job, so stock is always released by the job
+
+    def __init__(self, session):
+        self.session = session
+        self.client = cache.client.get_client()
+
+    @property
+    def cart_id(self):
+        return self.session.get(self.SESSION_KEY)
+
+    @classmethod
+    def key(cls, cart_id):
+        return f'{cls.PREFIX}:{cart_id}'
+
+    def get_items(self) -> dict[int, tuple[int, Decimal]]:
+        """ {product_pk: (quantity, unit_price)} """
+        if not self.cart_id:
+            return {}
+        return self.parse(self.client.hgetall(self.key(self.cart_id)))[0]
+
+    def add(self, product) -> int:
+        """ Returns the new quantity of the product in the cart """
+        cart_id = self._get_or_create_cart_id()
+        now = timezone.now()
+        add = self.client.register_script(ADD_SCRIPT)
+        quantity = add(
+            keys=[self.key(cart_id)],
+            args=[product.pk, str(product.price), int(now.timestamp()), self.TTL, self.MODIFIED_FIELD]
+        )
+        SessionCartIndex().touch(cart_id, now)
+        return quantity
+
+    def remove(self, product_pk) -> dict | None:
+        """ Returns the removed item in the session item shape, None when it's not in the cart """
+        if not (cart_id := self.cart_id):
+            return None
+
+        now = timezone.now()
+        remove = self.client.register_script(REMOVE_SCRIPT)
+        removed = remove(keys=[self.key(cart_id)], args=[product_pk, int(now.timestamp()), self.TTL, self.MODIFIED_FIELD])
+        if not removed:
+            return None
+
+        value, emptied = removed
+        if emptied:
+            del self.session[self.SESSION_KEY]
+        else:
+            SessionCartIndex().touch(cart_id, now)
+        return self._build_items({int(product_pk): self._parse_value(value)})[str(product_pk)]
+
+    def clear(self) -> list[dict]:
+        """ Drops the cart, returns its items in the session item shape """
+        return list(self._build_items(self._pop(), with_display=False).values())
+
+    def to_session_order(self) -> dict:
+        return self._to_session_order(self.get_items())
+
+    def pop_session_order(self) -> dict:
+        """ Drops the cart, returns exactly what was dropped in the to_session_order() shape (merge on login) """
+        return self._to_session_order(self._pop())
+
+    def _pop(self) -> dict[int, tuple[int, Decimal]]:
+        if not (cart_id := self.cart_id):
+            return {}
+        with self.client.pipeline() as pipe:  # MULTI: nothing added in between is lost unreleased
+            pipe.hgetall(self.key(cart_id))
+            pipe.delete(self.key(cart_id))
+            raw, _ = pipe.execute()
+        del self.session[self.SESSION_KEY]
+        return self.parse(raw)[0]
+
+    def _to_session_order(self, items) -> dict:
+        if not items:
+            return {}
+        session_order = {'items': self._build_items(items)}
+        return OrderOrchestrationService(session_order=session_order).update_price()
+
+    @classmethod
+    def pop_expired(cls, cart_id, cutoff) -> tuple[list[dict] | None, int | None]:
+        """
+        Drops the cart unless it was modified after cutoff (used by the expiry job, no session needed).
+        Returns (items to release, None) when dropped, (None, modified unix time) when it's still alive,
+        (None, None) when it's gone or was changed concurrently.
+        """
+        client = cache.client.get_client()
+        key = cls.key(cart_id)
+        with client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if not (raw := pipe.hgetall(key)):
+                    return None, None
+                items, modified = cls.parse(raw)
+                if modified and modified >= cutoff.timestamp():
+                    return None, modified
+
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+            except WatchError:
+                return None, None
+        return list(cls._build_items(items, with_display=False).values()), None
+
+    def import_session_order(self, session_order: dict):
+        """
+        Moves a legacy session_order (pickled in the session) into the hash, keeping its modification time.
+        Merged into a cart the session already has: quantities are added, not overwritten.
+        """
+        cart_id = self._get_or_create_cart_id()
+        modified_at = parse_datetime(session_order.get('modified_at') or '') or timezone.now()
+        values = []
+        for item in session_order['items'].values():
+            values += [item['product_pk'], self._format_value(item['quantity'], Decimal(item['unit_price']))]
+
+        import_order = self.client.register_script(IMPORT_SCRIPT)
+        modified = import_order(
+            keys=[self.key(cart_id)], args=[int(modified_at.timestamp()), self.TTL, self.MODIFIED_FIELD, *values]
+        )
+        SessionCartIndex().touch(cart_id, datetime.fromtimestamp(modified, tz=UTC))
+
+    def _get_or_create_cart_id(self):
+        if not self.cart_id:
+            self.session[self.SESSION_KEY] = uuid.uuid4().hex
+        return self.cart_id
+
+    @staticmethod
+    def _build_items(items: dict, with_display=True) -> dict[str, dict]:
+        display = ProductDisplayCache.get_many(items.keys()) if with_display else {}
+        built = {}
+        for product_pk, (quantity, unit_price) in items.items():
+            product = display.get(product_pk, {})
+            built[str(product_pk)] = {
+                'product_pk': product_pk,
+                'product_name': product.get('name', f'Product #{product_pk}'),
+                'description': product.get('description', ''),
+                'product_image_url': product.get('primary_image_url', ''),
+                'quantity': quantity,
+                'unit_price': str(unit_price),
+                'total_price': str((unit_price * quantity).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)),
+            }
+        return built
+
+    @classmethod
+    def parse(cls, raw: dict) -> tuple[dict[int, tuple[int, Decimal]], int | None]:
+        """ Raw hash -> ({product_pk: (quantity, unit_price)}, modified unix time) """
+        modified = raw.pop(cls.MODIFIED_FIELD.encode(), None)
+        items = {int(pk): cls._parse_value(value) for pk, value in raw.items()}
+        return items, int(modified) if modified else None
+
+    @staticmethod
+    def _parse_value(value: bytes) -> tuple[int, Decimal]:
+        quantity, unit_price = value.decode().split('|')
+        return int(quantity), Decimal(unit_price)
+
+    @staticmethod
+    def _format_value(quantity: int, unit_price: Decimal) -> str:
+        return f'{quantity}|{unit_price}'
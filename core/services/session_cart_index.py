@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.utils import timezone
+
+# KEYS: index | ARGV: cutoff, cart_id_1..cart_id_n
+# removes only entries still older than cutoff, a cart touched meanwhile keeps its fresh entry
+REMOVE_STALE_SCRIPT = """
+local removed = 0
+for i = 2, #ARGV do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) < tonumber(ARGV[1]) then
+        removed = removed + redis.call('ZREM', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+
+class SessionCartIndex:
+    """
+    Sorted set of anonymous cart ids (SessionCart), scored by the last cart modification (unix time).
+    - written on every cart change, so the expiry job reads only expired carts instead of scanning all sessions
+    - entries of carts gone for other reasons (emptied, cleared, merged on login) are dropped by the job
+    """
+    KEY = 'session_carts:modified'
+
+    def __init__(self):
+        self.client = cache.client.get_client()
+
+    def touch(self, cart_id, modified_at=None):
+        if not cart_id:
+            return
+        modified_at = modified_at or timezone.now()
+        self.client.zadd(self.KEY, {cart_id: modified_at.timestamp()})
+
+    def remove(self, *cart_ids):
+        if cart_ids := [cart_id for cart_id in cart_ids if cart_id]:
+            self.client.zrem(self.KEY, *cart_ids)
+
+    def remove_stale(self, cart_ids, cutoff) -> int:
+        if not cart_ids:
+            return 0
+        remove_stale = self.client.register_script(REMOVE_STALE_SCRIPT)
+        return remove_stale(keys=[self.KEY], args=[cutoff.timestamp(), *cart_ids])
+
+    def expired(self, cutoff, limit=100) -> list[str]:
+        cart_ids = self.client.zrangebyscore(self.KEY, '-inf', f'({cutoff.timestamp()}', start=0, num=limit)
+        return [cart_id.decode() for cart_id in cart_ids]
+
+    def size(self) -> int:
+        return self.client.zcard(self.KEY)
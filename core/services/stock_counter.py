@@ -0,0 +1,129 @@
+import logging
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# KEYS: counter, pending | ARGV: product_pk, quantity
+# returns remaining stock, -1 when the counter isn't loaded yet, -2 when stock is insufficient
+RESERVE_SCRIPT = """
+local stock = redis.call('GET', KEYS[1])
+if not stock then return -1 end
+stock = tonumber(stock)
+local quantity = tonumber(ARGV[2])
+if stock < quantity then return -2 end
+redis.call('DECRBY', KEYS[1], quantity)
+redis.call('HINCRBY', KEYS[2], ARGV[1], -quantity)
+return stock - quantity
+"""
+
+# KEYS: pending, counter_1..counter_n | ARGV: product_pk_1, quantity_1, ..., product_pk_n, quantity_n
+RELEASE_SCRIPT = """
+for i = 2, #KEYS do
+    local product_pk = ARGV[(i - 1) * 2 - 1]
+    local quantity = tonumber(ARGV[(i - 1) * 2])
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('INCRBY', KEYS[i], quantity)
+    end
+    redis.call('HINCRBY', KEYS[1], product_pk, quantity)
+end
+return #KEYS - 1
+"""
+
+# KEYS: counter, pending, inflight, epoch | ARGV: product_pk, db_quantity, expected_epoch, inflight_applied
+# returns loaded stock or -1 when a reconciliation step happened after the DB snapshot (caller retries)
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return tonumber(redis.call('GET', KEYS[1])) end
+if (redis.call('GET', KEYS[4]) or '0') ~= ARGV[3] then return -1 end
+local stock = tonumber(ARGV[2]) + tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+if ARGV[4] == '0' then
+    stock = stock + tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+end
+if stock < 0 then stock = 0 end
+redis.call('SET', KEYS[1], stock)
+return stock
+"""
+
+# KEYS: pending, inflight, epoch | ARGV: new batch id
+# moves pending deltas to inflight, unless an unacknowledged batch is still there (crashed run)
+TAKE_BATCH_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then return redis.call('HGETALL', KEYS[2]) end
+if redis.call('EXISTS', KEYS[1]) == 0 then return {} end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('HSET', KEYS[2], '__batch__', ARGV[1])
+redis.call('INCR', KEYS[3])
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# KEYS: inflight, epoch | ARGV: batch id
+ACK_BATCH_SCRIPT = """
+if redis.call('HGET', KEYS[1], '__batch__') ~= ARGV[1] then return 0 end
+redis.call('DEL', KEYS[1])
+redis.call('INCR', KEYS[2])
+return 1
+"""
+
+
+class RedisStockCounter:
+    """
+    Redis-side stock counters for the add-to-cart hot path (STOCK_RESERVATION_ENGINE = 'redis').
+    - every reservation/release is a single Lua call: counter and pending delta change atomically
+    - Postgres is updated later in batches by StockReservationService.reconcile_counters()
+    - pending -> inflight -> ack cycle with a batch id makes the reconciliation crash-safe
+    """
+    PREFIX = 'stock'
+    PENDING_KEY = f'{PREFIX}:pending'
+    INFLIGHT_KEY = f'{PREFIX}:inflight'
+    EPOCH_KEY = f'{PREFIX}:epoch'
+    BATCH_FIELD = '__batch__'
+
+    def __init__(self):
+        self.client = cache.client.get_client()
+        self._reserve = self.client.register_script(RESERVE_SCRIPT)
+        self._release = self.client.register_script(RELEASE_SCRIPT)
+        self._load = self.client.register_script(LOAD_SCRIPT)
+        self._take_batch = self.client.register_script(TAKE_BATCH_SCRIPT)
+        self._ack_batch = self.client.register_script(ACK_BATCH_SCRIPT)
+
+    @classmethod
+    def counter_key(cls, product_pk):
+        return f'{cls.PREFIX}:counter:{product_pk}'
+
+    def reserve(self, product_pk, quantity=1) -> int:
+        return int(self._reserve(keys=[self.counter_key(product_pk), self.PENDING_KEY], args=[product_pk, quantity]))
+
+    def release(self, quantities: dict):
+        """ quantities: {product_pk: released_quantity} """
+        if not quantities:
+            return
+        keys = [self.PENDING_KEY] + [self.counter_key(pk) for pk in quantities]
+        args = [value for pk, quantity in quantities.items() for value in (pk, quantity)]
+        self._release(keys=keys, args=args)
+
+    def get_snapshot_state(self):
+        """ Epoch and inflight batch id, read atomically, to be paired with a DB snapshot of the quantity """
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.get(self.EPOCH_KEY)
+            pipe.hget(self.INFLIGHT_KEY, self.BATCH_FIELD)
+            epoch, batch_id = pipe.execute()
+        return (epoch or b'0').decode(), batch_id.decode() if batch_id else None
+
+    def load(self, product_pk, db_quantity, epoch, inflight_applied) -> int:
+        keys = [self.counter_key(product_pk), self.PENDING_KEY, self.INFLIGHT_KEY, self.EPOCH_KEY]
+        args = [product_pk, db_quantity, epoch, int(bool(inflight_applied))]
+        return int(self._load(keys=keys, args=args))
+
+    def forget(self, product_pk):
+        """ Counter is rebuilt from DB + unreconciled deltas on the next reservation """
+        self.client.delete(self.counter_key(product_pk))
+
+    def take_batch(self) -> tuple[str | None, dict]:
+        raw = self._take_batch(keys=[self.PENDING_KEY, self.INFLIGHT_KEY, self.EPOCH_KEY], args=[uuid.uuid4().hex])
+        fields = dict(zip(raw[::2], raw[1::2]))
+        batch_id = fields.pop(self.BATCH_FIELD.encode(), b'').decode() or None
+        deltas = {int(pk): int(delta) for pk, delta in fields.items() if int(delta)}
+        return batch_id, deltas
+
+    def ack_batch(self, batch_id):
+        return bool(self._ack_batch(keys=[self.INFLIGHT_KEY, self.EPOCH_KEY], args=[batch_id]))
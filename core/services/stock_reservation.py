@@ -1,32 +1,97 @@
 import logging
 
-from django.db import transaction
-from django.db.models import F
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Exists
 
-from core.models import Product, OrderItem
+from core.models import Product, OrderItem, StockReconciliationBatch
+from .catalog_cache import CatalogCacheService
+from .stock_counter import RedisStockCounter
 
 logger = logging.getLogger(__name__)
 
 
 class StockReservationService:
+    """
+    Engines (settings.STOCK_RESERVATION_ENGINE):
+    - 'db': row lock on Product for every reservation, Product.quantity is always exact
+    - 'redis': atomic Redis counters (RedisStockCounter), Product.quantity is reconciled in batches by Celery
+    """
+    LOAD_ATTEMPTS = 3
+
     def __init__(self, product_pk=None, cart_item=None):
         self.product_pk = product_pk
         self.cart_item = cart_item
+        self.reserved_in_redis = False
+
+    @staticmethod
+    def uses_redis_engine():
+        return getattr(settings, 'STOCK_RESERVATION_ENGINE', 'db') == 'redis'
 
     def reserve_stock(self):
-        try:
-            with transaction.atomic():
-                product = Product.objects.select_for_update().get(pk=self.product_pk)
-                if product.quantity > 0:
-                    product.quantity -= 1
-                    product.save(update_fields=['quantity'])
-                    return {'success': True, 'message': f'Product "{product.name}" was added to the cart',
-                            'product': product}
-                return {'success': False, 'message': f'Unfortunately "{product.name}" is out of stock'}
-
-        except Product.DoesNotExist:
+        if self.uses_redis_engine():
+            return self._reserve_in_redis()
+        return self._reserve_in_db()
+
+    def _reserve_in_db(self):
+        # conditional decrement returning the product: one statement instead of SELECT FOR UPDATE + UPDATE
+        table = Product._meta.db_table
+        reserved = Product.objects.raw(
+            f'UPDATE {table} SET quantity = quantity - 1 WHERE id = %s AND quantity > 0 RETURNING *',
+            [self.product_pk]
+        )
+        if product := next(iter(reserved), None):
+            if product.quantity == 0:
+                CatalogCacheService.invalidate_product(product)  # disappears from the buyer catalog
+            return {'success': True, 'message': f'Product "{product.name}" was added to the cart', 'product': product}
+
+        if product_name := Product.objects.filter(pk=self.product_pk).values_list('name', flat=True).first():
+            return {'success': False, 'message': f'Unfortunately "{product_name}" is out of stock'}
+        return {'success': False, 'message': 'Unfortunately this product does not exist anymore'}
+
+    def _reserve_in_redis(self):
+        product = Product.objects.filter(pk=self.product_pk).first()  # plain read, no row lock
+        if not product:
             return {'success': False, 'message': 'Unfortunately this product does not exist anymore'}
 
+        counter = RedisStockCounter()
+        remaining = counter.reserve(product.pk)
+        for _ in range(self.LOAD_ATTEMPTS):
+            if remaining != -1:
+                break
+            self._load_counter(counter, product.pk)
+            remaining = counter.reserve(product.pk)
+
+        if remaining == -1:
+            logger.warning(f'Stock counter of "{product.name}" could not be loaded. Falling back to row lock')
+            return self._reserve_in_db()
+        if remaining == -2:
+            return {'success': False, 'message': f'Unfortunately "{product.name}" is out of stock'}
+
+        self.reserved_in_redis = True
+        product.quantity = remaining
+        return {'success': True, 'message': f'Product "{product.name}" was added to the cart', 'product': product}
+
+    def cancel_reservation(self):
+        """ Gives back a Redis reservation whose cart write failed: Redis isn't rolled back with the transaction """
+        if self.reserved_in_redis:
+            RedisStockCounter().release({self.product_pk: 1})
+            self.reserved_in_redis = False
+
+    def _load_counter(self, counter, product_pk):
+        # epoch + DB snapshot let the counter account for deltas not yet applied to Product.quantity
+        epoch, batch_id = counter.get_snapshot_state()
+        snapshot = (
+            Product.objects
+            .filter(pk=product_pk)
+            .annotate(inflight_applied=Exists(StockReconciliationBatch.objects.filter(batch_id=batch_id or '')))
+            .values_list('quantity', 'inflight_applied')
+            .first()
+        )
+        if snapshot:
+            db_quantity, inflight_applied = snapshot
+            counter.load(product_pk, db_quantity, epoch, inflight_applied)
+
     def release_reserved_stock(self):
         if isinstance(self.cart_item, OrderItem):
             return self._process_extracted_data(*self._extract_from_order(self.cart_item))
@@ -36,18 +101,126 @@ class StockReservationService:
             logger.warning(f'Invalid type of cart_item "{self.cart_item}". Skipping stock release')
 
     def _process_extracted_data(self, product_pk, product_name, release_quantity):
+        if self.uses_redis_engine():
+            # Redis isn't rolled back with the caller's transaction, so release only once it's committed
+            transaction.on_commit(lambda: RedisStockCounter().release({product_pk: release_quantity}))
+            logger.info(f'Quantity of "{product_name}" was released in Redis | Released: +{release_quantity}')
+            return {'success': True, 'message': f'Product "{product_name}" was removed from the cart'}
+
         updated = Product.objects.filter(pk=product_pk).update(
             quantity=F('quantity') + release_quantity
         )
         if updated:
             logger.info(f'Quantity of "{product_name}" was updated | Released: +{release_quantity}')
+            self._invalidate_catalog_if_restocked(product_pk, release_quantity)
             return {'success': True, 'message': f'Product "{product_name}" was removed from the cart'}
 
         logger.warning(f'Product "{product_name}" (pk={product_pk}) does not exist anymore. Skipping stock release')
         return {'success': False, 'message': f'Product "{product_name}" does not exist anymore'}
 
-    def _extract_from_order(self, item):
+    def _invalidate_catalog_if_restocked(self, product_pk, release_quantity):
+        # quantity equal to the released one means the product was out of stock and is back in the catalog
+        if product := Product.objects.select_related('category').filter(pk=product_pk, quantity=release_quantity).first():
+            CatalogCacheService.invalidate_product(product)
+
+    @staticmethod
+    def _extract_from_order(item):
         return item.product_pk_snapshot, item.product_name, item.product_quantity
 
-    def _extract_from_session(self, item):
+    @staticmethod
+    def _extract_from_session(item):
         return item['product_pk'], item['product_name'], item['quantity']
+
+    @classmethod
+    def bulk_release(cls, cart_items) -> int:
+        """
+        Releases OrderItems and/or session items at once: quantities are grouped per product
+        and applied in a single statement. Returns the number of restocked products.
+        """
+        quantities = {}
+        for item in cart_items:
+            if isinstance(item, OrderItem):
+                product_pk, _, release_quantity = cls._extract_from_order(item)
+            elif isinstance(item, dict):
+                product_pk, _, release_quantity = cls._extract_from_session(item)
+            else:
+                logger.warning(f'Invalid type of cart_item "{item}". Skipping stock release')
+                continue
+            quantities[product_pk] = quantities.get(product_pk, 0) + release_quantity
+
+        return cls.release_quantities(quantities)
+
+    @classmethod
+    def release_quantities(cls, quantities: dict) -> int:
+        """ quantities: {product_pk: released_quantity}, pre-aggregated by the caller """
+        if not quantities:
+            return 0
+
+        if cls.uses_redis_engine():
+            # Redis isn't rolled back with the caller's transaction, so release only once it's committed
+            transaction.on_commit(lambda: RedisStockCounter().release(quantities))
+            logger.info(f'Stock of {len(quantities)} products was released in Redis')
+            return len(quantities)
+
+        rows = cls._apply_quantity_deltas(quantities)
+        cls._invalidate_catalog_on_zero_crossing(rows)
+
+        if missing_pks := set(quantities) - {pk for pk, _, _ in rows}:
+            logger.warning(f'Products {sorted(missing_pks)} do not exist anymore. Skipping stock release')
+        logger.info(f'Stock of {len(rows)} products was released')
+        return len(rows)
+
+    @classmethod
+    def reconcile_counters(cls) -> int:
+        """
+        Applies Redis stock deltas to Product.quantity in one statement per batch.
+        Crash-safe: an unacknowledged batch is retried, the batch journal prevents applying it twice.
+        """
+        counter = RedisStockCounter()
+        batch_id, deltas = counter.take_batch()
+        if not batch_id:
+            return 0
+
+        with transaction.atomic():
+            _, created = StockReconciliationBatch.objects.get_or_create(
+                batch_id=batch_id,
+                defaults={'products_count': len(deltas)}
+            )
+            rows = cls._apply_quantity_deltas(deltas) if created and deltas else []
+
+        counter.ack_batch(batch_id)
+
+        cls._invalidate_catalog_on_zero_crossing(rows)
+
+        if created:
+            logger.info(f'Stock batch "{batch_id}" reconciled | Products: {len(rows)}')
+        else:
+            logger.warning(f'Stock batch "{batch_id}" had already been applied. Acknowledged only')
+        return len(rows)
+
+    @staticmethod
+    def _invalidate_catalog_on_zero_crossing(rows):
+        # stock crossing zero changes the buyer catalog
+        crossed_pks = [pk for pk, quantity, delta in rows if quantity == 0 or quantity == delta]
+        if not crossed_pks:
+            return
+        for product in Product.objects.select_related('category').filter(pk__in=crossed_pks):
+            CatalogCacheService.invalidate_product(product)
+
+    @staticmethod
+    def _apply_quantity_deltas(deltas: dict) -> list:
+        """ deltas: {product_pk: quantity_delta} -> [(product_pk, new_quantity, delta)] """
+        values = ', '.join(['(%s, %s)'] * len(deltas))
+        params = [value for pk, delta in deltas.items() for value in (pk, delta)]
+        table = Product._meta.db_table
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS p '
+                f'SET quantity = GREATEST(p.quantity + v.delta, 0) '
+                f'FROM (VALUES {values}) AS v(id, delta) '
+                f'WHERE p.id = v.id '
+                f'RETURNING p.id, p.quantity, v.delta',
+                params
+            )
+            return cursor.fetchall()
@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.models import Category, Product
+from core.services.catalog_cache import CatalogCacheService
+from core.services.product_display_cache import ProductDisplayCache
+from core.services.stock_counter import RedisStockCounter
+from core.services.stock_reservation import StockReservationService
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_catalog_on_category_change(sender, instance, **kwargs):
+    CatalogCacheService.invalidate_all()
+
+
+@receiver(post_save, sender=Product)
+def invalidate_catalog_on_product_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    - quantity-only saves come from StockReservationService, which invalidates itself when stock crosses zero
+    - partial saves (visibility, image summary) touch only the product and its category pages
+    - full saves may move the product between categories or change the category filter, so drop everything
+    """
+    if update_fields and set(update_fields) <= {'quantity'}:
+        return
+    if update_fields and 'category' not in update_fields and not created:
+        CatalogCacheService.invalidate_product(instance)
+    else:
+        CatalogCacheService.invalidate_all()
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_on_product_delete(sender, instance, **kwargs):
+    CatalogCacheService.invalidate_all()
+
+
+@receiver([post_save, post_delete], sender=Product)
+def reset_stock_counter_on_product_change(sender, instance, update_fields=None, **kwargs):
+    # quantity edited in the backoffice -> Redis counter is rebuilt from DB on the next reservation
+    if not StockReservationService.uses_redis_engine():
+        return
+    if update_fields and 'quantity' not in update_fields:
+        return
+    # after the commit: a reservation reloading the counter earlier would read the quantity before the edit
+    product_pk = instance.pk
+    transaction.on_commit(lambda: RedisStockCounter().forget(product_pk))
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_display_cache_on_product_change(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'quantity'}:
+        return
+    ProductDisplayCache.invalidate(instance.pk)
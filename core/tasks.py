@@ -1,80 +1,156 @@
 import logging
-from datetime import timedelta
+import time
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
 
 from celery import shared_task
-from django.contrib.sessions.backends.cache import SessionStore
-from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.utils.dateparse import parse_datetime
 
-from core.models import Order
+from core.domain import OrderStatus
+from core.models import DeliverySettings, Order, OrderItem, StockReconciliationBatch
+from core.services.order_amount_calc import OrderOrchestrationService
+from core.services.product_repricing import ProductRepricingService
+from core.services.session_cart import SessionCart
+from core.services.session_cart_index import SessionCartIndex
 from core.services.stock_reservation import StockReservationService
 
 logger = logging.getLogger(__name__)
 
 
 @shared_task
-def cleanup_expired_pending_orders():
+def cleanup_expired_pending_orders(chunk_size=500):
+    """
+    Set-based expiry in chunks: each chunk locks its orders (SKIP LOCKED, so concurrent workers take
+    disjoint chunks), restores stock aggregated per product and flips statuses in one transaction.
+    """
     cutoff = timezone.now() - timedelta(hours=24)
-    order_pks = []
+    started_at = time.monotonic()
+    expired_count = items_count = 0
 
-    expired_orders = Order.objects.filter(
-        status=OrderStatus.PENDING,
-        updated_at__lt=cutoff
-    ).prefetch_related('items')
-
-    for order in expired_orders:
-        for order_item in order.items.all():
-            StockReservationService(cart_item=order_item).release_reserved_stock()
-
-        order_pks.append(order.pk)
-        logger.info(f'Cleared expired order #{order.pk} for user {order.user.user.email}')
-
-    if order_pks:
-        Order.objects.filter(pk__in=order_pks).update(
-            status=OrderStatus.EXPIRED,
-            expired_at=timezone.now()
+    while True:
+        with transaction.atomic():
+            order_pks = list(
+                Order.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=OrderStatus.PENDING, updated_at__lt=cutoff)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not order_pks:
+                break
+
+            reserved = (
+                OrderItem.objects
+                .filter(order_id__in=order_pks)
+                .values('product_pk_snapshot')
+                .annotate(quantity=Sum('product_quantity'), items=Count('pk'))
+            )
+            quantities = {}
+            for row in reserved:
+                quantities[row['product_pk_snapshot']] = row['quantity']
+                items_count += row['items']
+
+            StockReservationService.release_quantities(quantities)
+            Order.objects.filter(pk__in=order_pks).update(
+                status=OrderStatus.EXPIRED,
+                expired_at=timezone.now()
+            )
+            expired_count += len(order_pks)
+
+    if expired_count:
+        elapsed = time.monotonic() - started_at
+        logger.info(
+            f'Order cleanup: expired {expired_count} orders ({items_count} items) in {elapsed:.2f}s '
+            f'| {(expired_count + items_count) / elapsed:.0f} rows/sec'
         )
-        logger.info(f'Order cleanup: removed {len(order_pks)} expired orders')
+    return expired_count
 
 
 @shared_task
-def cleanup_expired_session_orders():
-    redis_client = cache.client.get_client()
+def cleanup_expired_session_orders(batch_size=100):
+    """ Reads only expired carts from SessionCartIndex, stock is released once per batch """
+    index = SessionCartIndex()
     cutoff = timezone.now() - timedelta(hours=23)
-    cursor = 0
     cleaned_count = 0
 
-    # iteratively scanning Redis
-    while True:
-        # getting ~100 keys at a time (doesn't block Redis)
-        cursor, keys = redis_client.scan(cursor, match='*django.contrib.sessions.cache*', count=100)
+    while cart_ids := index.expired(cutoff, limit=batch_size):
+        expired_items = []
 
-        for key in keys:
+        for cart_id in cart_ids:
             try:
-                full_key = key.decode()
-                session_key = full_key.split('django.contrib.sessions.cache')[-1]  # Django stores as "prefix:version:session_key"
-                session = SessionStore(session_key=session_key)
-
-                session_order = session.get('session_order')
-                if not session_order:
-                    continue
-
-                last_modified = parse_datetime(session_order.get('modified_at'))  # str to datetime
-                if last_modified < cutoff:
-                    for session_item in session_order['items'].values():
-                        StockReservationService(cart_item=session_item).release_reserved_stock()
-
-                    del session['session_order']
-                    session.save()
+                items, modified = SessionCart.pop_expired(cart_id, cutoff)
+                if modified:
+                    index.touch(cart_id, datetime.fromtimestamp(modified, tz=UTC))  # index lagged behind the cart
+                elif items is not None:
+                    expired_items.extend(items)  # released only once the cart is gone
                     cleaned_count += 1
 
             except Exception as e:
-                logger.warning(f'Error cleaning session {session_key}: {e}')
+                logger.warning(f'Error cleaning cart {cart_id}: {e}')
                 continue
 
-        if cursor == 0:
-            break
+        # re-scored and concurrently touched carts keep their fresh entries
+        index.remove_stale(cart_ids, cutoff)
+        StockReservationService.bulk_release(expired_items)
 
     if cleaned_count > 0:
-        logger.info(f'Session cleanup: removed {cleaned_count} expired carts')
\ No newline at end of file
+        logger.info(f'Session cleanup: removed {cleaned_count} expired carts')
+
+
+@shared_task
+def reconcile_stock_counters():
+    """ Flushes Redis stock deltas to Postgres (STOCK_RESERVATION_ENGINE = 'redis') """
+    if not StockReservationService.uses_redis_engine():
+        return
+
+    reconciled_count = StockReservationService.reconcile_counters()
+    if reconciled_count:
+        logger.info(f'Stock reconciliation: updated {reconciled_count} products')
+
+    StockReconciliationBatch.objects.filter(created_at__lt=timezone.now() - timedelta(days=1)).delete()
+
+
+@shared_task
+def verify_pending_order_totals():
+    """
+    Fixes drift of incrementally maintained totals (ORDER_TOTALS_MODE = 'incremental'):
+    items amount against the items, delivery against the threshold rule, total against items + delivery
+    """
+    if not OrderOrchestrationService.uses_incremental_totals():
+        return
+
+    delivery_settings = DeliverySettings.load_cached()
+    expected_delivery_amount = Case(
+        When(actual_items_amount__lt=delivery_settings.delivery_threshold,
+             then=Value(delivery_settings.delivery_price)),
+        default=Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=5, decimal_places=2)
+    )
+    drifted_orders = (
+        Order.objects
+        .filter(status=OrderStatus.PENDING)
+        .annotate(actual_items_amount=Coalesce(Sum('items__product_total_price'), Decimal('0.00')))
+        .annotate(expected_delivery_amount=expected_delivery_amount)
+        .filter(
+            ~Q(items_amount=F('actual_items_amount'))
+            | ~Q(delivery_amount=F('expected_delivery_amount'))
+            | ~Q(total_amount=F('actual_items_amount') + F('expected_delivery_amount'))
+        )
+    )
+    fixed_count = 0
+    for order in drifted_orders.iterator(chunk_size=500):
+        OrderOrchestrationService(order=order).update_price()
+        fixed_count += 1
+
+    if fixed_count:
+        logger.warning(f'Order totals verification: fixed {fixed_count} drifted orders')
+
+
+@shared_task
+def reprice_products(prices: dict):
+    """ Backoffice bulk repricing, prices: {product_pk: "new price"} (JSON keys and decimals arrive as strings) """
+    prices = {int(product_pk): Decimal(price) for product_pk, price in prices.items()}
+    return ProductRepricingService(prices).reprice()
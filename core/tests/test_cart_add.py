@@ -0,0 +1,158 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.domain import OrderStatus
+from core.models import DeliverySettings, Order, Product
+from core.services.cart_add import AddToCartService
+from core.services.order_builder import OrderBuilderService
+from core.services.session_cart import SessionCart
+from core.services.stock_counter import RedisStockCounter
+
+User = get_user_model()
+
+
+class AddToCartServiceTestCase(TestCase):
+    """ The former view path took 8-10 queries: row lock, stock UPDATE, two get_or_create, SUM, Order.save, settings """
+
+    def setUp(self):
+        DeliverySettings.invalidate_cache()
+        DeliverySettings.load_cached()
+        self.user = User.objects.create_user(email='cart@mail.ru', email_verified=True, password='StrongPas123')
+        self.profile = self.user.customer_profile
+        self.product = Product.objects.create(name='Upsert Product', price=Decimal('20.10'), quantity=3)
+
+    def _add(self):
+        return AddToCartService(customer_profile=self.profile, product_pk=self.product.pk).add()
+
+    def test_add_takes_three_statements(self):
+        with self.assertNumQueries(3 + 2):  # stock, upsert, totals + the savepoint pair of the transaction
+            self.assertTrue(self._add()['success'])
+        with self.assertNumQueries(3 + 2):
+            self._add()
+
+        order = Order.objects.get(user=self.profile, status=OrderStatus.PENDING)
+        item = order.items.get()
+        self.assertEqual((item.product_quantity, item.product_total_price), (2, Decimal('40.20')))
+        self.assertEqual((order.items_amount, order.delivery_amount, order.total_amount),
+                         (Decimal('40.20'), Decimal('8.50'), Decimal('48.70')))
+
+    def test_out_of_stock_leaves_cart_untouched(self):
+        for _ in range(3):
+            self._add()
+        response = self._add()
+
+        self.assertFalse(response['success'])
+        self.assertEqual(Order.objects.get(user=self.profile).items.get().product_quantity, 3)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 0)
+
+    @override_settings(ORDER_TOTALS_MODE='incremental')
+    def test_incremental_totals(self):
+        self._add()
+        self._add()
+        order = Order.objects.get(user=self.profile, status=OrderStatus.PENDING)
+        self.assertEqual((order.items_amount, order.total_amount), (Decimal('40.20'), Decimal('48.70')))
+
+    def test_view_uses_upsert_for_authenticated_users(self):
+        self.client.post(reverse('accounts:login'), {'username': self.user.email, 'password': 'StrongPas123'})
+        self.client.post(reverse('core:orderitem_create', args=[self.product.pk]))
+        self.assertEqual(Order.objects.get(user=self.profile).items.get().product_name, self.product.name)
+
+
+@override_settings(ORDER_TOTALS_MODE='incremental', STOCK_RESERVATION_ENGINE='redis')
+class ConcurrentAddToCartTestCase(TransactionTestCase):
+    """ Redis reservations take no Product row lock, two adds of one product meet in the item upsert """
+    def setUp(self):
+        DeliverySettings.invalidate_cache()
+        user = User.objects.create_user(email='race@mail.ru', email_verified=True, password='StrongPas123')
+        self.profile = user.customer_profile
+        self.product = Product.objects.create(name='Race Product', price=Decimal('20.10'), quantity=10)
+        counter = RedisStockCounter()
+        counter.client.delete(counter.PENDING_KEY, counter.INFLIGHT_KEY)  # deltas left by earlier runs, pks repeat
+        counter.forget(self.product.pk)
+        AddToCartService(customer_profile=self.profile, product_pk=self.product.pk).add()
+
+    def test_concurrent_adds_of_one_product_keep_totals_exact(self):
+        def add_in_thread():
+            try:
+                AddToCartService(customer_profile=self.profile, product_pk=self.product.pk).add()
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            AddToCartService(customer_profile=self.profile, product_pk=self.product.pk).add()
+            # started while this add holds the item row: it waits for the commit below
+            thread = threading.Thread(target=add_in_thread)
+            thread.start()
+            time.sleep(0.5)
+        thread.join()
+
+        order = Order.objects.get(user=self.profile, status=OrderStatus.PENDING)
+        item = order.items.get()
+        self.assertEqual((item.product_quantity, item.product_total_price), (3, Decimal('60.30')))
+        self.assertEqual(order.items_amount, Decimal('60.30'))
+
+    def test_login_merge_waits_for_concurrent_add(self):
+        other = Product.objects.create(name='Race Product 2', price=Decimal('1.00'), quantity=10)
+        RedisStockCounter().forget(other.pk)
+        session = {}
+        SessionCart(session).add(other)
+
+        def merge_in_thread():
+            try:
+                OrderBuilderService.merge_session_cart(SessionCart(session), user=User.objects.get(email='race@mail.ru'))
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            AddToCartService(customer_profile=self.profile, product_pk=other.pk).add()  # a new, not yet visible item
+            # started while this add holds the order row: the merge reads the quantities after the commit below
+            thread = threading.Thread(target=merge_in_thread)
+            thread.start()
+            time.sleep(0.5)
+        thread.join()
+
+        order = Order.objects.get(user=self.profile, status=OrderStatus.PENDING)
+        self.assertEqual(order.items.get(product_pk_snapshot=other.pk).product_quantity, 2)
+
+
+@override_settings(ORDER_TOTALS_MODE='incremental', STOCK_RESERVATION_ENGINE='redis')
+class ConcurrentOrderItemDeleteTestCase(TransactionTestCase):
+    def setUp(self):
+        DeliverySettings.invalidate_cache()
+        self.user = User.objects.create_user(email='delete@mail.ru', email_verified=True, password='StrongPas123')
+        self.product = Product.objects.create(name='Delete Product', price=Decimal('20.10'), quantity=10)
+        self.counter = RedisStockCounter()
+        self.counter.client.delete(self.counter.PENDING_KEY, self.counter.INFLIGHT_KEY)
+        self.counter.forget(self.product.pk)
+        AddToCartService(customer_profile=self.user.customer_profile, product_pk=self.product.pk).add()
+        self.item = Order.objects.get(user=self.user.customer_profile).items.get()
+
+        self.client.post(reverse('accounts:login'), {'username': self.user.email, 'password': 'StrongPas123'})
+
+    def _delete(self):
+        self.client.post(reverse('core:orderitem_delete', args=[self.item.pk]))
+
+    def test_concurrent_deletes_release_stock_once(self):
+        def delete_in_thread():
+            try:
+                self._delete()
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            self._delete()
+            # started while this delete holds the item row: it finds nothing left to release after the commit
+            thread = threading.Thread(target=delete_in_thread)
+            thread.start()
+            time.sleep(0.5)
+        thread.join()
+
+        self.assertEqual(int(self.counter.client.get(self.counter.counter_key(self.product.pk))), 10)
+        self.assertFalse(Order.objects.filter(user=self.user.customer_profile).exists())
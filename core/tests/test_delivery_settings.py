@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import DeliverySettings
+
+User = get_user_model()
+
+
+class DeliverySettingsCacheTestCase(TestCase):
+    def setUp(self):
+        DeliverySettings.invalidate_cache()
+
+    def test_cached_reads_skip_database(self):
+        DeliverySettings.load_cached()  # cold cache: get_or_create
+        with self.assertNumQueries(0):
+            settings = DeliverySettings.load_cached()
+        self.assertEqual(settings.delivery_price, Decimal('8.50'))
+
+    def test_update_view_invalidates_other_processes(self):
+        DeliverySettings.load_cached()
+        other_process_cache = DeliverySettings._local_cache
+
+        manager = User.objects.create_user(email='manager@mail.ru', password='StrongPas123', role='manager')
+        self.client.post(reverse('accounts:login'), {'username': manager.email, 'password': 'StrongPas123'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('core:delivery_settings_update'), {'delivery_threshold': '60.00', 'delivery_price': '4.00'})
+
+        self.assertEqual(DeliverySettings.load_cached().delivery_price, Decimal('4.00'))
+
+        # another process still holds the old copy until its local TTL runs out, then revalidates the version
+        version, _, instance = other_process_cache
+        DeliverySettings._local_cache = (version, 0, instance)
+        self.assertEqual(DeliverySettings.load_cached().delivery_price, Decimal('4.00'))
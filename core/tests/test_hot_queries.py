@@ -0,0 +1,58 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Category, Order, Product
+from core.services.cart_add import AddToCartService
+from payments.domain import PaymentMethod, PaymentStatus
+from payments.models import Payment
+
+User = get_user_model()
+
+
+class ExplainHotQueriesTestCase(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Explain Category')
+        self.product = Product.objects.create(name='Explain Product', price=Decimal('4.00'), quantity=5, category=category)
+        self.user = User.objects.create_user(email='explain@mail.ru', email_verified=True, password='StrongPas123')
+
+    def _seed(self):
+        AddToCartService(customer_profile=self.user.customer_profile, product_pk=self.product.pk).add()
+        order = Order.objects.get(user=self.user.customer_profile)
+        Payment.objects.create(
+            order=order,
+            payment_method=PaymentMethod.CARD,
+            payment_status=PaymentStatus.INITIATED,
+            transaction='tr_explain'
+        )
+        self.client.post(reverse('accounts:login'), {'username': 'explain@mail.ru', 'password': 'StrongPas123'})
+
+    def test_hot_queries_have_index_paths(self):
+        self._seed()
+        out = StringIO()
+        call_command('explain_hot_queries', '--no-seqscan', stdout=out)
+        self.assertIn('hot queries use indexes', out.getvalue())
+
+    def test_empty_dataset_fails(self):
+        with self.assertRaises(CommandError):
+            call_command('explain_hot_queries', stdout=StringIO())
+
+
+class DayRangeFilterTestCase(TestCase):
+    def test_order_list_day_filter(self):
+        User.objects.create_user(email='day@mail.ru', email_verified=True, password='StrongPas123')
+        self.client.post(reverse('accounts:login'), {'username': 'day@mail.ru', 'password': 'StrongPas123'})
+        profile = User.objects.get(email='day@mail.ru').customer_profile
+
+        today, yesterday = [Order.objects.create(user=profile, status='paid') for _ in range(2)]
+        Order.objects.filter(pk=yesterday.pk).update(created_at=timezone.now() - timedelta(days=1))
+
+        response = self.client.get(reverse('core:order_list'), {'date': timezone.localdate().isoformat()})
+        self.assertEqual([order.pk for order in response.context['object_list']], [today.pk])
@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.domain import OrderStatus
+from core.models import DeliverySettings, Order, Product
+from core.services.order_amount_calc import OrderOrchestrationService
+from core.tasks import verify_pending_order_totals
+
+User = get_user_model()
+
+
+@override_settings(ORDER_TOTALS_MODE='incremental')
+class IncrementalOrderTotalsTestCase(TestCase):
+    def setUp(self):
+        DeliverySettings.invalidate_cache()
+        self.user = User.objects.create_user(email='totals@mail.ru', email_verified=True, password='StrongPas123')
+        self.client.post(reverse('accounts:login'), {'username': self.user.email, 'password': 'StrongPas123'})
+        self.cheap = Product.objects.create(name='Cheap', price=Decimal('10.25'), quantity=10)
+        self.expensive = Product.objects.create(name='Expensive', price=Decimal('45.00'), quantity=10)
+
+    def _order(self):
+        return Order.objects.get(user=self.user.customer_profile, status=OrderStatus.PENDING)
+
+    def test_deltas_match_full_recalculation(self):
+        self.client.post(reverse('core:orderitem_create', args=[self.cheap.pk]))
+        order = self._order()
+        self.assertEqual((order.items_amount, order.delivery_amount, order.total_amount),
+                         (Decimal('10.25'), Decimal('8.50'), Decimal('18.75')))
+
+        self.client.post(reverse('core:orderitem_create', args=[self.expensive.pk]))
+        self.client.post(reverse('core:orderitem_create', args=[self.cheap.pk]))
+        order = self._order()
+        self.assertEqual((order.items_amount, order.delivery_amount, order.total_amount),
+                         (Decimal('65.50'), Decimal('0.00'), Decimal('65.50')))
+
+        self.client.post(reverse('core:orderitem_delete', args=[order.items.get(product_pk_snapshot=self.expensive.pk).pk]))
+        order = self._order()
+        self.assertEqual((order.items_amount, order.delivery_amount, order.total_amount),
+                         (Decimal('20.50'), Decimal('8.50'), Decimal('29.00')))
+        self.assertFalse(OrderOrchestrationService(order=order).verify_totals())
+
+    def test_verifier_fixes_drift(self):
+        self.client.post(reverse('core:orderitem_create', args=[self.cheap.pk]))
+        Order.objects.filter(pk=self._order().pk).update(items_amount=Decimal('1.00'), total_amount=Decimal('9.50'))
+
+        verify_pending_order_totals()
+        order = self._order()
+        self.assertEqual((order.items_amount, order.total_amount), (Decimal('10.25'), Decimal('18.75')))
+
+        # items amount right, delivery or total drifted
+        Order.objects.filter(pk=order.pk).update(delivery_amount=Decimal('0.00'), total_amount=Decimal('10.25'))
+        verify_pending_order_totals()
+        order = self._order()
+        self.assertEqual((order.delivery_amount, order.total_amount), (Decimal('8.50'), Decimal('18.75')))
+
+        Order.objects.filter(pk=order.pk).update(total_amount=Decimal('99.00'))
+        verify_pending_order_totals()
+        self.assertEqual(self._order().total_amount, Decimal('18.75'))
@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.domain import OrderStatus
+from core.models import DeliverySettings, Order, OrderItem, Product
+from core.services.cart_add import AddToCartService
+from core.services.order_amount_calc import OrderRecalcService
+from core.services.product_repricing import ProductRepricingService
+
+User = get_user_model()
+
+
+class PriceEpochTestCase(TestCase):
+    def setUp(self):
+        DeliverySettings.invalidate_cache()
+        DeliverySettings.load_cached()
+        self.user = User.objects.create_user(email='epoch@mail.ru', email_verified=True, password='StrongPas123')
+        self.product = Product.objects.create(name='Epoch Product', price=Decimal('10.00'), quantity=10)
+        AddToCartService(customer_profile=self.user.customer_profile, product_pk=self.product.pk).add()
+
+    def _order(self):
+        return Order.objects.prefetch_related('items').get(user=self.user.customer_profile, status=OrderStatus.PENDING)
+
+    def _reprice(self, price):
+        product = Product.objects.get(pk=self.product.pk)
+        product.price = price
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        return product
+
+    def test_only_price_changes_bump_epoch(self):
+        epoch = Product.current_price_epoch()
+        product = Product.objects.get(pk=self.product.pk)
+        product.description = 'New description'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertEqual(Product.current_price_epoch(), epoch)
+
+        self._reprice(Decimal('12.00'))
+        self.assertGreater(Product.current_price_epoch(), epoch)
+
+    def test_review_skips_sync_while_epoch_unchanged(self):
+        self.assertFalse(OrderRecalcService(order=self._order()).recalculate())  # first review syncs
+
+        order = self._order()
+        with self.assertNumQueries(0):
+            self.assertFalse(OrderRecalcService(order=order).recalculate())
+
+        self._reprice(Decimal('12.00'))
+        order = self._order()
+        self.assertTrue(OrderRecalcService(order=order).recalculate())
+        self.assertEqual(order.items_amount, Decimal('12.00'))
+
+        order = self._order()
+        with self.assertNumQueries(0):
+            self.assertFalse(OrderRecalcService(order=order).recalculate())
+
+
+class ProductRepricingTestCase(TestCase):
+    def setUp(self):
+        DeliverySettings.invalidate_cache()
+        DeliverySettings.load_cached()
+        self.product_1 = Product.objects.create(name='Repriced Product', price=Decimal('10.00'), quantity=10)
+        self.product_2 = Product.objects.create(name='Untouched Product', price=Decimal('5.00'), quantity=10)
+
+        self.users = [
+            User.objects.create_user(email=f'reprice{i}@mail.ru', email_verified=True, password='StrongPas123')
+            for i in range(3)
+        ]
+        for user, product in zip(self.users, [self.product_1, self.product_1, self.product_2]):
+            AddToCartService(customer_profile=user.customer_profile, product_pk=product.pk).add()
+
+        Order.objects.filter(user=self.users[1].customer_profile).update(status=OrderStatus.PAID)
+
+    def test_reprice_resyncs_pending_orders_only(self):
+        pending = Order.objects.get(user=self.users[0].customer_profile)
+        OrderRecalcService(order=pending).recalculate()  # in sync at the current epoch
+        epoch = Product.current_price_epoch()
+        with self.captureOnCommitCallbacks(execute=True):
+            result = ProductRepricingService({self.product_1.pk: Decimal('20.00'), self.product_2.pk: Decimal('5.00')}).reprice()
+
+        self.assertEqual(result, (1, 1))
+        self.assertGreater(Product.current_price_epoch(), epoch)
+        self.product_1.refresh_from_db()
+        self.assertEqual(self.product_1.price, Decimal('20.00'))
+
+        pending = Order.objects.prefetch_related('items').get(user=self.users[0].customer_profile)
+        self.assertEqual(pending.items.get().product_unit_price, Decimal('20.00'))
+        self.assertEqual(pending.items_amount, Decimal('20.00'))
+        with self.assertNumQueries(0):
+            self.assertFalse(OrderRecalcService(order=pending).recalculate())  # stamped with the bumped epoch
+
+        paid_item = OrderItem.objects.get(order__user=self.users[1].customer_profile)
+        self.assertEqual(paid_item.product_unit_price, Decimal('10.00'))
+
+    def test_unchanged_prices_are_skipped(self):
+        self.assertEqual(ProductRepricingService({self.product_1.pk: Decimal('10.00')}).reprice(), (0, 0))
+
+    def test_reprice_keeps_epoch_of_orders_already_behind(self):
+        pending = Order.objects.get(user=self.users[0].customer_profile)
+        Order.objects.filter(pk=pending.pk).update(price_epoch=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductRepricingService({self.product_1.pk: Decimal('20.00')}).reprice()
+
+        pending.refresh_from_db()
+        self.assertEqual(pending.price_epoch, 0)  # other products may still need the sync on review
@@ -0,0 +1,209 @@
+from decimal import Decimal
+from functools import partial
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import aget_user, get_user_model
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Category, Product, ProductImage
+from core.services.catalog_cache import CatalogCacheService
+from core.services.stock_reservation import StockReservationService
+from core.views import AsyncProductDetailView
+
+User = get_user_model()
+
+
+class ProductCatalogQueryCountTestCase(TestCase):
+    """ Catalog pages must render in a constant number of queries regardless of page size """
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Test Category')
+
+    def _create_products(self, count, images_per_product=3):
+        products = []
+        for idx in range(count):
+            product = Product.objects.create(
+                category=self.category,
+                name=f'Test Product {Product.objects.count() + 1}',
+                price=Decimal('9.33'),
+                quantity=10
+            )
+            for position in range(1, images_per_product + 1):
+                ProductImage.objects.create(
+                    product=product,
+                    image=f'product_images/test_{product.pk}_{position}.jpg',
+                    position=position,
+                    alt_text=f'img. #{position}'
+                )
+            products.append(product)
+        return products
+
+    def test_image_summary_kept_in_sync(self):
+        product = self._create_products(1, images_per_product=2)[0]
+        product.refresh_from_db()
+
+        self.assertEqual(product.images_count, 2)
+        self.assertEqual(product.primary_image_url, product.get_primary_image().image.url)
+        self.assertEqual(product.secondary_image_url, product.get_secondary_image().image.url)
+
+        product.get_primary_image().delete()
+        product.refresh_from_db()
+
+        self.assertEqual(product.images_count, 1)
+        self.assertEqual(product.primary_image_url, product.images.get().image.url)
+        self.assertEqual(product.secondary_image_url, '')
+
+    def test_product_list_constant_queries(self):
+        self._create_products(2)
+        with self.assertNumQueries(2):  # products + categories
+            response = self.client.get(reverse('core:product_list'))
+        self.assertEqual(len(response.context['products']), 2)
+
+        self._create_products(20)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('core:product_list'))
+        self.assertEqual(len(response.context['products']), 22)
+        self.assertContains(response, 'product-image product-image-hover', count=22)
+
+    def test_product_detail_constant_queries(self):
+        product = self._create_products(1, images_per_product=1)[0]
+        with self.assertNumQueries(2):  # product + images
+            self.client.get(reverse('core:product_detail', args=[product.pk]))
+
+        product = self._create_products(1, images_per_product=9)[0]
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('core:product_detail', args=[product.pk]))
+        self.assertContains(response, 'carousel-control-next')
+
+
+class ProductCatalogPaginationTestCase(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Test Category')
+        Product.objects.bulk_create([
+            Product(category=self.category, name=f'Test Product {idx}', price=Decimal(idx % 3 + 1), quantity=5)
+            for idx in range(60)
+        ])
+        Product.objects.create(name='Out of stock', price=Decimal('1.00'), quantity=0)
+        # the same updated_at for half of the catalog forces tie-breaking by (price, pk)
+        Product.objects.filter(pk__in=Product.objects.order_by('pk').values('pk')[:30]).update(updated_at=timezone.now())
+
+    def test_keyset_pages_cover_catalog_once_and_in_order(self):
+        expected = list(
+            Product.objects.filter(quantity__gt=0, is_active=True)
+            .order_by('-updated_at', '-price', '-pk')
+            .values_list('pk', flat=True)
+        )
+        seen = []
+        url = reverse('core:product_list')
+        params = {'category': self.category.name}
+
+        while True:
+            with self.assertNumQueries(2):  # products + categories, regardless of depth
+                response = self.client.get(url, params)
+            page = response.context['page_obj']
+            seen.extend(product.pk for product in response.context['products'])
+            if not page.has_next:
+                break
+            params['cursor'] = page.next_cursor
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 60)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('core:product_list'), {'cursor': 'broken'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['page_obj'].is_first)
+        self.assertEqual(len(response.context['products']), 24)
+
+    def test_backoffice_keeps_offset_pagination(self):
+        manager = User.objects.create_user(email='manager@mail.ru', password='StrongPas123', role='manager')
+        self.client.post(reverse('accounts:login'), {'username': manager.email, 'password': 'StrongPas123'})
+
+        response = self.client.get(reverse('core:product_list'), {'stock_filter': 'show_all', 'page': 3})
+        self.assertEqual(response.context['page_obj'].number, 3)
+        self.assertEqual(len(response.context['products']), 61 - 2 * 24)
+        self.assertContains(response, 'Page 3 of 3')
+
+
+class ProductCatalogCacheTestCase(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Cached Category')
+        self.product = Product.objects.create(category=self.category, name='Cached Product', price=Decimal('5.00'), quantity=1)
+
+    def test_anonymous_catalog_served_from_cache(self):
+        url = reverse('core:product_list')
+        first = self.client.get(url, {'category': self.category.name})
+        with self.assertNumQueries(0):
+            second = self.client.get(url, {'category': self.category.name})
+
+        self.assertContains(first, self.product.name)
+        self.assertContains(second, self.product.name)
+        self.assertNotContains(second, CatalogCacheService.CSRF_PLACEHOLDER)
+        self.assertContains(second, 'csrfmiddlewaretoken')
+
+    def test_asgi_catalog_view_serves_cache_hits(self):
+        url = reverse('core:product_detail', args=[self.product.pk])
+        self.client.get(url)  # sync view, fills the cache
+
+        request = AsyncRequestFactory().get(url)
+        request.session = self.client.session
+        request.auser = partial(aget_user, request)
+        with self.assertNumQueries(0):
+            response = async_to_sync(AsyncProductDetailView.as_view())(request, pk=self.product.pk)
+        response.render()
+
+        self.assertContains(response, self.product.name)
+        self.assertNotContains(response, CatalogCacheService.CSRF_PLACEHOLDER)
+
+    def test_requests_with_messages_bypass_cache(self):
+        url = reverse('core:product_list')
+        self.client.get(url)
+        response = self.client.get(url, {'cart_clear_out': True, 'message': 'Cleared'})
+        self.assertContains(response, 'Cleared')
+        self.assertNotIn('catalog_fragments', response.context)
+
+    def test_product_change_invalidates_cache(self):
+        url = reverse('core:product_detail', args=[self.product.pk])
+        self.client.get(url)
+
+        self.product.description = 'Brand new description'
+        self.product.save()
+        self.assertContains(self.client.get(url), 'Brand new description')
+
+    def test_image_change_invalidates_product_once(self):
+        with patch.object(CatalogCacheService, 'invalidate_product') as invalidate_product:
+            image = ProductImage.objects.create(product=self.product, image='product_images/cached.jpg')
+        invalidate_product.assert_called_once()  # by the product image summary save
+
+        url = reverse('core:product_detail', args=[self.product.pk])
+        self.assertContains(self.client.get(url), 'product_images/cached.jpg')
+        image.delete()
+        self.assertNotContains(self.client.get(url), 'product_images/cached.jpg')
+
+    def test_hit_miss_counters_are_sampled(self):
+        url = reverse('core:product_list')
+        cache.delete_many([CatalogCacheService.HITS_KEY, CatalogCacheService.MISSES_KEY])
+        with patch('core.services.catalog_cache.random.random', return_value=0.99):
+            self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(CatalogCacheService.stats()['hits'] + CatalogCacheService.stats()['misses'], 0)
+
+        with patch('core.services.catalog_cache.random.random', return_value=0):
+            self.client.get(url)
+        self.assertEqual(CatalogCacheService.stats()['hits'], CatalogCacheService.STATS_SAMPLE_RATE)
+
+    def test_stock_crossing_zero_invalidates_catalog(self):
+        url = reverse('core:product_list')
+        self.assertContains(self.client.get(url), self.product.name)
+
+        StockReservationService(product_pk=self.product.pk).reserve_stock()
+        self.assertNotContains(self.client.get(url), self.product.name)
+
+        StockReservationService(cart_item={
+            'product_pk': self.product.pk, 'product_name': self.product.name, 'quantity': 1
+        }).release_reserved_stock()
+        self.assertContains(self.client.get(url), self.product.name)
@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F, Sum
+from django.test import TestCase
+
+from accounts.models import CustomerProfile, ShippingInfo, UserLoginHistory
+from core.domain import OrderStatus
+from core.models import Order, OrderItem, Product
+from payments.domain import PaymentStatus
+from payments.models import Payment
+
+SMALL_SCALE = [
+    '--categories', '3', '--products', '30', '--customers', '40', '--orders', '120',
+    '--login-logs', '50', '--pending-ratio', '0.25', '--batch-size', '50',
+]
+
+
+class SeedBenchmarkTestCase(TestCase):
+    def _seed(self, *args):
+        call_command('seed_benchmark', *SMALL_SCALE, *args, stdout=StringIO())
+        return (
+            list(Order.objects.order_by('pk').values_list('status', 'total_amount', 'created_at')),
+            list(OrderItem.objects.order_by('pk').values_list('product_name', 'product_quantity')),
+        )
+
+    def test_dataset_is_consistent(self):
+        self._seed()
+
+        self.assertEqual(Product.objects.filter(name__startswith='bench-').count(), 30)
+        self.assertEqual(ShippingInfo.objects.count(), 40)
+        self.assertEqual(UserLoginHistory.objects.count(), 50)
+        self.assertEqual(Order.objects.exclude(status=OrderStatus.PENDING).count(), 120)
+        self.assertEqual(Order.objects.filter(status=OrderStatus.PENDING).count(), 10)
+        self.assertEqual(Payment.objects.count(), 120)
+        self.assertEqual(CustomerProfile.objects.count(), 40)  # the manager has none
+
+        mismatched = Order.objects.annotate(actual=Sum('items__product_total_price')).exclude(items_amount=F('actual'))
+        self.assertFalse(mismatched.exists())
+        self.assertLess(Product.objects.order_by('updated_at').first().updated_at.year, 2026)  # history kept
+
+        Order.objects.create(user_id=Order.objects.first().user_id, status=OrderStatus.PAID)  # sequence moved past COPY
+
+    def test_stale_payments_of_carts(self):
+        self._seed('--stale-payment-ratio', '1')
+        stale = Payment.objects.filter(payment_status=PaymentStatus.INITIATED)
+        self.assertEqual(stale.count(), 10)
+        self.assertFalse(stale.exclude(order__status=OrderStatus.PENDING).exists())
+
+    def test_same_seed_same_dataset(self):
+        first = self._seed()
+        second = self._seed('--flush')
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, self._seed('--flush', '--seed', '7'))
+
@@ -0,0 +1,236 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.sessions import SessionStore as CartSessionStore
+from core.domain import OrderStatus
+from core.models import DeliverySettings, Order, Product
+from core.services.order_builder import OrderBuilderService
+from core.services.product_display_cache import ProductDisplayCache
+from core.services.session_cart import SessionCart
+
+User = get_user_model()
+
+
+class SessionCartTestCase(TestCase):
+    def setUp(self):
+        DeliverySettings.invalidate_cache()
+        self.product_1 = Product.objects.create(name='Hash Product 1', price=Decimal('10.15'), quantity=5)
+        self.product_2 = Product.objects.create(name='Hash Product 2', price=Decimal('3.00'), quantity=5)
+
+    def _add_to_cart(self, product):
+        self.client.post(reverse('core:orderitem_create', args=[product.pk]))
+
+    def _cart(self):
+        return SessionCart(self.client.session)
+
+    def test_session_holds_only_cart_id(self):
+        self._add_to_cart(self.product_1)
+        self._add_to_cart(self.product_1)
+        self._add_to_cart(self.product_2)
+
+        session = self.client.session
+        self.assertEqual(set(session.keys()), {SessionCart.SESSION_KEY})
+        self.assertEqual(self._cart().get_items(), {
+            self.product_1.pk: (2, Decimal('10.15')),
+            self.product_2.pk: (1, Decimal('3.00')),
+        })
+
+    def test_session_order_shape(self):
+        self._add_to_cart(self.product_1)
+        self._add_to_cart(self.product_1)
+
+        session_order = self._cart().to_session_order()
+        item = session_order['items'][str(self.product_1.pk)]
+        self.assertEqual(item['product_name'], 'Hash Product 1')
+        self.assertEqual((item['quantity'], item['total_price']), (2, '20.30'))
+        self.assertEqual(session_order['items_amount'], '20.30')
+
+        response = self.client.get(reverse('core:orderitem_list'))
+        self.assertEqual(response.context['session_order']['items_amount'], '20.30')
+
+    def test_remove_and_clear_release_stock(self):
+        self._add_to_cart(self.product_1)
+        self._add_to_cart(self.product_2)
+        self._add_to_cart(self.product_2)
+
+        self.client.post(reverse('core:orderitem_delete', args=[self.product_1.pk]))
+        self.product_1.refresh_from_db()
+        self.assertEqual(self.product_1.quantity, 5)
+        self.assertEqual(list(self._cart().get_items()), [self.product_2.pk])
+
+        cart_id = self.client.session[SessionCart.SESSION_KEY]
+        self.client.post(reverse('core:cart_clear_out'))
+        self.product_2.refresh_from_db()
+        self.assertEqual(self.product_2.quantity, 5)
+        self.assertNotIn(SessionCart.SESSION_KEY, self.client.session)
+        self.assertFalse(cache.client.get_client().exists(SessionCart.key(cart_id)))
+
+    def test_cart_merged_on_login(self):
+        User.objects.create_user(email='hash@mail.ru', email_verified=True, password='StrongPas123')
+        self._add_to_cart(self.product_1)
+        cart_id = self.client.session[SessionCart.SESSION_KEY]
+
+        self.client.post(reverse('accounts:login'), {'username': 'hash@mail.ru', 'password': 'StrongPas123'})
+
+        order = Order.objects.get(user__user__email='hash@mail.ru', status=OrderStatus.PENDING)
+        self.assertEqual(order.items.get().product_pk_snapshot, self.product_1.pk)
+        self.assertFalse(cache.client.get_client().exists(SessionCart.key(cart_id)))
+
+    def test_add_writes_session_only_for_a_new_cart(self):
+        session = SessionStore()
+        SessionCart(session).add(self.product_1)
+        self.assertTrue(session.modified)
+
+        session.save()
+        session = SessionStore(session_key=session.session_key)
+        SessionCart(session).add(self.product_1)
+        SessionCart(session).add(self.product_2)
+        SessionCart(session).remove(self.product_2.pk)
+        self.assertFalse(session.modified)
+
+    def test_concurrent_adds_are_not_lost(self):
+        session = {}
+        SessionCart(session).add(self.product_1)
+
+        def add_from_tab(_):
+            SessionCart(dict(session)).add(self.product_1)  # every tab loads its own copy of the session
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(add_from_tab, range(40)))
+
+        self.assertEqual(SessionCart(session).get_items()[self.product_1.pk][0], 41)
+
+    def test_legacy_session_order_import(self):
+        session = self.client.session
+        SessionCart(session).import_session_order({
+            'items': {str(self.product_1.pk): {'product_pk': self.product_1.pk, 'quantity': 3, 'unit_price': '10.15'}},
+            'modified_at': '2026-01-01T10:00:00+00:00',
+        })
+        self.assertEqual(SessionCart(session).get_items(), {self.product_1.pk: (3, Decimal('10.15'))})
+
+    def test_legacy_session_order_import_adds_to_existing_cart(self):
+        session = self.client.session
+        cart = SessionCart(session)
+        cart.add(self.product_1)
+        cart.import_session_order({
+            'items': {
+                str(self.product_1.pk): {'product_pk': self.product_1.pk, 'quantity': 3, 'unit_price': '9.00'},
+                str(self.product_2.pk): {'product_pk': self.product_2.pk, 'quantity': 2, 'unit_price': '5.00'},
+            },
+            'modified_at': '2026-01-01T10:00:00+00:00',
+        })
+        self.assertEqual(cart.get_items(), {
+            self.product_1.pk: (4, self.product_1.price), self.product_2.pk: (2, Decimal('5.00')),
+        })
+
+    def test_migrate_session_carts_command(self):
+        session = CartSessionStore()
+        session['session_order'] = {
+            'items': {str(self.product_1.pk): {'product_pk': self.product_1.pk, 'quantity': 2, 'unit_price': '10.15'}},
+            'modified_at': '2026-01-01T10:00:00+00:00',
+        }
+        session.save()
+
+        call_command('migrate_session_carts', stdout=StringIO())
+
+        session = CartSessionStore(session_key=session.session_key)
+        self.assertNotIn('session_order', session)
+        self.assertEqual(SessionCart(session).get_items(), {self.product_1.pk: (2, Decimal('10.15'))})
+        SessionCart(session).clear()
+
+
+class OrderBuilderMergeTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='merge@mail.ru', email_verified=True, password='StrongPas123')
+        self.products = Product.objects.bulk_create([
+            Product(name=f'Merge Product {i}', price=Decimal('2.50'), quantity=10) for i in range(10)
+        ])
+
+    def _session_order(self, products, quantity=1):
+        session = {}
+        cart = SessionCart(session)
+        for product in products:
+            for _ in range(quantity):
+                cart.add(product)
+        return cart.pop_session_order()
+
+    def _build(self, session_order):
+        OrderBuilderService(session_order=session_order, user=self.user).build()
+
+    def test_merge_adds_quantities_to_existing_items(self):
+        self._build(self._session_order(self.products[:2]))
+        self._build(self._session_order(self.products[1:3], quantity=2))
+
+        order = Order.objects.get(user=self.user.customer_profile, status=OrderStatus.PENDING)
+        quantities = dict(order.items.values_list('product_pk_snapshot', 'product_quantity'))
+        self.assertEqual(quantities, {self.products[0].pk: 1, self.products[1].pk: 3, self.products[2].pk: 2})
+        self.assertEqual(order.items.get(product_pk_snapshot=self.products[1].pk).product_total_price, Decimal('7.50'))
+        self.assertEqual(order.items_amount, Decimal('15.00'))
+
+    def test_queries_do_not_grow_with_cart_size(self):
+        small, large = self._session_order(self.products[:1]), self._session_order(self.products)
+        self._build(small)
+
+        with CaptureQueriesContext(connection) as small_merge:
+            self._build(small)
+        with CaptureQueriesContext(connection) as large_merge:
+            self._build(large)
+        self.assertEqual(len(small_merge), len(large_merge))
+
+    def test_merge_session_cart_builds_from_dropped_snapshot(self):
+        session = {}
+        cart = SessionCart(session)
+        cart.add(self.products[0])
+        cart.add(self.products[0])
+
+        OrderBuilderService.merge_session_cart(cart, user=self.user)
+        order = Order.objects.get(user=self.user.customer_profile, status=OrderStatus.PENDING)
+        self.assertEqual(order.items.get().product_quantity, 2)
+        self.assertEqual(cart.get_items(), {})
+        self.assertNotIn(SessionCart.SESSION_KEY, session)
+
+    def test_failed_merge_releases_dropped_items(self):
+        cart = SessionCart({})
+        cart.add(self.products[0])
+
+        with patch.object(OrderBuilderService, 'build', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                OrderBuilderService.merge_session_cart(cart, user=self.user)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].quantity, 11)
+
+    def test_clear_out_without_pending_order(self):
+        self.client.post(reverse('accounts:login'), {'username': 'merge@mail.ru', 'password': 'StrongPas123'})
+        response = self.client.post(reverse('core:cart_clear_out'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ProductDisplayCacheTestCase(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Display Product', price=Decimal('1.00'), quantity=5)
+        ProductDisplayCache.invalidate(self.product.pk)
+
+    def test_cached_after_first_read(self):
+        with self.assertNumQueries(1):
+            ProductDisplayCache.get_many([self.product.pk])
+        with self.assertNumQueries(0):
+            display = ProductDisplayCache.get_many([self.product.pk])
+        self.assertEqual(display[self.product.pk]['name'], 'Display Product')
+
+    def test_invalidated_on_product_change(self):
+        ProductDisplayCache.get_many([self.product.pk])
+        self.product.name = 'Renamed Product'
+        self.product.save()
+
+        self.assertEqual(ProductDisplayCache.get_many([self.product.pk])[self.product.pk]['name'], 'Renamed Product')
@@ -0,0 +1,113 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+
+from core.models import Category, Product, StockReconciliationBatch
+from core.services.cart_add import AddToCartService
+from core.services.stock_counter import RedisStockCounter
+from core.services.stock_reservation import StockReservationService
+
+
+class BulkStockReleaseTestCase(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Bulk Category')
+        self.products = Product.objects.bulk_create([
+            Product(category=self.category, name=f'Bulk Product {idx}', price=Decimal('2.00'), quantity=idx)
+            for idx in range(3)
+        ])
+
+    def _session_item(self, product, quantity):
+        return {'product_pk': product.pk, 'product_name': product.name, 'quantity': quantity}
+
+    def test_quantities_grouped_per_product_in_single_update(self):
+        items = [self._session_item(product, 2) for product in self.products for _ in range(10)]
+        items.append(self._session_item(Product(pk=0, name='Removed product'), 1))
+
+        with self.assertNumQueries(2):  # UPDATE ... FROM (VALUES ...) + restocked products for the catalog cache
+            released = StockReservationService.bulk_release(items)
+
+        self.assertEqual(released, 3)
+        self.assertEqual(
+            list(Product.objects.filter(pk__in=[p.pk for p in self.products]).order_by('pk').values_list('quantity', flat=True)),
+            [20, 21, 22]
+        )
+
+    def test_nothing_to_release(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(StockReservationService.bulk_release([]), 0)
+
+
+@override_settings(STOCK_RESERVATION_ENGINE='redis')
+class RedisStockReservationTestCase(TestCase):
+    def setUp(self):
+        self.counter = RedisStockCounter()
+        self.counter.client.delete(self.counter.PENDING_KEY, self.counter.INFLIGHT_KEY)
+
+        self.category = Category.objects.create(name='Hot Category')
+        self.product = Product.objects.create(category=self.category, name='Hot Product', price=Decimal('5.00'), quantity=3)
+        self.counter.forget(self.product.pk)
+
+    def _reserve(self):
+        return StockReservationService(product_pk=self.product.pk).reserve_stock()
+
+    def _release(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):  # Redis is released once the caller's transaction commits
+            return StockReservationService(cart_item={
+                'product_pk': self.product.pk, 'product_name': self.product.name, 'quantity': quantity
+            }).release_reserved_stock()
+
+    def test_reserve_without_row_lock_until_out_of_stock(self):
+        results = [self._reserve() for _ in range(4)]
+
+        self.assertEqual([result['success'] for result in results], [True, True, True, False])
+        self.assertEqual(results[2]['product'].quantity, 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 3)  # Postgres is updated by the reconciliation only
+
+    def test_reconciliation_applies_pending_deltas(self):
+        self._reserve()
+        self._reserve()
+        self._release(1)
+
+        self.assertEqual(StockReservationService.reconcile_counters(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 2)
+        self.assertEqual(StockReservationService.reconcile_counters(), 0)  # nothing pending
+
+    def test_crashed_batch_is_not_applied_twice(self):
+        self._reserve()
+        batch_id, deltas = self.counter.take_batch()
+        StockReconciliationBatch.objects.create(batch_id=batch_id, products_count=len(deltas))
+        StockReservationService._apply_quantity_deltas(deltas)  # worker dies before acknowledging the batch
+
+        self.counter.forget(self.product.pk)
+        self._reserve()  # counter rebuilt from DB while the batch is still inflight
+
+        StockReservationService.reconcile_counters()  # acknowledges the crashed batch only
+        StockReservationService.reconcile_counters()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 1)
+        self.assertEqual(self.counter.reserve(self.product.pk), 0)
+
+    def test_failed_cart_write_gives_the_reservation_back(self):
+        user = get_user_model().objects.create_user(email='hot@mail.ru', email_verified=True, password='StrongPas123')
+        service = AddToCartService(customer_profile=user.customer_profile, product_pk=self.product.pk)
+        with patch.object(AddToCartService, '_upsert_item', side_effect=DatabaseError('upsert failed')):
+            with self.assertRaises(DatabaseError):
+                service.add()
+        self.assertEqual(self.counter.reserve(self.product.pk), 2)  # all 3 still available before this one
+
+    def test_backoffice_restock_resets_the_counter_after_commit(self):
+        self._reserve()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Product.objects.filter(pk=self.product.pk).update(quantity=10)
+            self.product.quantity = 10
+            self.product.save()
+            self.assertEqual(self.counter.reserve(self.product.pk), 1)  # not reset before the commit
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.counter.reserve(self.product.pk), -1)  # reloaded from DB on the next reservation
+        self.assertEqual(self._reserve()['product'].quantity, 7)  # 10 - 3 unreconciled reservations
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.domain import OrderStatus
+from core.models import Category, Product, Order, OrderItem
+from core.services.session_cart import SessionCart
+from core.services.session_cart_index import SessionCartIndex
+from core.tasks import cleanup_expired_pending_orders, cleanup_expired_session_orders
+
+User = get_user_model()
+
+
+class CleanupExpiredPendingOrdersTestCase(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Cleanup Category')
+        self.product_1 = Product.objects.create(category=category, name='Product 1', price=Decimal('3.00'), quantity=0)
+        self.product_2 = Product.objects.create(category=category, name='Product 2', price=Decimal('4.00'), quantity=5)
+
+        self.orders = []
+        for idx in range(3):
+            user = User.objects.create_user(email=f'customer_{idx}@mail.ru', password='StrongPas123')
+            order = Order.objects.create(user=user.customer_profile)
+            for product, quantity in ((self.product_1, 2), (self.product_2, 1)):
+                OrderItem.objects.create(
+                    order=order,
+                    product_pk_snapshot=product.pk,
+                    product_name=product.name,
+                    product_quantity=quantity
+                )
+            self.orders.append(order)
+
+        # the first two carts are stale, the last one is still alive
+        Order.objects.filter(pk__in=[order.pk for order in self.orders[:2]]).update(
+            updated_at=timezone.now() - timedelta(hours=25)
+        )
+
+    def test_stale_orders_expired_and_stock_restored_in_chunks(self):
+        # per chunk: lock, GROUP BY, stock UPDATE, status UPDATE (+ restocked products) wrapped in a savepoint pair,
+        # the third chunk is empty and ends the loop
+        with self.assertNumQueries(2 * 6 + 1 + 3):
+            expired_count = cleanup_expired_pending_orders(chunk_size=1)
+
+        self.assertEqual(expired_count, 2)
+        self.assertEqual(
+            list(Order.objects.order_by('pk').values_list('status', flat=True)),
+            [OrderStatus.EXPIRED, OrderStatus.EXPIRED, OrderStatus.PENDING]
+        )
+        self.product_1.refresh_from_db()
+        self.product_2.refresh_from_db()
+        self.assertEqual(self.product_1.quantity, 4)
+        self.assertEqual(self.product_2.quantity, 7)
+
+        self.assertEqual(cleanup_expired_pending_orders(), 0)
+
+
+class CleanupExpiredSessionOrdersTestCase(TestCase):
+    def setUp(self):
+        self.index = SessionCartIndex()
+        self.index.client.delete(self.index.KEY)
+        self.product = Product.objects.create(name='Session Product', price=Decimal('3.00'), quantity=5)
+
+    def _add_to_cart(self):
+        self.client.post(reverse('core:orderitem_create', args=[self.product.pk]))
+        return self.client.session[SessionCart.SESSION_KEY]
+
+    def _backdate(self, cart_id, modified_at):
+        self.index.client.hset(SessionCart.key(cart_id), SessionCart.MODIFIED_FIELD, int(modified_at.timestamp()))
+        self.index.touch(cart_id, modified_at)
+
+    def test_cart_views_maintain_index(self):
+        cart_id = self._add_to_cart()
+        self.assertEqual(self.index.expired(timezone.now() + timedelta(seconds=1)), [cart_id])
+
+        self.client.post(reverse('core:orderitem_delete', args=[self.product.pk]))
+        self.assertEqual(self.index.size(), 1)  # emptied cart, left for the job
+
+        cleanup_expired_session_orders()
+        self.assertEqual(self.index.size(), 1)  # not expired yet
+        self.index.touch(cart_id, timezone.now() - timedelta(hours=24))
+        cleanup_expired_session_orders()
+        self.assertEqual(self.index.size(), 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)  # released once, by the delete
+
+    def test_expired_carts_released_and_index_drained(self):
+        cart_id = self._add_to_cart()
+        self._add_to_cart()
+
+        stale_at = timezone.now() - timedelta(hours=24)
+        self._backdate(cart_id, stale_at)
+        self.index.touch('gone-cart-id', stale_at)
+
+        cleanup_expired_session_orders()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+        self.assertFalse(self.index.client.exists(SessionCart.key(cart_id)))
+        self.assertEqual(self.index.size(), 0)
+
+    def test_lagging_index_entry_is_rescored(self):
+        cart_id = self._add_to_cart()
+        self.index.touch(cart_id, timezone.now() - timedelta(hours=24))  # the cart itself is fresh
+
+        cleanup_expired_session_orders()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 4)
+        self.assertTrue(self.index.client.exists(SessionCart.key(cart_id)))
+        self.assertEqual(self.index.expired(timezone.now() - timedelta(hours=23)), [])
+        self.assertEqual(self.index.size(), 1)
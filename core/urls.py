@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 from .views.category import CategoryListView, CategoryGenericView, CategoryDeleteView
@@ -5,15 +6,21 @@ from .views.delivery import DeliverySettingsDetailView, DeliverySettingsUpdateVi
 from .views.order import CartClearOutView, OrderListView, OrderChangeStatusView, OrderNotifyShippedView
 from .views.order_item import OrderItemListView, OrderItemCreateView, OrderItemDeleteView
 from .views.product import ProductListView, ProductGenericView, ProductDetailView, ProductDeleteView, \
-    ProductToggleVisibilityView
+    ProductToggleVisibilityView, AsyncProductListView, AsyncProductDetailView
+
+# ASGI deployment only, see ASYNC_VIEWS
+CatalogListView, CatalogDetailView = (
+    (AsyncProductListView, AsyncProductDetailView) if settings.ASYNC_VIEWS
+    else (ProductListView, ProductDetailView)
+)
 
 app_name = 'core'
 
 urlpatterns = [
-    path('products/', ProductListView.as_view(), name='product_list'),
+    path('products/', CatalogListView.as_view(), name='product_list'),
     path('products/create/', ProductGenericView.as_view(), name='product_create'),
     path('products/<int:pk>/update/', ProductGenericView.as_view(), name='product_update'),
-    path('products/<int:pk>/', ProductDetailView.as_view(), name='product_detail'),
+    path('products/<int:pk>/', CatalogDetailView.as_view(), name='product_detail'),
     path('products/<int:pk>/delete/', ProductDeleteView.as_view(), name='product_delete'),
     path('products/<int:pk>/toggle-visibility/', ProductToggleVisibilityView.as_view(), name='product_toggle_visibility'),
 
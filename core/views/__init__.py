@@ -3,4 +3,4 @@ from .delivery import DeliverySettingsDetailView, DeliverySettingsUpdateView
 from .order import CartClearOutView, OrderListView, OrderChangeStatusView, OrderNotifyShippedView
 from .order_item import OrderItemListView, OrderItemCreateView, OrderItemUpdateView, OrderItemDeleteView
 from .product import ProductListView, ProductGenericView, ProductDetailView, ProductDeleteView, \
-    ProductToggleVisibilityView
+    ProductToggleVisibilityView, AsyncProductListView, AsyncProductDetailView
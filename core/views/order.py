@@ -6,12 +6,13 @@ from django.views.generic import ListView
 
 from core.domain import OrderStatus
 from core.models import Order
+from core.services.session_cart import SessionCart
 from core.services.stock_reservation import StockReservationService
 from payments.models import Payment
 from shared.permissions.mixins import AuthRequiredMixin, BackofficeAccessRequiredMixin
 from shared.permissions.utils import is_authenticated, is_backoffice_member, is_order_owner
 from shared.tasks import send_email_task
-from shared.utils import redirect_with_message
+from shared.utils import local_day_range, redirect_with_message
 
 
 class CartClearOutView(View):
@@ -27,14 +28,11 @@ class CartClearOutView(View):
                 .first()
             )
 
-            for order_item in order.items.all():
-                StockReservationService(cart_item=order_item).release_reserved_stock()
-            order.delete()
+            if order:  # none when the cart was already paid, e.g. in another tab
+                StockReservationService.bulk_release(order.items.all())
+                order.delete()
         else:
-            session_order = request.session.get('session_order', {'items': {}})
-            for session_item in session_order['items'].values():
-                StockReservationService(cart_item=session_item).release_reserved_stock()
-            del request.session['session_order']
+            StockReservationService.bulk_release(SessionCart(request.session).clear())
 
         return redirect_with_message(
             'core:product_list',
@@ -78,7 +76,8 @@ class OrderListView(AuthRequiredMixin, ListView):
         if date_str:
             date = parse_date(date_str)
             if date:
-                qs = qs.filter(created_at__date=date)
+                day_start, day_end = local_day_range(date)
+                qs = qs.filter(created_at__gte=day_start, created_at__lt=day_end)
 
         user = self.request.user
         if not is_backoffice_member(self.request):
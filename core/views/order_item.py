@@ -1,11 +1,14 @@
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 
+from django.db import transaction
 from django.views import View
 from django.views.generic import TemplateView
 
 from core.domain import OrderStatus
 from core.models import Order, OrderItem, DeliverySettings
+from core.services.cart_add import AddToCartService
 from core.services.order_amount_calc import OrderOrchestrationService
+from core.services.session_cart import SessionCart
 from core.services.stock_reservation import StockReservationService
 from shared.permissions.utils import is_authenticated
 from shared.utils import redirect_with_message
@@ -19,7 +22,7 @@ class OrderItemListView(TemplateView):
         context['order_item_addition'] = self.request.GET.get('order_item_addition')
         context['order_item_deletion'] = self.request.GET.get('order_item_deletion')
         context['message'] = self.request.GET.get('message')
-        context['settings'] = DeliverySettings.load()
+        context['settings'] = DeliverySettings.load_cached()
 
         if is_authenticated(self.request):
             context.update(self._get_db_order_context())
@@ -45,7 +48,7 @@ class OrderItemListView(TemplateView):
 
     def _get_session_order_context(self):
         context = {}
-        if session_order := self.request.session.get('session_order', {}):
+        if session_order := SessionCart(self.request.session).to_session_order():
             context['session_order'] = session_order
             context['session_order_delivery_amount'] = Decimal(session_order['delivery_amount'])
         return context
@@ -53,53 +56,13 @@ class OrderItemListView(TemplateView):
 
 class OrderItemCreateView(View):
     def post(self, request, pk):
-        response = StockReservationService(product_pk=pk).reserve_stock()
-        if product := response.get('product', None):
-
-            if is_authenticated(request):
-                order, _ = Order.objects.get_or_create(user=request.user.customer_profile, status=OrderStatus.PENDING)
-                order_item, created = OrderItem.objects.get_or_create(
-                    order=order,
-                    product_pk_snapshot=product.pk,
-                    defaults={
-                        'product_name': product.name,
-                        'product_unit_price': product.price,
-                        'product_total_price': product.price,
-                        'product_description': product.description,
-                        'product_image_url': product.primary_image_url
-                    }
-                )
-                if not created:
-                    order_item.product_quantity += 1
-                    order_item.product_total_price = Decimal(product.price * order_item.product_quantity).quantize(
-                        Decimal('0.01'), rounding=ROUND_HALF_UP
-                    )
-                    order_item.save(update_fields=['product_quantity', 'product_total_price'])
-
-                OrderOrchestrationService(order=order).update_price()
-
-            else:
-                pk = str(pk)
-                session_order = request.session.get('session_order', {'items': {}}).copy()
-
-                if pk in session_order['items']:
-                    quantity = session_order['items'][pk]['quantity'] + 1
-                    total_price = Decimal(product.price * quantity).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                    session_order['items'][pk].update({'quantity': quantity, 'total_price': str(total_price)})
-                else:
-                    session_order['items'][pk] = {
-                        'product_pk': product.pk,
-                        'product_name': product.name,
-                        'description': product.description,
-                        'quantity': 1,
-                        'unit_price': str(product.price),
-                        'total_price': str(product.price),
-                        'product_image_url': product.primary_image_url
-                    }
-
-                session_order = OrderOrchestrationService(session_order=session_order).update_price()
-                request.session['session_order'] = session_order
-                request.session.modified = True
+        if is_authenticated(request):
+            response = AddToCartService(customer_profile=request.user.customer_profile, product_pk=pk).add()
+
+        else:
+            response = StockReservationService(product_pk=pk).reserve_stock()
+            if product := response.get('product', None):
+                SessionCart(request.session).add(product)
 
         return redirect_with_message(
             # 'core:orderitem_list',
@@ -117,36 +80,37 @@ class OrderItemDeleteView(View):
     def post(self, request, pk):
         response = {'success': False, 'message': 'Nothing to delete.'}
         if is_authenticated(request):
-            if order_item := OrderItem.objects.filter(pk=pk).first():
-                response = StockReservationService(cart_item=order_item).release_reserved_stock()
-                order_item.delete()
-
-            order = (
-                Order.objects
-                .prefetch_related('items')
-                .filter(
-                    user=request.user.customer_profile,
-                    status=OrderStatus.PENDING
+            with transaction.atomic():
+                items_delta = None
+                # scoped to the pending order, the delta below must belong to it; locked, so a concurrent
+                # delete of the same item waits and then finds nothing to release twice
+                if order_item := OrderItem.objects.select_for_update(of=('self',)).filter(
+                    pk=pk,
+                    order__user=request.user.customer_profile,
+                    order__status=OrderStatus.PENDING
+                ).first():
+                    deleted, _ = order_item.delete()
+                    if deleted:
+                        response = StockReservationService(cart_item=order_item).release_reserved_stock()
+                        items_delta = -order_item.product_total_price
+
+                order = (
+                    Order.objects
+                    .prefetch_related('items')
+                    .filter(
+                        user=request.user.customer_profile,
+                        status=OrderStatus.PENDING
+                    )
+                    .first()
                 )
-                .first()
-            )
-            if not order.items.exists():
-                order.delete()
-            else:
-                OrderOrchestrationService(order=order).update_price()
+                if order and not order.items.exists():
+                    order.delete()
+                elif order and items_delta is not None:
+                    OrderOrchestrationService(order=order).update_price(items_delta=items_delta)
 
         else:
-            session_order = request.session.get('session_order', {'items': {}})
-            if session_item := session_order['items'].get(f'{str(pk)}', None):
+            if session_item := SessionCart(request.session).remove(pk):
                 response = StockReservationService(cart_item=session_item).release_reserved_stock()
-                del session_order['items'][str(pk)]
-
-                if not session_order['items']:
-                    del request.session['session_order']
-                else:
-                    session_order = OrderOrchestrationService(session_order=session_order).update_price()
-                    request.session['session_order'] = session_order
-                    request.session.modified = True
 
         return redirect_with_message(
             'core:orderitem_list',
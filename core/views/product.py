@@ -1,25 +1,52 @@
+from asgiref.sync import sync_to_async
 from django.db import transaction
 from django.shortcuts import render, redirect
+from django.template.response import TemplateResponse
 from django.urls import reverse_lazy
 from django.views import View
 from django.views.generic import ListView, DetailView
 
 from core.forms import ProductForm, ProductImageFormSet
 from core.models import Product, Category
+from core.services.catalog_cache import CatalogCacheService
 from core.services.product_image_sync import ProductImageSyncService
 from shared.permissions.mixins import BackofficeAccessRequiredMixin
-from shared.permissions.utils import is_backoffice_member
+from shared.permissions.utils import aget_request_user, is_backoffice_member
+from shared.services.keyset_pagination import KeysetPaginator
 from shared.utils import redirect_with_message
 
 
 class ProductListView(ListView):
     template_name = 'core/product_list.html'
     context_object_name = 'products'
+    paginate_by = 24
 
     ADMIN_CATEGORIES = ['DEBUG Category', 'DEV Category']
+    ORDERING = ('updated_at', 'price', 'pk')  # descending, backed by "product_catalog_keyset_idx"
+    CACHED_FRAGMENTS = {
+        'filters': 'core/includes/product_filters.html',
+        'grid': 'core/includes/product_grid.html',
+    }
+
+    def get(self, request, *args, **kwargs):
+        self.catalog_cache = self.get_catalog_cache(request)
+        if self.catalog_cache and (fragments := self.catalog_cache.get()):
+            return render(request, self.template_name, {'catalog_fragments': fragments})
+        return super().get(request, *args, **kwargs)
+
+    @staticmethod
+    def get_catalog_cache(request):
+        category = request.GET.get('category') or ''
+        return CatalogCacheService.for_request(
+            request,
+            scope=f'category:{category}',
+            key_parts=('list', category, request.GET.get('cursor') or ''),
+            allowed_params=('category', 'cursor'),
+        )
 
     def get_queryset(self):
-        qs = Product.objects.select_related('category').prefetch_related('images')
+        # Cards are rendered from the denormalized image summary, so images are not prefetched
+        qs = Product.objects.select_related('category')
 
         if not is_backoffice_member(self.request):
             qs = qs.exclude(category__name__in=self.ADMIN_CATEGORIES)
@@ -38,7 +65,19 @@ class ProductListView(ListView):
         category = self.request.GET.get('category')
         if category:
             qs = qs.filter(category__name=category)
-        return qs.order_by('-updated_at', '-price')
+        return qs.order_by(*[f'-{key}' for key in self.ORDERING])
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Buyers get keyset pagination (?cursor=...), so deep pages cost the same as the first one.
+        Backoffice keeps offset pagination (?page=N) to jump between arbitrary pages.
+        """
+        if is_backoffice_member(self.request):
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, per_page=page_size, keys=self.ORDERING)
+        page = paginator.page(self.request.GET.get('cursor'))
+        return paginator, page, page.object_list, page.has_next or not page.is_first
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -51,11 +90,15 @@ class ProductListView(ListView):
         context['stock_filter'] = self.request.GET.get('stock_filter') or ''
         context['is_active_filter'] = self.request.GET.get('is_active_filter') or ''
         context['selected_category'] = self.request.GET.get('category') or ''
+        context['keyset_pagination'] = not is_backoffice_member(self.request)
 
         context['product_toggle_visibility'] = self.request.GET.get('product_toggle_visibility')
         context['product_deletion'] = self.request.GET.get('product_deletion')
         context['cart_clear_out'] = self.request.GET.get('cart_clear_out')
         context['message'] = self.request.GET.get('message')
+
+        if self.catalog_cache:
+            context['catalog_fragments'] = self.catalog_cache.render(self.CACHED_FRAGMENTS, context)
         return context
 
 
@@ -131,6 +174,43 @@ class ProductDetailView(DetailView):
     model = Product
     template_name = 'core/product_detail.html'
     queryset = Product.objects.select_related('category').prefetch_related('images')
+    CACHED_FRAGMENTS = {'detail': 'core/includes/product_detail_content.html'}
+
+    def get(self, request, *args, **kwargs):
+        self.catalog_cache = self.get_catalog_cache(request, kwargs.get('pk'))
+        if self.catalog_cache and (fragments := self.catalog_cache.get()):
+            return render(request, self.template_name, {'catalog_fragments': fragments})
+        return super().get(request, *args, **kwargs)
+
+    @staticmethod
+    def get_catalog_cache(request, pk):
+        return CatalogCacheService.for_request(request, scope=f'product:{pk}', key_parts=('detail', pk))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.catalog_cache:
+            context['catalog_fragments'] = self.catalog_cache.render(self.CACHED_FRAGMENTS, context)
+        return context
+
+
+class AsyncProductListView(ProductListView):
+    """ ASGI mode (ASYNC_VIEWS): a cache hit is one thread hop for the lookup, a miss renders in a thread """
+    async def get(self, request, *args, **kwargs):
+        await aget_request_user(request)
+        self.catalog_cache = self.get_catalog_cache(request)
+        if self.catalog_cache and (fragments := await self.catalog_cache.aget()):
+            return TemplateResponse(request, self.template_name, {'catalog_fragments': fragments})
+        return await sync_to_async(super(ProductListView, self).get)(request, *args, **kwargs)
+
+
+class AsyncProductDetailView(ProductDetailView):
+    """ ASGI mode (ASYNC_VIEWS), see AsyncProductListView """
+    async def get(self, request, *args, **kwargs):
+        await aget_request_user(request)
+        self.catalog_cache = self.get_catalog_cache(request, kwargs.get('pk'))
+        if self.catalog_cache and (fragments := await self.catalog_cache.aget()):
+            return TemplateResponse(request, self.template_name, {'catalog_fragments': fragments})
+        return await sync_to_async(super(ProductDetailView, self).get)(request, *args, **kwargs)
 
 
 class ProductDeleteView(BackofficeAccessRequiredMixin, View):
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
 from celery.schedules import crontab
@@ -120,6 +121,14 @@ LOGGING = {
             'formatter': 'verbose',
             'level': 'INFO',
         },
+        'http_client_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'logs/http_client.log',
+            'maxBytes': 1024 * 1024 * 5,
+            'backupCount': 5,
+            'formatter': 'verbose',
+            'level': 'INFO',
+        },
         'errors_file': {
             'class': 'logging.handlers.RotatingFileHandler',
             'filename': BASE_DIR / 'logs/generic_errors.log',
@@ -170,6 +179,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'shared.services.http_client': {
+            'handlers': ['console', 'http_client_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -245,12 +259,38 @@ CELERY_BEAT_SCHEDULE = {
     'cleanup_expired_session_orders_every_hour': {
         'task': 'core.tasks.cleanup_expired_session_orders',
         'schedule': crontab(minute=0, hour='*'),
-    }
+    },
+    'reconcile_stock_counters_every_10_seconds': {
+        'task': 'core.tasks.reconcile_stock_counters',
+        'schedule': timedelta(seconds=10),
+    },
+    'verify_pending_order_totals_every_15_minutes': {
+        'task': 'core.tasks.verify_pending_order_totals',
+        'schedule': crontab(minute='*/15'),
+    },
+    'recover_webhook_events_every_minute': {
+        'task': 'payments.tasks.recover_webhook_events_task',
+        'schedule': timedelta(minutes=1),
+    },
+    'reconcile_payments_every_minute': {
+        'task': 'payments.tasks.reconcile_payments_task',
+        'schedule': timedelta(minutes=1),
+    },
 }
 
+# 'db': row lock per reservation | 'redis': atomic Redis counters reconciled to Postgres by Celery
+STOCK_RESERVATION_ENGINE = os.getenv('STOCK_RESERVATION_ENGINE', 'db')
+
+# 'aggregate': SUM over items on every cart change | 'incremental': delta UPDATE, drift fixed by the verifier
+ORDER_TOTALS_MODE = os.getenv('ORDER_TOTALS_MODE', 'aggregate')
+
+# async variants of the I/O-bound views (catalog, checkout, webhook), set by the ASGI deployment only:
+# under WSGI an async view runs in its own event loop
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == '1'
+
 
 SESSION_COOKIE_AGE = 86400
-SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+SESSION_ENGINE = 'accounts.sessions'  # cache sessions + per-user session index
 SESSION_CACHE_ALIAS = 'default'
 
 CACHES = {
@@ -0,0 +1,44 @@
+"""
+Backoffice order list: a manager filters OrderListView by day and status over the seeded order history.
+The list isn't paginated, so only day-filtered pages are requested, an unfiltered one renders every order.
+
+    locust -f loadtests/backoffice.py --host=http://localhost:8000 --headless -u 10 -r 2 -t 5m \
+        --csv=loadtests/results/backoffice
+"""
+import os
+import random
+from datetime import date, timedelta
+
+from locust import HttpUser, task, between
+
+from common import Dataset, login, register_slos
+
+# must match the seed_benchmark --anchor and --days of the dataset
+ANCHOR = date.fromisoformat(os.getenv('LOADTEST_ANCHOR', '2026-01-01'))
+DAYS = int(os.getenv('LOADTEST_DAYS', 365))
+STATUSES = ['paid', 'shipped', 'delivered', 'expired']
+
+register_slos({
+    ('GET', 'order_list [date]'): (800, 1500),
+    ('GET', 'order_list [status + date]'): (500, 1000),
+})
+
+
+class BackofficeManager(HttpUser):
+    wait_time = between(2, 6)
+
+    def on_start(self):
+        login(self.client, Dataset.manager_email)
+
+    def _day(self):
+        return (ANCHOR - timedelta(days=random.randrange(DAYS))).isoformat()
+
+    @task(2)
+    def orders_of_day(self):
+        self.client.get('/core/orders/', params={'date': self._day()}, name='order_list [date]')
+
+    @task(3)
+    def orders_of_day_by_status(self):
+        self.client.get('/core/orders/', params={'status': random.choice(STATUSES), 'date': self._day()},
+            name='order_list [status + date]'
+        )
@@ -0,0 +1,104 @@
+"""
+Checkout funnel of distinct customers: cart -> start_checkout -> shipping info -> review order -> start_payment
+-> redirect page polling the payment status until the provider checkout URL is there.
+
+A Celery worker creates the payment session at settings.MOLLIE_BASE_URL, point it to the local stand-in of the
+Mollie API, never to the real one. The checkout redirect isn't followed, the run measures our side only.
+The stand-in settles every payment and sends its webhook, so the next cart of a customer is a new order:
+
+    MOLLIE_BASE_URL=http://localhost:8901/v2/payments  (backend and Celery worker env)
+    python manage.py fake_mollie --webhook-url http://localhost:8000/payments/api/v1/mollie/webhook/
+    locust -f loadtests/checkout.py --host=http://localhost:8000 --headless -u 100 -r 10 -t 5m \
+        --csv=loadtests/results/checkout
+"""
+import random
+import re
+import time
+
+from locust import HttpUser, task, between
+
+from common import Dataset, csrf_headers, login, register_slos
+
+START_PAYMENT_URL = re.compile(r'/payments/start-payment/(\d+)/')
+PAYMENT_CHECKOUT_URL = re.compile(r'/payments/checkout/(\d+)/$')
+POLL_INTERVAL = 0.7  # like the redirect page
+POLL_TIMEOUT = 30
+
+register_slos({
+    ('POST', 'add_to_cart'): (400, 1000),
+    ('GET', 'start_checkout'): (300, 800),
+    ('GET', 'shipping_info'): (300, 800),
+    ('POST', 'shipping_info'): (400, 1000),
+    ('GET', 'review_order'): (500, 1200),
+    ('POST', 'start_payment'): (300, 800),  # the provider round trip runs on a Celery worker
+    ('GET', 'payment_checkout'): (200, 500),
+    ('GET', 'payment_checkout_status'): (100, 300),
+})
+
+
+class CheckoutCustomer(HttpUser):
+    wait_time = between(2, 5)
+
+    def on_start(self):
+        self.email = Dataset.next_customer_email()
+        login(self.client, self.email)
+
+    def on_stop(self):
+        self.client.post('/core/cart-clear-out/', headers=csrf_headers(self.client), name='cart_clear_out')
+
+    @task
+    def checkout(self):
+        for _ in range(random.randint(1, 3)):
+            self.client.post(f'/core/order-items/{Dataset.popular_product_pk()}/create/',
+                headers=csrf_headers(self.client), name='add_to_cart'
+            )
+
+        self.client.get('/payments/start-checkout/', name='start_checkout', allow_redirects=False)
+        self.client.get('/accounts/account/shipping/', name='shipping_info')
+        self.client.post('/accounts/account/shipping/', data=self._shipping(), headers=csrf_headers(self.client),
+            name='shipping_info', allow_redirects=False
+        )
+
+        with self.client.get('/payments/review-order/', name='review_order', catch_response=True) as response:
+            if not (match := START_PAYMENT_URL.search(response.text)):
+                response.failure('Review page has no order to pay')
+                return
+
+        with self.client.post(
+            f'/payments/start-payment/{match.group(1)}/', data={'payment_method': 'twint'},
+            headers=csrf_headers(self.client), name='start_payment', allow_redirects=False, catch_response=True
+        ) as response:
+            if not (match := PAYMENT_CHECKOUT_URL.search(response.headers.get('Location', ''))):
+                response.failure(f'Payment was not initiated: {response.headers.get("Location")}')
+                return
+
+        self.client.get(f'/payments/checkout/{match.group(1)}/', name='payment_checkout', allow_redirects=False)
+        self._wait_for_checkout_url(match.group(1))
+
+    def _wait_for_checkout_url(self, payment_pk):
+        deadline = time.monotonic() + POLL_TIMEOUT
+        while True:
+            with self.client.get(
+                f'/payments/checkout/{payment_pk}/status/', name='payment_checkout_status', catch_response=True
+            ) as response:
+                redirect_url = response.json().get('redirect_url') if response.ok else None
+                if redirect_url:
+                    if 'something-went-wrong' in redirect_url:
+                        response.failure(f'Payment session was not created: {response.json()["status"]}')
+                    return
+                if time.monotonic() > deadline:
+                    response.failure(f'No checkout URL after {POLL_TIMEOUT}s')
+                    return
+            time.sleep(POLL_INTERVAL)
+
+    def _shipping(self):
+        return {
+            'first_name': 'Load',
+            'last_name': 'Test',
+            'phone': '+41790000000',
+            'country': 'Switzerland',
+            'city': 'Zurich',
+            'postal_code': '8001',
+            'street': 'Bahnhofstrasse',
+            'house_number': '1',
+        }
@@ -0,0 +1,144 @@
+"""
+Shared parts of the load profiles: the seed_benchmark dataset, Zipf product popularity, login and SLO checks.
+
+The dataset is read once per locust process through the Django ORM, so run locust where the project settings
+reach the database (the backend container). Every profile fails the run (exit code 1) when a p95/p99 SLO
+or the failure ratio is exceeded. --csv writes the stats to compare capacity run to run:
+
+    python manage.py seed_benchmark --flush
+    locust -f loadtests/checkout.py --host=http://localhost:8000 --headless -u 100 -r 10 -t 5m \
+        --csv=loadtests/results/checkout --csv-full-history
+"""
+import itertools
+import logging
+import os
+import random
+import sys
+from pathlib import Path
+
+from locust import events
+
+logger = logging.getLogger(__name__)
+
+PREFIX = os.getenv('LOADTEST_PREFIX', 'bench')
+PASSWORD = os.getenv('LOADTEST_PASSWORD', 'BenchmarkPas123')
+ZIPF_EXPONENT = float(os.getenv('LOADTEST_ZIPF_EXPONENT', 1.1))
+MAX_FAIL_RATIO = float(os.getenv('LOADTEST_MAX_FAIL_RATIO', 0.01))
+
+
+class Dataset:
+    """ pks and accounts of the seeded dataset, products ordered by popularity (seed_benchmark puts popular first) """
+    product_pks = []
+    category_names = []
+    customer_emails = []
+    manager_email = None
+    paid_transactions = []
+    _cum_weights = []
+    _customers = itertools.count()
+
+    @classmethod
+    def load(cls):
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # locust only adds the locustfile dir
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'doom_market.settings.dev')
+        import django
+        django.setup()
+
+        from django.contrib.auth import get_user_model
+        from core.domain import OrderStatus
+        from core.models import Category, Product
+        from payments.domain import PaymentMethod, PaymentStatus
+        from payments.models import Payment
+
+        User = get_user_model()
+        cls.product_pks = list(
+            Product.objects
+            .filter(name__startswith=f'{PREFIX}-', is_active=True, quantity__gt=0)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        cls.category_names = list(Category.objects.filter(name__startswith=f'{PREFIX}-').values_list('name', flat=True))
+        cls.customer_emails = list(
+            User.objects
+            .filter(email__startswith=f'{PREFIX}-', customer_profile__isnull=False)
+            .order_by('pk')
+            .values_list('email', flat=True)
+        )
+        cls.manager_email = f'{PREFIX}-manager@bench.local'
+        # Mollie webhooks of already paid orders: a storm of retried notifications must not change the dataset
+        cls.paid_transactions = list(
+            Payment.objects
+            .filter(
+                payment_method=PaymentMethod.TWINT,
+                payment_status=PaymentStatus.SUCCEEDED,
+                order__status=OrderStatus.PAID,
+                transaction__isnull=False
+            )
+            .order_by('-pk')
+            .values_list('transaction', flat=True)[:10_000]
+        )
+        if not cls.product_pks or not cls.customer_emails:
+            raise RuntimeError(f'No "{PREFIX}" dataset found. Run "python manage.py seed_benchmark" first')
+
+        cls._cum_weights = list(itertools.accumulate(
+            1 / rank ** ZIPF_EXPONENT for rank in range(1, len(cls.product_pks) + 1)
+        ))
+        logger.info(f'Dataset "{PREFIX}": {len(cls.product_pks)} products, {len(cls.customer_emails)} customers')
+
+    @classmethod
+    def popular_product_pk(cls):
+        return random.choices(cls.product_pks, cum_weights=cls._cum_weights)[0]
+
+    @classmethod
+    def next_customer_email(cls):
+        """ Every simulated user logs in as a distinct customer, wraps around when users outnumber customers """
+        return cls.customer_emails[next(cls._customers) % len(cls.customer_emails)]
+
+
+@events.init.add_listener
+def load_dataset(environment, **kwargs):
+    Dataset.load()
+
+
+def csrf_headers(client):
+    # the token is rotated on login, always send the current cookie
+    return {'X-CSRFToken': client.cookies.get('csrftoken', '')}
+
+
+def login(client, email, password=PASSWORD):
+    client.get('/accounts/login/', name='login page')
+    with client.post(
+        '/accounts/login/', data={'username': email, 'password': password},
+        headers=csrf_headers(client), name='login', catch_response=True, allow_redirects=False
+    ) as response:
+        if response.status_code != 302:
+            response.failure(f'Login of {email} failed: {response.status_code}')
+
+
+def register_slos(slos: dict):
+    """
+    slos: {(method, name): (p95_ms, p99_ms)}, checked when the run ends. Requests that weren't made are skipped.
+    """
+    @events.quitting.add_listener
+    def check_slos(environment, **kwargs):
+        stats = environment.stats
+        violations = []
+        for (method, name), (p95, p99) in slos.items():
+            entry = stats.entries.get((name, method))
+            if not entry or not entry.num_requests:
+                continue
+            actual_p95 = entry.get_response_time_percentile(0.95)
+            actual_p99 = entry.get_response_time_percentile(0.99)
+            if actual_p95 > p95 or actual_p99 > p99:
+                violations.append(f'{method} {name}: p95 {actual_p95} ms (SLO {p95}), p99 {actual_p99} ms (SLO {p99})')
+
+        for violation in violations:
+            logger.error(f'SLO violated | {violation}')
+        if violations:
+            environment.process_exit_code = 1
+
+
+@events.quitting.add_listener
+def check_fail_ratio(environment, **kwargs):
+    if (fail_ratio := environment.stats.total.fail_ratio) > MAX_FAIL_RATIO:
+        logger.error(f'SLO violated | Failure ratio {fail_ratio:.2%} (SLO {MAX_FAIL_RATIO:.2%})')
+        environment.process_exit_code = 1
@@ -0,0 +1,40 @@
+"""
+Contention on a single hot SKU: every user adds and removes the same product.
+
+Run it twice against the same stock and compare RPS / p95 of "add_to_cart":
+    STOCK_RESERVATION_ENGINE=db     -> row lock on Product for every reservation
+    STOCK_RESERVATION_ENGINE=redis  -> atomic Redis counter, Postgres updated by Celery in batches
+
+    HOT_SKU_PK=1 locust -f loadtests/hot_sku.py --host=http://localhost:8000 -u 200 -r 50
+"""
+import os
+
+from locust import HttpUser, task, between
+
+HOT_SKU_PK = int(os.getenv('HOT_SKU_PK', 1))
+
+
+class HotSkuBuyer(HttpUser):
+    wait_time = between(0.1, 0.5)
+    csrf_token = None
+
+    def on_start(self):
+        response = self.client.get('/accounts/login/')
+        self.csrf_token = response.cookies.get('csrftoken')
+
+    def on_stop(self):
+        self.client.post('/core/cart-clear-out/', headers={'X-CSRFToken': self.csrf_token})
+
+    @task(3)
+    def add_to_cart(self):
+        self.client.post(f'/core/order-items/{HOT_SKU_PK}/create/',
+            headers={'X-CSRFToken': self.csrf_token},
+            name='add_to_cart [hot sku]'
+        )
+
+    @task(2)
+    def remove_from_cart(self):
+        self.client.post(f'/core/order-items/{HOT_SKU_PK}/delete/',
+            headers={'X-CSRFToken': self.csrf_token},
+            name='remove_from_cart [hot sku]'
+        )
@@ -0,0 +1,40 @@
+"""
+Bursts of Mollie webhooks: retried notifications of paid orders, mixed with unknown transaction IDs.
+The view only stores the event, Celery workers fetch the payment status from settings.MOLLIE_BASE_URL,
+point it to the local stand-in of the Mollie API, never to the real one. Seeded transactions are unknown to it:
+
+    python manage.py fake_mollie --unknown-status paid
+    WEBHOOK_BURST=50 locust -f loadtests/webhook_storm.py --host=http://localhost:8000 --headless -u 20 -r 20 -t 3m \
+        --csv=loadtests/results/webhook_storm
+
+Once the run ends, the backlog of WebhookEvent rows in status "received" should drain within seconds.
+"""
+import os
+import random
+import uuid
+
+from locust import HttpUser, task, between
+
+from common import Dataset, register_slos
+
+WEBHOOK_BURST = int(os.getenv('WEBHOOK_BURST', 20))
+UNKNOWN_RATIO = float(os.getenv('WEBHOOK_UNKNOWN_RATIO', 0.1))
+
+register_slos({
+    ('POST', 'mollie_webhook'): (200, 500),  # only stores the event
+    ('POST', 'mollie_webhook [unknown]'): (200, 500),
+})
+
+
+class WebhookSender(HttpUser):
+    wait_time = between(2, 5)  # pause between bursts
+
+    @task
+    def burst(self):
+        for _ in range(WEBHOOK_BURST):
+            if random.random() < UNKNOWN_RATIO or not Dataset.paid_transactions:
+                transaction, name = f'tr_{uuid.uuid4().hex[:10]}', 'mollie_webhook [unknown]'
+            else:
+                transaction, name = random.choice(Dataset.paid_transactions), 'mollie_webhook'
+            # form-encoded like Mollie sends it
+            self.client.post('/payments/api/v1/mollie/webhook/', data={'id': transaction}, name=name)
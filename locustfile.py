@@ -1,82 +1,76 @@
+"""
+Shopping profile: catalog browsing and cart changes of many distinct customers and anonymous visitors,
+product popularity follows a Zipf distribution. Needs the seed_benchmark dataset, see loadtests/common.py.
+
+    locust --host=http://localhost:8000 --headless -u 200 -r 20 -t 5m --csv=loadtests/results/shopping
+"""
+import random
+
 from locust import HttpUser, task, between
 
-from random import randint
+from loadtests.common import Dataset, csrf_headers, login, register_slos
 
+register_slos({
+    ('GET', 'product_list'): (300, 800),
+    ('GET', 'product_list [category]'): (300, 800),
+    ('GET', 'product_detail'): (300, 800),
+    ('GET', 'cart'): (300, 800),
+    ('POST', 'add_to_cart'): (400, 1000),
+    ('POST', 'remove_from_cart'): (400, 1000),
+})
 
-class DjangoAuthorizedUser(HttpUser):
-    weight = 2
+
+class Shopper(HttpUser):
+    abstract = True
     wait_time = between(1, 3)
-    csrf_token = None
 
     def on_start(self):
-        response = self.client.get('/accounts/login/')
-        self.csrf_token = response.cookies.get('csrftoken')
-
-        self.client.post('/accounts/login/',
-            data={
-                'email': 'locust_user@gmail.com',
-                'password': 'dfhr88vbdsSD',
-            },
-            headers={'X-CSRFToken': self.csrf_token}
-        )
+        self.cart = []
+        self.client.get('/accounts/login/', name='login page')  # csrf cookie
 
     def on_stop(self):
-        print(f'Logging out user (csrf: {self.csrf_token})')
-        self.client.post('/core/cart-clear-out/', headers={'X-CSRFToken': self.csrf_token})
-        response = self.client.post('/accounts/logout/', headers={'X-CSRFToken': self.csrf_token})
-        print(f'Logout status: {response.status_code}')
+        self.client.post('/core/cart-clear-out/', headers=csrf_headers(self.client), name='cart_clear_out')
 
-    @task
+    @task(3)
     def product_list(self):
-        self.client.get('/core/products/')
+        self.client.get('/core/products/', name='product_list')
 
     @task
-    def cart(self):
-        self.client.get('/core/order-items/')
-
-    @task(3)
-    def add_to_cart(self):
-        pk = randint(1, 5)
-        self.client.post(f'/core/order-items/{pk}/create/',
-            headers={'X-CSRFToken': self.csrf_token}
+    def product_list_category(self):
+        self.client.get('/core/products/', params={'category': random.choice(Dataset.category_names)},
+            name='product_list [category]'
         )
 
     @task(2)
-    def remove_form_cart(self):
-        pk = randint(1, 5)
-        self.client.post(f'/core/order-items/{pk}/delete/',
-            headers={'X-CSRFToken': self.csrf_token}
-        )
-
-
-class DjangoAnonymousUser(HttpUser):
-    weight = 3
-    wait_time = between(1, 3)
-    csrf_token = None
-
-    def on_start(self):
-        response = self.client.get('/accounts/login/')
-        self.csrf_token = response.cookies.get('csrftoken')
-
-    def on_stop(self):
-        print(f'Clearing cart by anonymous user (csrf: {self.csrf_token})')
-        response = self.client.post('/core/cart-clear-out/', headers={'X-CSRFToken': self.csrf_token})
-        print(f'Clearing cart status: {response.status_code}')
+    def product_detail(self):
+        self.client.get(f'/core/products/{Dataset.popular_product_pk()}/', name='product_detail')
 
     @task
-    def product_list(self):
-        self.client.get('/core/products/')
-
-    @task
-    def cart(self):
-        self.client.get('/core/order-items/')
+    def cart_view(self):
+        self.client.get('/core/order-items/', name='cart')
 
     @task(3)
     def add_to_cart(self):
-        pk = randint(1, 5)
-        self.client.post(f'/core/order-items/{pk}/create/', headers={'X-CSRFToken': self.csrf_token})
+        pk = Dataset.popular_product_pk()
+        self.client.post(f'/core/order-items/{pk}/create/', headers=csrf_headers(self.client), name='add_to_cart')
+        self.cart.append(pk)
 
     @task(2)
     def remove_from_cart(self):
-        pk = randint(1, 5)
-        self.client.post(f'/core/order-items/{pk}/delete/', headers={'X-CSRFToken': self.csrf_token})
\ No newline at end of file
+        if self.cart:
+            pk = self.cart.pop(random.randrange(len(self.cart)))
+            self.client.post(f'/core/order-items/{pk}/delete/', headers=csrf_headers(self.client),
+                name='remove_from_cart'
+            )
+
+
+class CustomerShopper(Shopper):
+    weight = 2
+
+    def on_start(self):
+        super().on_start()
+        login(self.client, Dataset.next_customer_email())
+
+
+class AnonymousShopper(Shopper):
+    weight = 3
@@ -1,8 +1,15 @@
 from django.contrib import admin
 
-from payments.models import Payment
+from payments.models import Payment, WebhookEvent
 
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
-    list_display = ('order', 'payment_method', 'payment_status', 'paid_at', 'transaction')
\ No newline at end of file
+    list_display = ('order', 'payment_method', 'payment_status', 'paid_at', 'transaction')
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('transaction', 'provider', 'status', 'attempts', 'created_at', 'processed_at', 'error')
+    list_filter = ('status', 'provider')
+    search_fields = ('transaction',)
\ No newline at end of file
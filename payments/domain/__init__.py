@@ -1,2 +1,3 @@
 from .payment_method import PaymentMethod
-from .payment_status import PaymentStatus
\ No newline at end of file
+from .payment_status import PaymentStatus
+from .webhook_event_status import WebhookEventStatus
\ No newline at end of file
@@ -2,6 +2,7 @@ from django.db import models
 
 
 class PaymentStatus(models.TextChoices):
+    CREATING = 'creating', 'Creating'  # provider session is being created by a Celery worker
     INITIATED = 'initiated', 'Initiated'
     SUCCEEDED = 'succeeded', 'Succeeded'
     FAILED = 'failed', 'Failed'
\ No newline at end of file
@@ -0,0 +1,8 @@
+from django.db import models
+
+
+class WebhookEventStatus(models.TextChoices):
+    RECEIVED = 'received', 'Received'
+    PROCESSING = 'processing', 'Processing'
+    PROCESSED = 'processed', 'Processed'
+    FAILED = 'failed', 'Failed'
@@ -0,0 +1,328 @@
+import heapq
+import itertools
+import json
+import logging
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = {'paid', 'failed', 'canceled', 'expired'}
+
+
+class WebhookScheduler:
+    """ Delayed callbacks on one timer thread, delivered by a small pool: no thread per pending payment """
+
+    def __init__(self, workers: int):
+        self._queue = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fake-mollie-webhook')
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def schedule(self, delay: float, callback):
+        with self._condition:
+            heapq.heappush(self._queue, (time.monotonic() + delay, next(self._seq), callback))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    self._condition.wait(self._queue[0][0] - time.monotonic() if self._queue else None)
+                _, _, callback = heapq.heappop(self._queue)
+            try:
+                self._pool.submit(callback)
+            except RuntimeError:  # the server was shut down, pending callbacks are dropped
+                return
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class FakeMollieServer(ThreadingHTTPServer):
+    """
+    In-memory stand-in of the Mollie payments API (create and get payment) for load and latency tests.
+    A created payment is "open" until its webhook is due, then it gets a final status drawn from `statuses`
+    and the webhook (id=<transaction>) is POSTed like Mollie does, with retries on failure.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, *, latency=0.0, jitter=0.0, error_rate=0.0, timeout_rate=0.0, hang=10.0,
+                 statuses=None, unknown_status=None, webhook_delay=2.0, webhook_url=None, webhook_retries=3,
+                 webhooks=True, webhook_workers=8, seed=None):
+        self.latency, self.jitter, self.hang = latency, jitter, hang
+        self.error_rate, self.timeout_rate = error_rate, timeout_rate
+        self.statuses = statuses or {'paid': 1}
+        self.unknown_status = unknown_status
+        self.webhook_delay, self.webhook_url, self.webhook_retries = webhook_delay, webhook_url, webhook_retries
+        self.webhooks = webhooks
+
+        self.payments = {}
+        self.idempotency_keys = {}  # Idempotency-Key header -> payment id created with it
+        self.outcomes = {}  # payment id -> the final status it gets when settled
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.scheduler = WebhookScheduler(webhook_workers)
+        super().__init__(address, FakeMollieHandler)  # binds, server_close() on failure needs the scheduler
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def draw_fault(self) -> str | None:
+        """ 'timeout', 'error' or None, after the simulated network latency """
+        with self.lock:
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            roll = self.rng.random()
+        time.sleep(delay)
+        if roll < self.timeout_rate:
+            time.sleep(self.hang)
+            return 'timeout'
+        if roll < self.timeout_rate + self.error_rate:
+            return 'error'
+        return None
+
+    def create_payment(self, payload: dict, idempotency_key: str | None = None) -> dict:
+        with self.lock:
+            if idempotency_key in self.idempotency_keys:
+                # a repeated key replays the payment created first, like Mollie does
+                self.stats['replayed'] += 1
+                return dict(self.payments[self.idempotency_keys[idempotency_key]])
+            payment_id = f'tr_{secrets.token_hex(5)}'
+            final_status = self.rng.choices(list(self.statuses), weights=list(self.statuses.values()))[0]
+        payment = {
+            'resource': 'payment',
+            'id': payment_id,
+            'mode': 'test',
+            'status': 'open',
+            'createdAt': timezone.now().isoformat(),
+            'amount': payload.get('amount'),
+            'description': payload.get('description'),
+            'method': payload.get('method'),
+            'metadata': payload.get('metadata'),
+            'redirectUrl': payload.get('redirectUrl'),
+            'webhookUrl': payload.get('webhookUrl'),
+            '_links': {
+                'self': {'href': f'{self.base_url}/v2/payments/{payment_id}', 'type': 'application/hal+json'},
+                'checkout': {'href': f'{self.base_url}/checkout/{payment_id}', 'type': 'text/html'},
+            },
+        }
+        with self.lock:
+            if idempotency_key in self.idempotency_keys:  # a concurrent call with the same key won
+                self.stats['replayed'] += 1
+                return dict(self.payments[self.idempotency_keys[idempotency_key]])
+            if idempotency_key:
+                self.idempotency_keys[idempotency_key] = payment_id
+            self.payments[payment_id] = payment
+            self.outcomes[payment_id] = final_status
+            self.stats['created'] += 1
+        self.scheduler.schedule(self.webhook_delay, lambda: self.complete(payment_id))
+        return dict(payment)
+
+    def get_payment(self, payment_id: str) -> dict | None:
+        with self.lock:
+            payment = self.payments.get(payment_id)
+            if payment:
+                return dict(payment)
+        if self.unknown_status:
+            # IDs this server didn't create, e.g. payments of a seeded dataset
+            return {'resource': 'payment', 'id': payment_id, 'mode': 'test', 'status': self.unknown_status}
+        return None
+
+    def complete(self, payment_id: str):
+        """ Settles the payment (first call wins) and notifies the shop """
+        with self.lock:
+            payment = self.payments.get(payment_id)
+            if not payment or payment['status'] != 'open':
+                return
+            payment['status'] = self.outcomes.pop(payment_id)
+        if self.webhooks:
+            self.deliver_webhook(payment_id, self.webhook_url or payment['webhookUrl'], attempt=1)
+
+    def deliver_webhook(self, payment_id: str, url: str, attempt: int):
+        try:
+            response = requests.post(url, data={'id': payment_id}, timeout=10)
+            if response.ok:
+                self.count('webhooks_delivered')
+                return
+            error = f'status {response.status_code}'
+        except requests.RequestException as exc:
+            error = exc
+
+        if attempt > self.webhook_retries:
+            self.count('webhooks_failed')
+            logger.warning(f'Webhook of "{payment_id}" was not delivered to {url}: {error}')
+            return
+        self.count('webhooks_retried')
+        self.scheduler.schedule(
+            self.webhook_delay * 2 ** attempt,
+            lambda: self.deliver_webhook(payment_id, url, attempt + 1)
+        )
+
+    def server_close(self):
+        super().server_close()
+        self.scheduler.shutdown()
+
+
+class FakeMollieHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def do_POST(self):
+        payload = self._read_json()
+        if self._unauthorized() or self._faulted():
+            return
+        self._send_json(201, self.server.create_payment(payload, self.headers.get('Idempotency-Key')))
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        payment_id = path.rsplit('/', 1)[-1]
+
+        if path.startswith('/checkout/'):
+            # the "customer" completes the payment right away and is sent back to the shop
+            payment = self.server.get_payment(payment_id)
+            if not payment or payment['status'] != 'open':
+                return self._send_json(404, self._error(404, 'Not Found', 'No open payment with this ID'))
+            self.server.complete(payment_id)
+            self.send_response(303)
+            self.send_header('Location', payment['redirectUrl'] or '/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if self._unauthorized() or self._faulted():
+            return
+        self.server.count('get')
+        if payment := self.server.get_payment(payment_id):
+            return self._send_json(200, payment)
+        self._send_json(404, self._error(404, 'Not Found', f'No payment exists with token {payment_id}.'))
+
+    def _unauthorized(self) -> bool:
+        if self.headers.get('Authorization', '').startswith('Bearer '):
+            return False
+        self._send_json(401, self._error(401, 'Unauthorized Request', 'Missing authentication'))
+        return True
+
+    def _faulted(self) -> bool:
+        fault = self.server.draw_fault()
+        if fault is None:
+            return False
+        self.server.count(fault)
+        if fault == 'timeout':
+            self._send_json(504, self._error(504, 'Gateway Timeout', 'Simulated timeout'))
+        else:
+            self._send_json(503, self._error(503, 'Service Unavailable', 'Simulated outage'))
+        return True
+
+    def _read_json(self) -> dict:
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            return json.loads(body or b'{}')
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def _error(status: int, title: str, detail: str) -> dict:
+        return {'status': status, 'title': title, 'detail': detail}
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/hal+json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up, e.g. its timeout is shorter than --hang
+
+    def log_message(self, format, *args):
+        logger.debug(f'{self.address_string()} {format % args}')
+
+
+def parse_statuses(value: str) -> dict:
+    """ 'paid=90,failed=10' -> {'paid': 90.0, 'failed': 10.0} """
+    statuses = {}
+    for part in value.split(','):
+        status, _, weight = part.partition('=')
+        status = status.strip()
+        if status not in FINAL_STATUSES:
+            raise CommandError(f'Unknown final status "{status}", use {sorted(FINAL_STATUSES)}')
+        statuses[status] = float(weight or 1)
+    return statuses
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs a local stand-in of the Mollie payments API with configurable latency, errors, timeouts and '
+        'asynchronous webhooks. Point MOLLIE_BASE_URL to http://<host>:<port>/v2/payments.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8901)
+        parser.add_argument('--latency', type=float, default=50, help='Response delay, ms')
+        parser.add_argument('--jitter', type=float, default=50, help='Random extra delay up to this, ms')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of 503 responses')
+        parser.add_argument('--timeout-rate', type=float, default=0.0, help='Share of responses held for --hang')
+        parser.add_argument('--hang', type=float, default=10, help='Seconds a timed out response is held')
+        parser.add_argument('--statuses', default='paid', help='Final statuses with weights, e.g. paid=90,failed=10')
+        parser.add_argument(
+            '--unknown-status', choices=sorted(FINAL_STATUSES | {'open'}),
+            help='Answer GETs of unknown IDs (e.g. seeded payments) with this status instead of 404'
+        )
+        parser.add_argument('--webhook-delay', type=float, default=2, help='Seconds until a payment is settled')
+        parser.add_argument(
+            '--webhook-url',
+            help='Deliver webhooks here instead of the webhookUrl of the payment (the public NGROK domain), '
+                 'e.g. http://localhost:8000/payments/api/v1/mollie/webhook/'
+        )
+        parser.add_argument('--webhook-retries', type=int, default=3)
+        parser.add_argument('--webhook-workers', type=int, default=8)
+        parser.add_argument('--no-webhooks', action='store_true', help='Settle payments without notifying')
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] + options['timeout_rate'] <= 1:
+            raise CommandError('--error-rate + --timeout-rate must be within [0, 1]')
+
+        server = FakeMollieServer(
+            (options['host'], options['port']),
+            latency=options['latency'] / 1000,
+            jitter=options['jitter'] / 1000,
+            error_rate=options['error_rate'],
+            timeout_rate=options['timeout_rate'],
+            hang=options['hang'],
+            statuses=parse_statuses(options['statuses']),
+            unknown_status=options['unknown_status'],
+            webhook_delay=options['webhook_delay'],
+            webhook_url=options['webhook_url'],
+            webhook_retries=options['webhook_retries'],
+            webhooks=not options['no_webhooks'],
+            webhook_workers=options['webhook_workers'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Fake Mollie API on {server.base_url}/v2/payments (Ctrl+C to stop)'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(', '.join(f'{key}: {value}' for key, value in sorted(server.stats.items())) or 'No requests')
@@ -0,0 +1,44 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from payments.services.reconcile_payments import PaymentReconciler
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs one payment reconciliation pass (what reconcile_payments_task does every minute) and reports '
+        'its throughput. Benchmark it against the fake Mollie API with a dataset of stale payments:\n'
+        '  python manage.py seed_benchmark --pending-ratio 0.5 --stale-payment-ratio 1\n'
+        '  python manage.py fake_mollie --unknown-status paid --latency 50\n'
+        '  MOLLIE_BASE_URL=http://localhost:8901/v2/payments python manage.py reconcile_payments --rate 0'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=float, default=10, help='Minutes without a webhook')
+        parser.add_argument('--recheck-after', type=float, default=10, help='Minutes between lookups of one payment')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent provider lookups')
+        parser.add_argument('--rate', type=float, default=20, help='Provider lookups per second, 0 for no limit')
+        parser.add_argument('--time-budget', type=float, default=3600, help='Seconds before the pass stops')
+
+    def handle(self, *args, **options):
+        reconciler = PaymentReconciler(
+            stale_after=timedelta(minutes=options['stale_after']),
+            recheck_after=timedelta(minutes=options['recheck_after']),
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            rate=options['rate'],
+            time_budget=options['time_budget'],
+        )
+        started_at = time.monotonic()
+        stats = reconciler.run()
+        elapsed = time.monotonic() - started_at
+
+        lookups = stats['succeeded'] + stats['failed'] + stats['open'] + stats['unavailable']
+        for key, value in sorted(stats.items()):
+            self.stdout.write(f'{key:<24} {value:>8}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{lookups} payments looked up in {elapsed:.1f} s ({lookups / elapsed if elapsed else 0:.0f}/s)'
+        ))
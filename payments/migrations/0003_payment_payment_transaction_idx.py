@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 13:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False  # indexes are built concurrently, without locking writes to hot tables
+
+    dependencies = [
+        ('core', '0059_hot_query_indexes'),
+        ('payments', '0002_alter_payment_payment_method'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('transaction__isnull', False)), fields=['transaction'], name='payment_transaction_idx'),
+        ),
+    ]
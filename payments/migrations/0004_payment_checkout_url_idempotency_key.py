@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_payment_payment_transaction_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='checkout_url',
+            field=models.URLField(blank=True, max_length=512),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='idempotency_key',
+            field=models.UUIDField(blank=True, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='payment_status',
+            field=models.CharField(choices=[('creating', 'Creating'), ('initiated', 'Initiated'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], max_length=20),
+        ),
+    ]
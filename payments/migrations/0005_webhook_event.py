@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_payment_checkout_url_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('provider', models.CharField(max_length=20)),
+                ('transaction', models.CharField(max_length=128)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('received', 'Received'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed')], default='received', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status__in', ['received', 'processing'])), fields=['status', 'updated_at'], name='webhook_event_pending_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'received')), fields=('provider', 'transaction'), name='webhook_event_received_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 09:42
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False  # indexes are built concurrently, without locking writes to hot tables
+
+    dependencies = [
+        ('payments', '0005_webhook_event'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('payment_status__in', ['creating', 'initiated'])), fields=['payment_status', 'created_at'], name='payment_unsettled_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_payment_unsettled_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+    ]
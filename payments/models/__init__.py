@@ -1 +1,2 @@
-from .payment import Payment
\ No newline at end of file
+from .payment import Payment
+from .webhook_event import WebhookEvent
\ No newline at end of file
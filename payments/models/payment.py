@@ -10,7 +10,27 @@ class Payment(TimeStampedModel):
     payment_method = models.CharField(max_length=20, choices=PaymentMethod.choices)
     payment_status = models.CharField(max_length=20, choices=PaymentStatus.choices)
     transaction = models.CharField(max_length=128, blank=True, null=True)  # Outer payment provider
+    checkout_url = models.URLField(max_length=512, blank=True)
+    amount = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)  # Sent with the session
+    # sent as Idempotency-Key: a retried session creation returns the same provider payment
+    idempotency_key = models.UUIDField(unique=True, blank=True, null=True)
     paid_at = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Webhook lookup by the provider transaction id
+            models.Index(
+                fields=['transaction'],
+                condition=models.Q(transaction__isnull=False),
+                name='payment_transaction_idx'
+            ),
+            # Reconciliation lookup of payments whose webhook never came, settled ones are the bulk of the table
+            models.Index(
+                fields=['payment_status', 'created_at'],
+                condition=models.Q(payment_status__in=[PaymentStatus.CREATING, PaymentStatus.INITIATED]),
+                name='payment_unsettled_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'Payment #{self.pk} by {self.order.user}'
@@ -0,0 +1,36 @@
+from django.db import models
+
+from payments.domain import WebhookEventStatus
+from shared.models import TimeStampedModel
+
+
+class WebhookEvent(TimeStampedModel):
+    """ Inbox of provider webhooks: stored and acknowledged by the view, processed by Celery workers """
+    provider = models.CharField(max_length=20)
+    transaction = models.CharField(max_length=128)  # Outer payment provider
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=WebhookEventStatus.choices, default=WebhookEventStatus.RECEIVED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            # One unprocessed event per transaction: duplicate deliveries are folded into it
+            models.UniqueConstraint(
+                fields=['provider', 'transaction'],
+                condition=models.Q(status=WebhookEventStatus.RECEIVED),
+                name='webhook_event_received_uniq'
+            ),
+        ]
+        indexes = [
+            # Sweeper lookup of events left behind by lost tasks and crashed workers
+            models.Index(
+                fields=['status', 'updated_at'],
+                condition=models.Q(status__in=[WebhookEventStatus.RECEIVED, WebhookEventStatus.PROCESSING]),
+                name='webhook_event_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.provider} webhook {self.transaction} ({self.status})'
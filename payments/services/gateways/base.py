@@ -6,14 +6,14 @@ from payments.types import PaymentSession
 
 class PaymentGateway(ABC):
     @abstractmethod
-    def create_payment_session(self, order, user_id: int, payment_method: str,
-                               currency: Literal['CHF', 'EUR', 'USD']) -> PaymentSession:
+    def create_payment_session(self, order, user_id: int, payment_method: str, currency: Literal['CHF', 'EUR', 'USD'],
+                               idempotency_key: str | None = None) -> PaymentSession:
         pass
 
     @abstractmethod
-    def handle_webhook(self, webhook_data: dict) -> str:
+    def handle_webhook(self, webhook_data: dict) -> str | None:
         pass
 
     @abstractmethod
-    def check_payment_status(self, transaction_id: str) -> str:
+    def check_payment_status(self, transaction_id: str) -> str | None:
         pass
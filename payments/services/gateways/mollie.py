@@ -7,10 +7,13 @@ from django.urls import reverse
 
 from payments.services.gateways import PaymentGateway
 from payments.types import PaymentSession
+from shared.services.http_client import HttpClient
 from shared.utils import get_current_domain
 
 logger = logging.getLogger(__name__)
 
+mollie_http = HttpClient('mollie', timeout=5)
+
 CURRENT_DOMAIN = get_current_domain()
 REDIRECT_URL = CURRENT_DOMAIN if CURRENT_DOMAIN != 'localhost:8000' else settings.NGROK_DOMAIN
 
@@ -26,8 +29,8 @@ MOLLIE_STATUS_TO_INTERNAL = {
 
 
 class MollieGateway(PaymentGateway):
-    def create_payment_session(self, order, user_id: int, payment_method: str,
-                               currency: Literal['CHF'] = 'CHF') -> PaymentSession | None:
+    def create_payment_session(self, order, user_id: int, payment_method: str, currency: Literal['CHF'] = 'CHF',
+                               idempotency_key: str | None = None) -> PaymentSession | None:
         redirect_url = f'http://{CURRENT_DOMAIN}{reverse("payments:payment_initiated")}'
         webhook_url = f'https://{REDIRECT_URL}{reverse("payments:mollie_webhook")}'  # /payments/api/v1/mollie/webhook/
 
@@ -35,6 +38,9 @@ class MollieGateway(PaymentGateway):
             'Authorization': f'Bearer {settings.MOLLIE_API_KEY}',
             'Content-Type': 'application/json',
         }
+        if idempotency_key:
+            # Mollie replays the first response for a repeated key instead of creating another payment
+            headers['Idempotency-Key'] = idempotency_key
         payload = {
             'amount': {
                 'currency': currency,
@@ -59,7 +65,9 @@ class MollieGateway(PaymentGateway):
         }
 
         try:
-            response = requests.post(settings.MOLLIE_BASE_URL, json=payload, headers=headers, timeout=5)
+            response = mollie_http.post(
+                settings.MOLLIE_BASE_URL, json=payload, headers=headers, idempotent=bool(idempotency_key)
+            )
             if response.status_code != 201:
                 logger.error(
                     f"Error during payment session creation | Unexpected status code: {response.status_code} | "
@@ -86,15 +94,19 @@ class MollieGateway(PaymentGateway):
             logger.error(f'Invalid JSON from response during payment creation')
             return None
 
-    def handle_webhook(self, mollie_webhook_data: dict) -> str:
+    def handle_webhook(self, mollie_webhook_data: dict) -> str | None:
         transaction_id = mollie_webhook_data.get('id', None)
+        return self.check_payment_status(transaction_id)
+
+    def check_payment_status(self, transaction_id: str) -> str | None:
+        """ Internal status of the provider payment, None when it couldn't be fetched """
         try:
             headers = {'Authorization': f'Bearer {settings.MOLLIE_API_KEY}'}
-            response = requests.get(f'{settings.MOLLIE_BASE_URL}/{transaction_id}', headers=headers, timeout=5)
+            response = mollie_http.get(f'{settings.MOLLIE_BASE_URL}/{transaction_id}', headers=headers)
             if response.status_code != 200:
-                logger.error(f'Error while webhook handling | Unexpected status code: {response.status_code} | '
+                logger.error(f'Error while payment status check | Unexpected status code: {response.status_code} | '
                              f'Response: {response.text} | Transaction ID: "{transaction_id}"')
-                return 'failed'
+                return 'failed' if response.status_code == 404 else None
 
             payment_session = response.json()
             mollie_status = payment_session.get('status', None)
@@ -104,23 +116,8 @@ class MollieGateway(PaymentGateway):
             return internal_status
 
         except requests.RequestException as e:
-            logger.error(f'Network/API error during webhook processing: {e}')
-            return 'failed'
+            logger.error(f'Network/API error during payment status check: {e}')
+            return None
         except ValueError:
-            logger.error(f'Invalid JSON from response when webhook processing')
-            return 'failed'
-
-    def check_payment_status(self, transaction_id: str) -> str:
-        return NotImplemented
-
-        # В реальных кейсах webhook может не дойти (сетевой сбой, блокировка, баг).
-        # В таких случаях статус не обновится
-        # Поэтому:
-        #   check_payment_status(session_id) полезен для ручной проверки в административной части.
-        # Также его можно:
-        #   вызывать через Celery с отложкой (если статус "initiated" дольше 5 мин),
-        #   использовать в fallback-механизме (стратегия webhook + poll backup).
-
-        # UPD: я не знаю как это тестить, потому никак не реализовал, на практике, когда я руками тестил транзакции,
-        # я ловил желтый Джанго-экран, но после фикса ошибок и перезапуска страницы браузера, вебхук бил в эндпоинт
-        # и заказ переводился в статус оплачено, не зависимо от первоначального краша.
+            logger.error(f'Invalid JSON from response when payment status check')
+            return None
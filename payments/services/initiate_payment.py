@@ -1,18 +1,117 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.utils import timezone
+
 from payments.domain import PaymentStatus
 from payments.models import Payment
 from .gateway_resolver import resolve_gateway
 
+logger = logging.getLogger(__name__)
 
-def initiate_payment(order, user_pk, payment_method):
-    gateway = resolve_gateway(payment_method)
-    session = gateway.create_payment_session(order=order, user_id=user_pk, payment_method=payment_method)
-    if session is None:
-        return None
+# a session not created by then is given up, the customer is sent to the error page
+CREATION_TIMEOUT = timedelta(seconds=60)
+
+
+def initiate_payment(order, payment_method) -> tuple[Payment, bool]:
+    """
+    Payment in "creating" state, its provider session is created by create_payment_session_task.
+    A payment of the same method still being created, or initiated for the current order total, is reused:
+    a double submit or a return from the checkout page doesn't start a second session.
+    Call it under the order row lock. Returns (payment, created).
+    """
+    payments = order.payments.filter(payment_method=payment_method)
+    payment = payments.filter(payment_status=PaymentStatus.CREATING).first()
+    if payment and not expire_stale_creation(payment):
+        return payment, False
+
+    payment = (
+        payments
+        .filter(payment_status=PaymentStatus.INITIATED, amount=order.total_amount)
+        .exclude(checkout_url='')
+        .order_by('-created_at')
+        .first()
+    )
+    if payment:
+        return payment, False
 
-    Payment.objects.create(
+    payment = Payment.objects.create(
         order=order,
         payment_method=payment_method,
+        payment_status=PaymentStatus.CREATING,
+        idempotency_key=uuid.uuid4(),
+    )
+    return payment, True
+
+
+def create_payment_session(payment_pk):
+    """
+    Worker side of initiate_payment, safe to redeliver: only a payment still "creating" is sent to the provider
+    and its idempotency key makes a repeated call return the same provider payment.
+    """
+    payment = Payment.objects.select_related('order__user').filter(pk=payment_pk).first()
+    if payment is None or payment.payment_status != PaymentStatus.CREATING:
+        return
+
+    gateway = resolve_gateway(payment.payment_method)
+    if gateway is None:
+        logger.error(f'No gateway for payment method {payment.payment_method} | payment_pk={payment.pk}')
+        _fail_creation(payment.pk)
+        return
+
+    order = payment.order
+    session = gateway.create_payment_session(
+        order=order, user_id=order.user.user_id, payment_method=payment.payment_method,
+        idempotency_key=str(payment.idempotency_key),
+    )
+    if session is None:
+        _fail_creation(payment.pk)
+        return
+
+    # conditional: a payment expired meanwhile by the status endpoint stays failed
+    updated = Payment.objects.filter(pk=payment.pk, payment_status=PaymentStatus.CREATING).update(
         payment_status=PaymentStatus.INITIATED,
         transaction=session.session_id,
+        checkout_url=session.checkout_url,
+        amount=order.total_amount,
+        updated_at=timezone.now(),
     )
-    return session.checkout_url
+    if not updated:
+        logger.warning(f'Payment session {session.session_id} created after the payment left "creating" | '
+                       f'payment_pk={payment.pk}')
+
+
+def expire_stale_creation(payment) -> bool:
+    """ Fails a payment stuck in "creating" past CREATION_TIMEOUT (lost task, worker down), True if it's failed """
+    if not _is_stale_creation(payment):
+        return payment.payment_status == PaymentStatus.FAILED
+
+    if _fail_creation(payment.pk):
+        logger.error(f'Payment session was not created within {CREATION_TIMEOUT.seconds}s | payment_pk={payment.pk}')
+    payment.refresh_from_db(fields=['payment_status', 'checkout_url', 'transaction'])
+    return payment.payment_status == PaymentStatus.FAILED
+
+
+async def aexpire_stale_creation(payment) -> bool:
+    """ expire_stale_creation for async views """
+    if not _is_stale_creation(payment):
+        return payment.payment_status == PaymentStatus.FAILED
+
+    failed = await Payment.objects.filter(pk=payment.pk, payment_status=PaymentStatus.CREATING).aupdate(
+        payment_status=PaymentStatus.FAILED, updated_at=timezone.now()
+    )
+    if failed:
+        logger.error(f'Payment session was not created within {CREATION_TIMEOUT.seconds}s | payment_pk={payment.pk}')
+    await payment.arefresh_from_db(fields=['payment_status', 'checkout_url', 'transaction'])
+    return payment.payment_status == PaymentStatus.FAILED
+
+
+def _is_stale_creation(payment) -> bool:
+    return payment.payment_status == PaymentStatus.CREATING and timezone.now() - payment.created_at >= CREATION_TIMEOUT
+
+
+def _fail_creation(payment_pk) -> bool:
+    return bool(Payment.objects.filter(pk=payment_pk, payment_status=PaymentStatus.CREATING).update(
+        payment_status=PaymentStatus.FAILED, updated_at=timezone.now()
+    ))
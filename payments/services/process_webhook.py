@@ -1,5 +1,6 @@
 import logging
 
+from django.db import transaction
 from django.utils import timezone
 
 from core.domain import OrderStatus
@@ -10,36 +11,62 @@ from .gateway_resolver import resolve_gateway
 logger = logging.getLogger(__name__)
 
 
-def process_webhook(webhook_data: dict):
+class PaymentStatusUnavailable(Exception):
+    """ The provider status couldn't be fetched (5xx, timeout, open circuit), the delivery has to be retried """
+
+
+def process_webhook(webhook_data: dict) -> str | None:
+    """
+    Returns the resulting payment status, None for an unknown transaction.
+    Raises PaymentStatusUnavailable instead of failing the payment when the provider can't tell its status.
+    """
     transaction_id = webhook_data.get('id', None)
-    try:
-        payment = Payment.objects.get(transaction=transaction_id)
-    except Payment.DoesNotExist:
+    payment = Payment.objects.filter(transaction=transaction_id).only('pk', 'payment_method').first()
+    if payment is None:
         logger.error(f'Webhook received for unknown transaction ID: "{transaction_id}"')
         return None
 
+    # the provider round trip runs before any row lock is taken
     gateway = resolve_gateway(payment.payment_method)
-    internal_status = gateway.handle_webhook(webhook_data)
-
-    if internal_status == 'succeeded':
-        payment.payment_status = PaymentStatus.SUCCEEDED
-        payment.paid_at = timezone.now()
-
-        order = payment.order
-        order.status = OrderStatus.PAID
-        order.paid_at = payment.paid_at
-        order.save(update_fields=['status', 'paid_at'])
-        logger.info(f'Successful Payment: #{payment.pk} | Transaction ID: "{payment.transaction}" | '
-                    f'Status: {payment.payment_status} | Order: #{order.pk} | Customer: {order.user}')
-
-    elif internal_status == 'initiated':
-        payment.payment_status = PaymentStatus.INITIATED
-        logger.error(f'Delayed/Ambiguous Payment: #{payment.pk} | Transaction ID: "{payment.transaction}" | '
-                     f'Status: {payment.payment_status}')
-
-    else:
-        payment.payment_status = PaymentStatus.FAILED
-        logger.error(f'Failed Payment: #{payment.pk} | Transaction ID: "{payment.transaction}" | '
-                     f'Status: {payment.payment_status}')
-
-    payment.save()
\ No newline at end of file
+    internal_status = gateway.check_payment_status(transaction_id)
+    if internal_status is None:
+        raise PaymentStatusUnavailable(f'Status of transaction "{transaction_id}" is unavailable')
+    return apply_payment_status(payment.pk, internal_status)
+
+
+def apply_payment_status(payment_pk, internal_status: str) -> str:
+    """
+    Deliveries of one transaction are applied one at a time under the payment row lock.
+    A succeeded payment is final: a repeated or late delivery doesn't mark the order paid again, nor downgrade it.
+    """
+    with transaction.atomic():
+        payment = Payment.objects.select_for_update().select_related('order').get(pk=payment_pk)
+        if payment.payment_status == PaymentStatus.SUCCEEDED:
+            if internal_status != 'succeeded':
+                logger.warning(f'Webhook status "{internal_status}" ignored for the paid Payment: #{payment.pk} | '
+                               f'Transaction ID: "{payment.transaction}"')
+            return payment.payment_status
+
+        if internal_status == 'succeeded':
+            payment.payment_status = PaymentStatus.SUCCEEDED
+            payment.paid_at = timezone.now()
+
+            order = payment.order
+            order.status = OrderStatus.PAID
+            order.paid_at = payment.paid_at
+            order.save(update_fields=['status', 'paid_at'])
+            logger.info(f'Successful Payment: #{payment.pk} | Transaction ID: "{payment.transaction}" | '
+                        f'Status: {payment.payment_status} | Order: #{order.pk} | Customer: {order.user}')
+
+        elif internal_status == 'initiated':
+            payment.payment_status = PaymentStatus.INITIATED
+            logger.error(f'Delayed/Ambiguous Payment: #{payment.pk} | Transaction ID: "{payment.transaction}" | '
+                         f'Status: {payment.payment_status}')
+
+        else:
+            payment.payment_status = PaymentStatus.FAILED
+            logger.error(f'Failed Payment: #{payment.pk} | Transaction ID: "{payment.transaction}" | '
+                         f'Status: {payment.payment_status}')
+
+        payment.save()
+    return payment.payment_status
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.domain import OrderStatus
+from core.models import Order
+from payments.domain import PaymentStatus
+from payments.models import Payment
+from .gateway_resolver import resolve_gateway
+from .initiate_payment import CREATION_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """ Thread-safe pacing: call starts are spaced evenly at `rate` per second """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self._next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+
+class PaymentReconciler:
+    """
+    Settles payments whose webhook never came by asking the provider.
+    Initiated payments older than `stale_after` are read in batches (payment_unsettled_idx), looked up by `workers`
+    threads paced to `rate` calls per second, and each batch is applied with a few set-based UPDATEs.
+    A payment still open at the provider is looked up again after `recheck_after`.
+    """
+    def __init__(self, *, stale_after=timedelta(minutes=10), recheck_after=timedelta(minutes=10), batch_size=200,
+                 workers=8, rate=20.0, time_budget=50.0):
+        self.stale_after = stale_after
+        self.recheck_after = recheck_after
+        self.batch_size = batch_size
+        self.workers = workers
+        self.rate_limiter = RateLimiter(rate)
+        self.time_budget = time_budget
+
+    def run(self) -> Counter:
+        stats = Counter(expired_creating=self._expire_stale_creations())
+        deadline = time.monotonic() + self.time_budget
+        cursor = (datetime.min.replace(tzinfo=UTC), 0)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='payment-reconciler') as pool:
+            while time.monotonic() < deadline:
+                batch = self._next_batch(cursor)
+                if not batch:
+                    break
+                cursor = (batch[-1].created_at, batch[-1].pk)
+
+                statuses = dict(zip((payment.pk for payment in batch), pool.map(self._lookup, batch)))
+                batch_stats = self._apply(statuses)
+                stats.update(batch_stats)
+                if batch_stats['unavailable'] == len(batch):
+                    logger.error('Payment reconciliation stopped: the provider is unavailable')
+                    break
+            else:  # the deadline, not the end of the backlog, stopped the run
+                stats['time_budget_exceeded'] = 1
+        return stats
+
+    def _expire_stale_creations(self) -> int:
+        # sessions of lost tasks, nobody polled their checkout page
+        return Payment.objects.filter(
+            payment_status=PaymentStatus.CREATING, created_at__lt=timezone.now() - CREATION_TIMEOUT
+        ).update(payment_status=PaymentStatus.FAILED, updated_at=timezone.now())
+
+    def _next_batch(self, cursor) -> list[Payment]:
+        now = timezone.now()
+        created_at, pk = cursor
+        return list(
+            Payment.objects
+            .filter(
+                payment_status=PaymentStatus.INITIATED,
+                created_at__lt=now - self.stale_after,
+                updated_at__lt=now - self.recheck_after,
+                transaction__isnull=False,
+            )
+            .filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))  # keyset, no OFFSET
+            .order_by('created_at', 'pk')
+            .only('pk', 'transaction', 'payment_method', 'created_at')[:self.batch_size]
+        )
+
+    def _lookup(self, payment) -> str | None:
+        gateway = resolve_gateway(payment.payment_method)
+        if gateway is None:
+            return None
+        self.rate_limiter.wait()
+        return gateway.check_payment_status(payment.transaction)
+
+    @staticmethod
+    def _apply(statuses: dict) -> Counter:
+        by_status = defaultdict(list)
+        for pk, status in statuses.items():
+            by_status[status].append(pk)
+        now = timezone.now()
+
+        with transaction.atomic():
+            # the payment lock waits for a webhook applied meanwhile, its payment then no longer matches
+            succeeded = list(
+                Payment.objects.select_for_update()
+                .filter(pk__in=by_status['succeeded'], payment_status=PaymentStatus.INITIATED)
+                .values_list('pk', 'order_id')
+            )
+            if succeeded:
+                Payment.objects.filter(pk__in=[pk for pk, _ in succeeded]).update(
+                    payment_status=PaymentStatus.SUCCEEDED, paid_at=now, updated_at=now
+                )
+                Order.objects.filter(pk__in=[order_pk for _, order_pk in succeeded]).update(
+                    status=OrderStatus.PAID, paid_at=now
+                )
+            failed = Payment.objects.filter(pk__in=by_status['failed'], payment_status=PaymentStatus.INITIATED).update(
+                payment_status=PaymentStatus.FAILED, updated_at=now
+            )
+            # still open at the provider: looked up again after recheck_after
+            Payment.objects.filter(pk__in=by_status['initiated'], payment_status=PaymentStatus.INITIATED).update(
+                updated_at=now
+            )
+
+        for pk, order_pk in succeeded:
+            logger.info(f'Reconciled Payment: #{pk} | Status: {PaymentStatus.SUCCEEDED} | Order: #{order_pk}')
+        return Counter(
+            succeeded=len(succeeded), failed=failed, open=len(by_status['initiated']),
+            unavailable=len(by_status[None]),
+        )
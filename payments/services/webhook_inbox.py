@@ -0,0 +1,131 @@
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from payments.domain import WebhookEventStatus
+from payments.models import WebhookEvent
+from .process_webhook import PaymentStatusUnavailable, process_webhook
+
+logger = logging.getLogger(__name__)
+
+REQUEUE_AFTER = timedelta(seconds=30)  # a received event not picked up by then lost its task
+PROCESSING_TIMEOUT = timedelta(minutes=5)  # a processing event not done by then lost its worker
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 30  # seconds before the first retry of an unavailable provider status, doubled on each attempt
+RETRY_LOST_AFTER = timedelta(seconds=RETRY_BACKOFF * 2 ** MAX_ATTEMPTS)  # a retry not run by then lost its task
+RETENTION = timedelta(days=7)
+
+
+def receive_webhook(provider: str, webhook_data: dict) -> tuple[WebhookEvent | None, bool]:
+    """
+    Stores the delivery for the workers. A duplicate of an event not yet picked up is folded into it,
+    the provider status is fetched once for both. Returns (event, created), (None, False) without a transaction ID.
+    """
+    transaction_id = webhook_data.get('id', None)
+    if not transaction_id:
+        logger.error(f'Webhook without transaction ID | Payload: {webhook_data}')
+        return None, False
+
+    # the partial unique constraint arbitrates concurrent duplicates, the loser gets the winner's row
+    return WebhookEvent.objects.get_or_create(
+        provider=provider, transaction=transaction_id, status=WebhookEventStatus.RECEIVED,
+        defaults={'payload': webhook_data},
+    )
+
+
+async def areceive_webhook(provider: str, webhook_data: dict) -> tuple[WebhookEvent | None, bool]:
+    """ receive_webhook for async views """
+    transaction_id = webhook_data.get('id', None)
+    if not transaction_id:
+        logger.error(f'Webhook without transaction ID | Payload: {webhook_data}')
+        return None, False
+
+    return await WebhookEvent.objects.aget_or_create(
+        provider=provider, transaction=transaction_id, status=WebhookEventStatus.RECEIVED,
+        defaults={'payload': webhook_data},
+    )
+
+
+def process_webhook_event(event_pk) -> int | None:
+    """
+    Safe to redeliver: the event is claimed with a conditional update, a claimed or finished one is skipped.
+    An unavailable provider status puts the event back for a retry, returns the seconds to wait before it.
+    """
+    claimed = WebhookEvent.objects.filter(pk=event_pk, status=WebhookEventStatus.RECEIVED).update(
+        status=WebhookEventStatus.PROCESSING, attempts=F('attempts') + 1, updated_at=timezone.now()
+    )
+    if not claimed:
+        return None
+
+    event = WebhookEvent.objects.get(pk=event_pk)
+    try:
+        payment_status = process_webhook(event.payload)
+    except PaymentStatusUnavailable as exc:
+        # the payment stays initiated: retried here, settled by the reconciler once the attempts are used up
+        logger.warning(f'Webhook event #{event.pk} attempt {event.attempts}/{MAX_ATTEMPTS} failed | {exc}')
+        if event.attempts >= MAX_ATTEMPTS:
+            _finish(event, WebhookEventStatus.FAILED, error=str(exc))
+        elif _requeue(event.pk, timezone.now(), error=str(exc)):
+            return RETRY_BACKOFF * 2 ** (event.attempts - 1)
+        return None
+    except Exception as exc:
+        logger.exception(f'Webhook event #{event.pk} failed | Transaction ID: "{event.transaction}"')
+        _finish(event, WebhookEventStatus.FAILED, error=f'{type(exc).__name__}: {exc}')
+        return None
+
+    if payment_status is None:
+        _finish(event, WebhookEventStatus.FAILED, error='Unknown transaction')
+    else:
+        _finish(event, WebhookEventStatus.PROCESSED)
+    return None
+
+
+def recover_webhook_events() -> list[int]:
+    """
+    Hands events left behind back to the workers: processing ones of a lost worker go back to received
+    (failed instead when a newer delivery is already waiting or after MAX_ATTEMPTS), received ones are re-dispatched.
+    Processed events past RETENTION are purged. Returns the pks to dispatch.
+    """
+    now = timezone.now()
+    stale = WebhookEvent.objects.filter(
+        status=WebhookEventStatus.PROCESSING, updated_at__lt=now - PROCESSING_TIMEOUT
+    )
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=WebhookEventStatus.FAILED, error='Worker lost too many times', updated_at=now
+    )
+    pks = [pk for pk in stale.values_list('pk', flat=True) if _requeue(pk, now)]
+
+    WebhookEvent.objects.filter(status=WebhookEventStatus.PROCESSED, processed_at__lt=now - RETENTION).delete()
+
+    pks += WebhookEvent.objects.filter(
+        status=WebhookEventStatus.RECEIVED, updated_at__lt=now - REQUEUE_AFTER
+    ).filter(
+        Q(error='') | Q(updated_at__lt=now - RETRY_LOST_AFTER)  # one put back for a retry waits for its countdown
+    ).values_list('pk', flat=True)
+    if pks:
+        logger.warning(f'{len(pks)} webhook events re-dispatched')
+    return pks
+
+
+def _requeue(event_pk, now, error='') -> bool:
+    """ Back to received, failed instead when a newer delivery of the transaction is already waiting """
+    try:
+        with transaction.atomic():
+            WebhookEvent.objects.filter(pk=event_pk).update(
+                status=WebhookEventStatus.RECEIVED, error=error[:255], updated_at=now
+            )
+        return True
+    except IntegrityError:
+        WebhookEvent.objects.filter(pk=event_pk).update(
+            status=WebhookEventStatus.FAILED, error='Superseded by a newer delivery', updated_at=now
+        )
+        return False
+
+
+def _finish(event, status, error=''):
+    WebhookEvent.objects.filter(pk=event.pk).update(
+        status=status, error=error[:255], processed_at=timezone.now(), updated_at=timezone.now()
+    )
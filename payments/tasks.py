@@ -0,0 +1,49 @@
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+
+from .services.initiate_payment import create_payment_session
+from .services.reconcile_payments import PaymentReconciler
+from .services.webhook_inbox import process_webhook_event, recover_webhook_events
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_LOCK_KEY = 'payments:reconcile:lock'
+
+
+@shared_task
+def create_payment_session_task(payment_pk):
+    """ Provider round trip off the request thread, the checkout page polls the payment until it has a URL """
+    create_payment_session(payment_pk)
+
+
+@shared_task(bind=True)
+def process_webhook_event_task(self, event_pk):
+    """ Provider status fetch and payment update of a stored webhook, the view has already acknowledged it """
+    if countdown := process_webhook_event(event_pk):
+        # the attempts are bounded by the event itself (MAX_ATTEMPTS), not by the task
+        raise self.retry(countdown=countdown, max_retries=None)
+
+
+@shared_task
+def recover_webhook_events_task():
+    """ Re-dispatches webhook events of lost tasks and crashed workers, purges old processed ones """
+    for event_pk in recover_webhook_events():
+        process_webhook_event_task.delay(event_pk)
+
+
+@shared_task
+def reconcile_payments_task():
+    """ Webhook + poll backup: settles payments whose webhook never came """
+    reconciler = PaymentReconciler()
+    # a run longer than the beat interval must not overlap the next one
+    if not cache.add(RECONCILE_LOCK_KEY, 1, timeout=int(reconciler.time_budget) + 60):
+        return
+    try:
+        stats = reconciler.run()
+    finally:
+        cache.delete(RECONCILE_LOCK_KEY)
+
+    if stats['succeeded'] or stats['failed'] or stats['expired_creating']:
+        logger.warning(f'Payment reconciliation: {dict(stats)}')
@@ -0,0 +1,83 @@
+import importlib
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import clear_url_caches, resolve, reverse
+
+from accounts.models import ShippingInfo
+from core.models import Order
+from payments.domain import PaymentMethod, PaymentStatus
+from payments.models import Payment, WebhookEvent
+
+User = get_user_model()
+
+
+def reload_urlconfs():
+    """ The view variants are picked by ASYNC_VIEWS when the urlconfs are imported """
+    for module in ('core.urls', 'payments.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(module))
+    clear_url_caches()
+
+
+@override_settings(ASYNC_VIEWS=True)
+class AsgiViewsTestCase(TestCase):
+    """ Async variants (ASYNC_VIEWS) through the ASGI handler, as served by the uvicorn workers """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reload_urlconfs()
+        cls.addClassCleanup(override_settings(ASYNC_VIEWS=False)(reload_urlconfs))
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='asgi@mail.ru', email_verified=True, password='StrongPas123')
+        ShippingInfo.objects.create(
+            user=self.user.customer_profile, first_name='As', last_name='Gi', phone='+41790000000',
+            country='Switzerland', city='Zurich', postal_code='8001', street='Bahnhofstrasse', house_number='1',
+        )
+        self.order = Order.objects.create(user=self.user.customer_profile, total_amount=Decimal('12.50'))
+        self.payment = Payment.objects.create(
+            order=self.order, payment_method=PaymentMethod.TWINT, payment_status=PaymentStatus.INITIATED,
+            transaction='tr_asgi', checkout_url='https://mollie.test/checkout/tr_asgi'
+        )
+
+    async def test_checkout_status_and_review_order(self):
+        url = reverse('payments:payment_checkout_status', args=[self.payment.pk])
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+        response = await self.async_client.get(reverse('payments:review_order'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('accounts:login')))
+
+        credentials = {'username': 'asgi@mail.ru', 'password': 'StrongPas123'}
+        await self.async_client.post(reverse('accounts:login'), credentials)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json(), {'status': 'initiated', 'redirect_url': self.payment.checkout_url})
+        response = await self.async_client.get(reverse('payments:review_order'))
+        self.assertEqual(response.context['order'], self.order)
+        self.assertContains(response, reverse('payments:start_payment', args=[self.order.pk]))
+
+    async def test_webhook_is_stored_and_dispatched(self):
+        with patch('payments.views.process_webhook_event_task.delay') as delay:
+            response = await self.async_client.post(reverse('payments:mollie_webhook'), {'id': 'tr_asgi'})
+            await self.async_client.post(reverse('payments:mollie_webhook'), {'id': 'tr_asgi'})
+            missing_id = await self.async_client.post(reverse('payments:mollie_webhook'), {})
+        self.assertEqual((response.status_code, missing_id.status_code), (200, 200))
+        event = await WebhookEvent.objects.aget()
+        delay.assert_called_once_with(event.pk)
+
+    async def test_pending_user_is_sent_to_verification(self):
+        session = await self.async_client.asession()
+        session['pending_user'] = {'email': 'pending@mail.ru'}
+        await session.asave()
+
+        response = await self.async_client.get(reverse('payments:payment_checkout_status', args=[self.payment.pk]))
+        self.assertRedirects(response, reverse('accounts:email_sent'), fetch_redirect_response=False)
+        response = await self.async_client.get(reverse('core:product_list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_async_variants_are_routed(self):
+        self.assertEqual(resolve(reverse('payments:payment_checkout_status', args=[1])).func.__name__,
+                         'apayment_checkout_status')
+        self.assertEqual(resolve(reverse('core:product_list')).func.view_class.__name__, 'AsyncProductListView')
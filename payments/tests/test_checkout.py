@@ -0,0 +1,133 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import ShippingInfo
+from core.models import Order, OrderItem
+from payments.domain import PaymentStatus
+from payments.management.commands.fake_mollie import FakeMollieServer
+from payments.models import Payment
+from payments.services.initiate_payment import create_payment_session
+
+User = get_user_model()
+
+
+class AsyncCheckoutTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='checkout@mail.ru', email_verified=True, password='StrongPas123')
+        profile = self.user.customer_profile
+        ShippingInfo.objects.create(
+            user=profile, first_name='Check', last_name='Out', phone='+41790000000', country='Switzerland',
+            city='Zurich', postal_code='8001', street='Bahnhofstrasse', house_number='1',
+        )
+        self.order = Order.objects.create(user=profile, total_amount=Decimal('12.50'))
+        OrderItem.objects.create(
+            order=self.order, product_pk_snapshot=1, product_name='Checkout Product',
+            product_quantity=1, product_unit_price=Decimal('12.50'), product_total_price=Decimal('12.50')
+        )
+        self.client.post(reverse('accounts:login'), {'username': 'checkout@mail.ru', 'password': 'StrongPas123'})
+
+    def _fake_mollie(self):
+        server = FakeMollieServer(('127.0.0.1', 0), webhooks=False)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        settings = override_settings(MOLLIE_BASE_URL=f'{server.base_url}/v2/payments', MOLLIE_API_KEY='test')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        return server
+
+    def _start_payment(self):
+        with patch('payments.views.create_payment_session_task.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('payments:start_payment', args=[self.order.pk]), {'payment_method': 'twint'}
+                )
+        return response, delay
+
+    def test_start_payment_enqueues_and_reuses_the_payment_being_created(self):
+        response, delay = self._start_payment()
+        payment = Payment.objects.get(order=self.order)
+        self.assertEqual(payment.payment_status, PaymentStatus.CREATING)
+        self.assertIsNotNone(payment.idempotency_key)
+        self.assertRedirects(response, reverse('payments:payment_checkout', args=[payment.pk]),
+                             fetch_redirect_response=False)
+        delay.assert_called_once_with(payment.pk)
+
+        response, delay = self._start_payment()  # double submit
+        self.assertEqual(Payment.objects.filter(order=self.order).count(), 1)
+        delay.assert_not_called()
+
+        response = self.client.get(reverse('payments:payment_checkout', args=[payment.pk]))
+        self.assertTemplateUsed(response, 'payments/payment_redirect.html')
+        status = self.client.get(reverse('payments:payment_checkout_status', args=[payment.pk])).json()
+        self.assertEqual(status, {'status': 'creating', 'redirect_url': None})
+
+    def test_session_creation_is_idempotent_and_redirects(self):
+        server = self._fake_mollie()
+        self._start_payment()
+        payment = Payment.objects.get(order=self.order)
+
+        create_payment_session(payment.pk)
+        payment.refresh_from_db()
+        self.assertEqual(payment.payment_status, PaymentStatus.INITIATED)
+        self.assertTrue(payment.checkout_url.startswith(f'{server.base_url}/checkout/tr_'))
+
+        # redelivered task: nothing is sent again, a repeated call with the key is replayed by the provider
+        create_payment_session(payment.pk)
+        Payment.objects.filter(pk=payment.pk).update(payment_status=PaymentStatus.CREATING)
+        create_payment_session(payment.pk)
+        self.assertEqual((server.stats['created'], server.stats['replayed']), (1, 1))
+        self.assertEqual(Payment.objects.get(pk=payment.pk).transaction, payment.transaction)
+
+        status = self.client.get(reverse('payments:payment_checkout_status', args=[payment.pk])).json()
+        self.assertEqual(status, {'status': 'initiated', 'redirect_url': payment.checkout_url})
+        response = self.client.get(reverse('payments:payment_checkout', args=[payment.pk]))
+        self.assertRedirects(response, payment.checkout_url, fetch_redirect_response=False)
+
+    def test_stale_creation_fails(self):
+        self._start_payment()
+        payment = Payment.objects.get(order=self.order)
+        Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+
+        status = self.client.get(reverse('payments:payment_checkout_status', args=[payment.pk])).json()
+        self.assertEqual(status, {'status': 'failed', 'redirect_url': reverse('payments:something_went_wrong')})
+        self.assertEqual(Payment.objects.get(pk=payment.pk).payment_status, PaymentStatus.FAILED)
+
+        response, delay = self._start_payment()  # a new attempt gets a new payment
+        self.assertEqual(Payment.objects.filter(order=self.order).count(), 2)
+        delay.assert_called_once()
+
+    def test_initiated_session_is_reused_while_the_total_is_unchanged(self):
+        self._fake_mollie()
+        self._start_payment()
+        payment = Payment.objects.get(order=self.order)
+        create_payment_session(payment.pk)
+        payment.refresh_from_db()
+        self.assertEqual(payment.amount, Decimal('12.50'))
+
+        response, delay = self._start_payment()  # back from the checkout page, same cart
+        self.assertRedirects(response, reverse('payments:payment_checkout', args=[payment.pk]),
+                             fetch_redirect_response=False)
+        delay.assert_not_called()
+
+        Order.objects.filter(pk=self.order.pk).update(total_amount=Decimal('20.00'))
+        response, delay = self._start_payment()  # the stale session would charge the old total
+        self.assertEqual(Payment.objects.filter(order=self.order).count(), 2)
+        delay.assert_called_once()
+
+    def test_failed_payment_is_not_sent_to_its_checkout_url(self):
+        payment = Payment.objects.create(
+            order=self.order, payment_method='twint', payment_status=PaymentStatus.FAILED,
+            transaction='tr_failed', checkout_url='https://mollie.test/checkout/tr_failed'
+        )
+        status = self.client.get(reverse('payments:payment_checkout_status', args=[payment.pk])).json()
+        self.assertEqual(status, {'status': 'failed', 'redirect_url': reverse('payments:something_went_wrong')})
+        response = self.client.get(reverse('payments:payment_checkout', args=[payment.pk]))
+        self.assertRedirects(response, reverse('payments:something_went_wrong'), fetch_redirect_response=False)
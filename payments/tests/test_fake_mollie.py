@@ -0,0 +1,77 @@
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.models import Order, OrderItem
+from payments.management.commands.fake_mollie import FakeMollieServer
+from payments.services.gateways import MollieGateway
+
+User = get_user_model()
+
+
+class WebhookReceiver(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.server.received.append(self.rfile.read(int(self.headers['Content-Length'])).decode())
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeMollieTestCase(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='mollie@mail.ru', email_verified=True, password='StrongPas123')
+        self.order = Order.objects.create(user=user.customer_profile, total_amount=Decimal('12.50'))
+        OrderItem.objects.create(
+            order=self.order, product_pk_snapshot=1, product_name='Mollie Product',
+            product_quantity=1, product_unit_price=Decimal('12.50'), product_total_price=Decimal('12.50')
+        )
+
+    def _start(self, server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def _fake(self, **kwargs):
+        server = self._start(FakeMollieServer(('127.0.0.1', 0), **kwargs))
+        settings = override_settings(MOLLIE_BASE_URL=f'{server.base_url}/v2/payments', MOLLIE_API_KEY='test')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        return server
+
+    def _wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return condition()
+
+    def test_payment_is_settled_and_webhook_delivered(self):
+        receiver = self._start(ThreadingHTTPServer(('127.0.0.1', 0), WebhookReceiver))
+        receiver.received = []
+        self._fake(webhook_delay=0.2, webhook_url=f'http://127.0.0.1:{receiver.server_address[1]}/')
+
+        gateway = MollieGateway()
+        session = gateway.create_payment_session(order=self.order, user_id=1, payment_method='twint')
+        self.assertTrue(session.session_id.startswith('tr_'))
+        self.assertEqual(gateway.handle_webhook({'id': session.session_id}), 'initiated')
+
+        self.assertTrue(self._wait_for(lambda: receiver.received))
+        self.assertEqual(receiver.received, [f'id={session.session_id}'])
+        self.assertEqual(gateway.handle_webhook({'id': session.session_id}), 'succeeded')
+
+    def test_faults_and_unknown_ids(self):
+        server = self._fake(error_rate=1.0)
+        self.assertIsNone(MollieGateway().create_payment_session(order=self.order, user_id=1, payment_method='twint'))
+        self.assertEqual(server.stats['error'], 1)
+
+        server.error_rate = 0.0
+        self.assertEqual(MollieGateway().handle_webhook({'id': 'tr_unknown'}), 'failed')  # 404
+        server.unknown_status = 'paid'
+        self.assertEqual(MollieGateway().handle_webhook({'id': 'tr_unknown'}), 'succeeded')
@@ -0,0 +1,83 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.domain import OrderStatus
+from core.models import Order
+from payments.domain import PaymentMethod, PaymentStatus
+from payments.management.commands.fake_mollie import FakeMollieServer
+from payments.models import Payment
+from payments.services.reconcile_payments import PaymentReconciler
+
+User = get_user_model()
+
+
+class PaymentReconcilerTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeMollieServer(('127.0.0.1', 0), webhooks=False)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        settings = override_settings(MOLLIE_BASE_URL=f'{self.server.base_url}/v2/payments', MOLLIE_API_KEY='test')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user(email='reconcile@mail.ru', email_verified=True, password='StrongPas123')
+
+    def _payment(self, transaction_id, provider_status, age=timedelta(hours=1)):
+        order = Order.objects.create(user=self.user.customer_profile, total_amount=Decimal('12.50'),
+                                     status=OrderStatus.SHIPPED)
+        payment = Payment.objects.create(
+            order=order, payment_method=PaymentMethod.TWINT, payment_status=PaymentStatus.INITIATED,
+            transaction=transaction_id
+        )
+        Payment.objects.filter(pk=payment.pk).update(
+            created_at=timezone.now() - age, updated_at=timezone.now() - age
+        )
+        if provider_status:
+            self.server.payments[transaction_id] = {'resource': 'payment', 'id': transaction_id,
+                                                    'status': provider_status}
+        return payment
+
+    def test_stale_payments_are_settled_in_bulk(self):
+        paid = self._payment('tr_paid', 'paid')
+        expired = self._payment('tr_expired', 'expired')
+        unknown = self._payment('tr_unknown', None)  # 404
+        still_open = self._payment('tr_open', 'open')
+        fresh = self._payment('tr_fresh', 'paid', age=timedelta(minutes=1))
+
+        stats = PaymentReconciler(batch_size=2, workers=4, rate=0).run()
+        self.assertEqual((stats['succeeded'], stats['failed'], stats['open']), (1, 2, 1))
+        self.assertEqual(self.server.stats['get'], 4)
+
+        statuses = dict(Payment.objects.values_list('transaction', 'payment_status'))
+        self.assertEqual(statuses, {
+            'tr_paid': PaymentStatus.SUCCEEDED, 'tr_expired': PaymentStatus.FAILED,
+            'tr_unknown': PaymentStatus.FAILED, 'tr_open': PaymentStatus.INITIATED, 'tr_fresh': PaymentStatus.INITIATED,
+        })
+        paid.order.refresh_from_db()
+        self.assertEqual(paid.order.status, OrderStatus.PAID)
+        self.assertIsNotNone(Payment.objects.get(pk=paid.pk).paid_at)
+
+        PaymentReconciler(rate=0).run()  # the open one is rechecked later, not on every pass
+        self.assertEqual(self.server.stats['get'], 4)
+
+    def test_provider_outage_changes_nothing(self):
+        for n in range(3):
+            self._payment(f'tr_outage_{n}', 'paid')
+        self.server.error_rate = 1.0
+
+        stats = PaymentReconciler(batch_size=2, rate=0).run()
+        self.assertEqual(stats['unavailable'], 2)  # stopped after the first batch
+        self.assertEqual(Payment.objects.filter(payment_status=PaymentStatus.INITIATED).count(), 3)
+
+    def test_stale_creating_payments_fail(self):
+        payment = self._payment('tr_creating', None)
+        Payment.objects.filter(pk=payment.pk).update(payment_status=PaymentStatus.CREATING, transaction=None)
+
+        self.assertEqual(PaymentReconciler(rate=0).run()['expired_creating'], 1)
+        self.assertEqual(Payment.objects.get(pk=payment.pk).payment_status, PaymentStatus.FAILED)
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.domain import OrderStatus
+from core.models import Order
+from payments.domain import PaymentMethod, PaymentStatus, WebhookEventStatus
+from payments.models import Payment, WebhookEvent
+from payments.services.webhook_inbox import MAX_ATTEMPTS, process_webhook_event, recover_webhook_events
+
+User = get_user_model()
+
+
+class WebhookInboxTestCase(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='webhook@mail.ru', email_verified=True, password='StrongPas123')
+        self.order = Order.objects.create(user=user.customer_profile, total_amount=Decimal('12.50'))
+        self.payment = Payment.objects.create(
+            order=self.order, payment_method=PaymentMethod.TWINT, payment_status=PaymentStatus.INITIATED,
+            transaction='tr_inbox'
+        )
+
+    def _deliver(self, transaction_id='tr_inbox'):
+        with patch('payments.views.process_webhook_event_task.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('payments:mollie_webhook'), {'id': transaction_id})
+        self.assertEqual(response.status_code, 200)
+        return delay
+
+    def _mollie(self, status, status_code=200):
+        response = Mock(status_code=status_code, json=Mock(return_value={'status': status}))
+        return patch('payments.services.gateways.mollie.mollie_http.get', return_value=response)
+
+    def test_duplicate_deliveries_are_folded_until_picked_up(self):
+        first, second = self._deliver(), self._deliver()
+        event = WebhookEvent.objects.get()
+        first.assert_called_once_with(event.pk)
+        second.assert_not_called()
+
+        with self._mollie('paid') as get:
+            process_webhook_event(event.pk)
+            process_webhook_event(event.pk)  # redelivered task
+        self.assertEqual(get.call_count, 1)
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (WebhookEventStatus.PROCESSED, 1))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, OrderStatus.PAID)
+
+        self._deliver().assert_called_once()  # a delivery after processing is a new event
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+
+    def test_paid_payment_is_not_marked_again(self):
+        self._deliver()
+        with self._mollie('paid'):
+            process_webhook_event(WebhookEvent.objects.get().pk)
+        paid_at = Payment.objects.get(pk=self.payment.pk).paid_at
+
+        self._deliver()
+        with self._mollie('expired'):
+            process_webhook_event(WebhookEvent.objects.get(status=WebhookEventStatus.RECEIVED).pk)
+        payment = Payment.objects.get(pk=self.payment.pk)
+        self.assertEqual((payment.payment_status, payment.paid_at), (PaymentStatus.SUCCEEDED, paid_at))
+
+    def test_unavailable_provider_status_is_retried_not_failed(self):
+        self._deliver()
+        event = WebhookEvent.objects.get()
+        with self._mollie(None, status_code=503):
+            self.assertEqual(process_webhook_event(event.pk), 30)
+            event.refresh_from_db()
+            self.assertEqual((event.status, event.attempts), (WebhookEventStatus.RECEIVED, 1))
+            self.assertEqual(recover_webhook_events(), [])  # waits for its retry countdown
+
+            for attempt in range(2, MAX_ATTEMPTS):
+                self.assertEqual(process_webhook_event(event.pk), 30 * 2 ** (attempt - 1))
+            self.assertIsNone(process_webhook_event(event.pk))
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (WebhookEventStatus.FAILED, MAX_ATTEMPTS))
+        # left to the reconciler
+        self.assertEqual(Payment.objects.get(pk=self.payment.pk).payment_status, PaymentStatus.INITIATED)
+
+    def test_unknown_transaction_and_missing_id(self):
+        self._deliver('tr_unknown')
+        event = WebhookEvent.objects.get()
+        process_webhook_event(event.pk)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.error), (WebhookEventStatus.FAILED, 'Unknown transaction'))
+
+        response = self.client.post(reverse('payments:mollie_webhook'), {})
+        self.assertEqual(response.status_code, 200)  # acknowledged as before the inbox, nothing is stored
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_recovery_of_lost_tasks_and_workers(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        lost_task = WebhookEvent.objects.create(provider='mollie', transaction='tr_lost_task')
+        lost_worker = WebhookEvent.objects.create(
+            provider='mollie', transaction='tr_inbox', status=WebhookEventStatus.PROCESSING, attempts=1
+        )
+        superseded = WebhookEvent.objects.create(
+            provider='mollie', transaction='tr_newer', status=WebhookEventStatus.PROCESSING, attempts=1
+        )
+        newer = WebhookEvent.objects.create(provider='mollie', transaction='tr_newer')
+        WebhookEvent.objects.filter(pk__in=[lost_task.pk, lost_worker.pk, superseded.pk]).update(updated_at=long_ago)
+
+        self.assertCountEqual(recover_webhook_events(), [lost_task.pk, lost_worker.pk])
+        superseded.refresh_from_db()
+        self.assertEqual(superseded.status, WebhookEventStatus.FAILED)
+        self.assertEqual(WebhookEvent.objects.get(pk=newer.pk).status, WebhookEventStatus.RECEIVED)
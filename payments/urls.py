@@ -1,15 +1,27 @@
+from django.conf import settings
 from django.urls import path
 from django.views.generic import TemplateView
 
-from payments.views import ReviewOrderView, start_payment, mollie_webhook, start_checkout
+from payments.views import (
+    ReviewOrderView, start_payment, mollie_webhook, start_checkout, payment_checkout, payment_checkout_status,
+    AsyncReviewOrderView, astart_payment, amollie_webhook, apayment_checkout_status
+)
+
+# ASGI deployment only, see ASYNC_VIEWS
+ReviewView, start_payment_view, checkout_status_view, webhook_view = (
+    (AsyncReviewOrderView, astart_payment, apayment_checkout_status, amollie_webhook) if settings.ASYNC_VIEWS
+    else (ReviewOrderView, start_payment, payment_checkout_status, mollie_webhook)
+)
 
 app_name = 'payments'
 
 urlpatterns = [
     path('start-checkout/', start_checkout, name='start_checkout'),
-    path('review-order/', ReviewOrderView.as_view(), name='review_order'),
-    path('start-payment/<int:pk>/', start_payment, name='start_payment'),
-    path('api/v1/mollie/webhook/', mollie_webhook, name='mollie_webhook'),
+    path('review-order/', ReviewView.as_view(), name='review_order'),
+    path('start-payment/<int:pk>/', start_payment_view, name='start_payment'),
+    path('checkout/<int:pk>/', payment_checkout, name='payment_checkout'),
+    path('checkout/<int:pk>/status/', checkout_status_view, name='payment_checkout_status'),
+    path('api/v1/mollie/webhook/', webhook_view, name='mollie_webhook'),
     path('payment-initiated/', TemplateView.as_view(template_name='payments/payment_initiated.html'), name='payment_initiated'),
     path('something-went-wrong/', TemplateView.as_view(template_name='payments/generic_error.html'), name='something_went_wrong'),
 ]
\ No newline at end of file
@@ -1,13 +1,22 @@
 import logging
 
+from asgiref.sync import iscoroutinefunction
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 
 def log_webhook_source(view_func):
-    def _wrapped_view(request, *args, **kwargs):
+    def log_source(request):
         if settings.DEBUG:
             logger.info(f"Webhook hit from IP: {request.META.get('REMOTE_ADDR')}, UA: {request.META.get('HTTP_USER_AGENT')}")
-        return view_func(request, *args, **kwargs)
+
+    if iscoroutinefunction(view_func):
+        async def _wrapped_view(request, *args, **kwargs):
+            log_source(request)
+            return await view_func(request, *args, **kwargs)
+    else:
+        def _wrapped_view(request, *args, **kwargs):
+            log_source(request)
+            return view_func(request, *args, **kwargs)
     return _wrapped_view
\ No newline at end of file
@@ -1,21 +1,27 @@
 import json
 import logging
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+from django.db import transaction
 from django.http import JsonResponse, HttpResponse, HttpResponseNotAllowed
-from django.shortcuts import redirect
+from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import TemplateView
 
+from accounts.models import CustomerProfile
 from core.domain import OrderStatus
 from core.models import Order
 from core.services.order_amount_calc import OrderRecalcService
-from payments.domain import PaymentMethod
-from payments.services.initiate_payment import initiate_payment
-from payments.services.process_webhook import process_webhook
+from payments.domain import PaymentMethod, PaymentStatus
+from payments.models import Payment
+from payments.services.initiate_payment import aexpire_stale_creation, expire_stale_creation, initiate_payment
+from payments.services.webhook_inbox import areceive_webhook, receive_webhook
+from payments.tasks import create_payment_session_task, process_webhook_event_task
 from payments.utils import log_webhook_source
-from shared.permissions.utils import is_authenticated
+from shared.permissions.utils import aget_request_user, is_authenticated
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +48,34 @@ class ReviewOrderView(LoginRequiredMixin, TemplateView):
         return context
 
 
+class AsyncReviewOrderView(TemplateView):
+    """ ASGI mode (ASYNC_VIEWS): the worker serves other requests while the queries run """
+    template_name = 'payments/review_order.html'
+
+    async def get(self, request, *args, **kwargs):
+        user = await aget_request_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())  # LoginRequiredMixin isn't async-aware
+
+        context = self.get_context_data(**kwargs)
+        context['payment_methods'] = PaymentMethod.choices
+        try:
+            customer = await CustomerProfile.objects.select_related('shipping_info').aget(user=user)
+            order = await (
+                Order.objects.prefetch_related('items').filter(user=customer, status=OrderStatus.PENDING).afirst()
+            )
+            # the price sync writes in a transaction, which the async ORM doesn't support
+            if price_diff := await sync_to_async(OrderRecalcService(order=order).recalculate)():
+                context['price_diff'] = price_diff
+
+            context['order'] = order
+            context['shipping_info'] = customer.shipping_info
+        except Exception as exc:
+            logger.error(f'Error during order review | exc={exc}')
+            context['message'] = 'Something went wrong, try again later'
+        return self.render_to_response(context)  # rendered by Django in a thread, after the view returns
+
+
 def start_checkout(request):
     if not is_authenticated(request):
         return redirect(f"{reverse('accounts:login')}?info=login_required_for_payment")
@@ -52,11 +86,28 @@ def start_payment(request, pk):
     if not is_authenticated(request):
         return redirect(f"{reverse('accounts:login')}?info=login_required_for_payment")
 
-    order = Order.objects.prefetch_related('items').filter(user=request.user.customer_profile, pk=pk).first()
-    if not order:
+    customer = request.user.customer_profile
+    shipping = getattr(customer, 'shipping_info', None)
+    if not shipping:
+        return redirect(reverse('payments:something_went_wrong'))
+
+    payment_method = request.POST.get('payment_method')
+    if payment_method not in PaymentMethod:
+        return redirect(reverse('payments:something_went_wrong'))
+
+    if (payment := _initiate_order_payment(customer, shipping, pk, payment_method)) is None:
         return redirect(reverse('payments:something_went_wrong'))
+    return redirect('payments:payment_checkout', pk=payment.pk)
+
+
+async def astart_payment(request, pk):
+    """ start_payment for the ASGI mode (ASYNC_VIEWS) """
+    user = await aget_request_user(request)
+    if not user.is_authenticated:
+        return redirect(f"{reverse('accounts:login')}?info=login_required_for_payment")
 
-    shipping = getattr(request.user.customer_profile, 'shipping_info', None)
+    customer = await CustomerProfile.objects.select_related('shipping_info').filter(user=user).afirst()
+    shipping = getattr(customer, 'shipping_info', None)
     if not shipping:
         return redirect(reverse('payments:something_went_wrong'))
 
@@ -64,40 +115,135 @@ def start_payment(request, pk):
     if payment_method not in PaymentMethod:
         return redirect(reverse('payments:something_went_wrong'))
 
-    order.shipping_email = shipping.email
-    order.shipping_first_name = shipping.first_name
-    order.shipping_last_name = shipping.last_name
-    order.shipping_phone = shipping.phone
-    order.shipping_country = shipping.country
-    order.shipping_city = shipping.city
-    order.shipping_postal_code = shipping.postal_code
-    order.shipping_street = shipping.street
-    order.shipping_house_number = shipping.house_number
-    order.shipping_apartment = shipping.apartment
-    order.shipping_additional_info = shipping.additional_info
-    order.save()
-
-    payment_url = initiate_payment(order=order, user_pk=request.user.pk, payment_method=payment_method)
-    if payment_url is not None:
-        return redirect(payment_url)
-    return redirect(reverse('payments:something_went_wrong'))
+    # the async ORM has no transactions: the locked part runs in a thread
+    payment = await sync_to_async(_initiate_order_payment)(customer, shipping, pk, payment_method)
+    if payment is None:
+        return redirect(reverse('payments:something_went_wrong'))
+    return redirect('payments:payment_checkout', pk=payment.pk)
+
+
+def _initiate_order_payment(customer, shipping, order_pk, payment_method):
+    with transaction.atomic():
+        # the row lock serializes double submits, the second one reuses the payment being created
+        order = Order.objects.select_for_update().filter(user=customer, pk=order_pk).first()
+        if not order:
+            return None
+
+        order.shipping_email = shipping.email
+        order.shipping_first_name = shipping.first_name
+        order.shipping_last_name = shipping.last_name
+        order.shipping_phone = shipping.phone
+        order.shipping_country = shipping.country
+        order.shipping_city = shipping.city
+        order.shipping_postal_code = shipping.postal_code
+        order.shipping_street = shipping.street
+        order.shipping_house_number = shipping.house_number
+        order.shipping_apartment = shipping.apartment
+        order.shipping_additional_info = shipping.additional_info
+        order.save()
+
+        payment, created = initiate_payment(order=order, payment_method=payment_method)
+        if created:
+            # the provider round trip runs on a Celery worker, not on this request thread
+            transaction.on_commit(lambda: create_payment_session_task.delay(payment.pk))
+    return payment
+
+
+def _checkout_redirect_url(payment) -> str | None:
+    """ Where the customer goes next, None while the provider session is being created """
+    if payment.payment_status == PaymentStatus.FAILED:  # never sent to the checkout page it failed on
+        return reverse('payments:something_went_wrong')
+    if payment.payment_status == PaymentStatus.CREATING:
+        return None
+    if payment.payment_status == PaymentStatus.SUCCEEDED:
+        return reverse('payments:payment_initiated')
+    return payment.checkout_url or reverse('payments:something_went_wrong')
+
+
+def payment_checkout(request, pk):
+    """ Redirects to the provider checkout, or renders a page polling payment_checkout_status until it's ready """
+    if not is_authenticated(request):
+        return redirect(f"{reverse('accounts:login')}?info=login_required_for_payment")
+
+    payment = Payment.objects.filter(pk=pk, order__user__user=request.user).first()
+    if not payment:
+        return redirect(reverse('payments:something_went_wrong'))
+
+    expire_stale_creation(payment)
+    if redirect_url := _checkout_redirect_url(payment):
+        return redirect(redirect_url)
+    return render(request, 'payments/payment_redirect.html', {'payment': payment})
+
+
+def payment_checkout_status(request, pk):
+    """ Polled every ~second by each customer waiting for the checkout page """
+    if not is_authenticated(request):
+        return JsonResponse({'detail': 'Authentication required'}, status=401)
+
+    payment = Payment.objects.filter(pk=pk, order__user__user=request.user).first()
+    if not payment:
+        return JsonResponse({'detail': 'Not found'}, status=404)
+
+    expire_stale_creation(payment)
+    redirect_url = _checkout_redirect_url(payment)
+    return JsonResponse({'status': payment.payment_status, 'redirect_url': redirect_url})
+
+
+async def apayment_checkout_status(request, pk):
+    """ payment_checkout_status for the ASGI mode (ASYNC_VIEWS) """
+    user = await aget_request_user(request)
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication required'}, status=401)
+
+    payment = await Payment.objects.filter(pk=pk, order__user__user=user).afirst()
+    if not payment:
+        return JsonResponse({'detail': 'Not found'}, status=404)
+
+    await aexpire_stale_creation(payment)
+    redirect_url = _checkout_redirect_url(payment)
+    return JsonResponse({'status': payment.payment_status, 'redirect_url': redirect_url})
+
+
+def _parse_webhook_body(request) -> dict | None:
+    logger.info(f'Content-Type: {request.content_type}')
+    try:
+        if request.content_type == 'application/json':
+            return json.loads(request.body)
+        return request.POST.dict()
+    except Exception:
+        logger.error(f'Failed to parse webhook body | Headers: {request.headers}')
+        return None
 
 
 @csrf_exempt
 @log_webhook_source
 def mollie_webhook(request):
     if request.method == 'POST':
-        logger.info(f'Content-Type: {request.content_type}')
-        try:
-            if request.content_type == 'application/json':
-                webhook_data = json.loads(request.body)
-            else:
-                webhook_data = request.POST.dict()
-        except Exception:
-            logger.error(f'Failed to parse webhook body | Headers: {request.headers}')
+        if (webhook_data := _parse_webhook_body(request)) is None:
+            return JsonResponse({'detail': 'Invalid JSON'}, status=400)
+
+        # a delivery without transaction ID is logged and acknowledged: a retry of it can't succeed either
+        event, created = receive_webhook('mollie', webhook_data)
+        if created:
+            # acknowledged right away, the provider status is fetched by a worker
+            transaction.on_commit(lambda: process_webhook_event_task.delay(event.pk))
+
+        return HttpResponse(status=200)
+    return HttpResponseNotAllowed(['POST'])
+
+
+@csrf_exempt
+@log_webhook_source
+async def amollie_webhook(request):
+    """ mollie_webhook for the ASGI mode (ASYNC_VIEWS) """
+    if request.method == 'POST':
+        if (webhook_data := _parse_webhook_body(request)) is None:
             return JsonResponse({'detail': 'Invalid JSON'}, status=400)
 
-        process_webhook(webhook_data)
+        event, created = await areceive_webhook('mollie', webhook_data)
+        if created:
+            # the event is committed already, the async ORM runs in autocommit
+            await sync_to_async(process_webhook_event_task.delay, thread_sensitive=False)(event.pk)
 
         return HttpResponse(status=200)
-    return HttpResponseNotAllowed(['POST'])
\ No newline at end of file
+    return HttpResponseNotAllowed(['POST'])
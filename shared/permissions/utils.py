@@ -2,6 +2,15 @@ def get_request_user(request):
     return getattr(request, 'user', None)
 
 
+async def aget_request_user(request):
+    """
+    Async views: the lazy request.user loads the user synchronously, which raises in async code.
+    Resolves it with request.auser() and pins it, so the sync helpers below and templates can use it.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
 def is_authenticated(request):
     user = get_request_user(request)
     return bool(user and user.is_authenticated)
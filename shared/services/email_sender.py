@@ -1,10 +1,13 @@
 import logging
 
-import requests
 from django.conf import settings
 
+from .http_client import HttpClient
+
 logger = logging.getLogger(__name__)
 
+resend_http = HttpClient('resend', timeout=10)
+
 
 def send_email_via_resend(to_emails: list | str, subject: str, html_content: str, text_content: str = None):
     if isinstance(to_emails, str):
@@ -24,11 +27,10 @@ def send_email_via_resend(to_emails: list | str, subject: str, html_content: str
         'Content-Type': 'application/json',
     }
 
-    response = requests.post(
+    response = resend_http.post(
         settings.RESEND_API_URL,
         json=payload,
         headers=headers,
-        timeout=10
     )
 
     # logger.info(f"HEADERS: {response.headers}")
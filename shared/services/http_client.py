@@ -0,0 +1,217 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """ The host failed too often, calls are refused without touching the network until the breaker resets """
+
+
+class CircuitBreaker:
+    """
+    Per host: `failure_threshold` consecutive failures (network errors, 5xx) open the circuit for `reset_timeout`
+    seconds, then a single trial call is let through (half-open): success closes it, failure opens it again.
+    """
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial_running = True
+            return True
+
+    def end_trial(self):
+        """ Ends a half-open trial call whatever its outcome, record() then decides the state """
+        with self._lock:
+            self._trial_running = False
+
+    def record(self, success: bool) -> bool:
+        """ Returns True when this failure opened the circuit """
+        with self._lock:
+            self._trial_running = False
+            if success:
+                self._failures, self._opened_at = 0, None
+                return False
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                opened = self._opened_at is None
+                self._opened_at = time.monotonic()
+                return opened
+            return False
+
+
+class LatencyMetrics:
+    """
+    Per-host call counts by outcome and latency percentiles over the last WINDOW calls of this process.
+    Logged by HttpClient once per REPORT_INTERVAL, on the first call after it elapsed.
+    """
+    WINDOW = 1000
+    REPORT_INTERVAL = 60  # seconds
+
+    def __init__(self):
+        self._samples = defaultdict(lambda: deque(maxlen=self.WINDOW))
+        self._outcomes = defaultdict(Counter)
+        self._reported_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, host: str, outcome: str, elapsed_ms: float) -> bool:
+        """ Returns True when a report is due, only one of the concurrent callers gets it """
+        with self._lock:
+            self._samples[host].append(elapsed_ms)
+            self._outcomes[host][outcome] += 1
+            if time.monotonic() - self._reported_at < self.REPORT_INTERVAL:
+                return False
+            self._reported_at = time.monotonic()
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snapshot = {}
+            for host, samples in self._samples.items():
+                ordered = sorted(samples)
+                snapshot[host] = {
+                    'outcomes': dict(self._outcomes[host]),
+                    **{
+                        f'p{int(q * 100)}_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 1)
+                        for q in (0.5, 0.95, 0.99)
+                    },
+                }
+            return snapshot
+
+
+class HttpClient:
+    """
+    Outbound HTTP of one integration (Mollie, Resend...):
+    - one requests.Session per process: urllib3 keeps a keep-alive pool per host, no TCP+TLS handshake per call
+    - retries with exponential backoff and full jitter, only for idempotent calls and for failed connects:
+      a POST that may have reached the host is not repeated unless the caller marks it idempotent
+    - a circuit breaker per host, CircuitOpenError is a requests.ConnectionError for the existing handlers
+    - per-call latency metrics (LatencyMetrics), logged per host every minute, and a DEBUG log line per attempt
+    """
+    def __init__(self, name: str, *, timeout: float = 5, retries: int = 2, backoff: float = 0.1,
+                 max_backoff: float = 2.0, failure_threshold: int = 5, reset_timeout: float = 30, pool_size: int = 10):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.pool_size = pool_size
+        self.metrics = LatencyMetrics()
+
+        self._breakers = {}
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        # created lazily and per process: pooled sockets must not be shared with forked Celery/gunicorn workers
+        if self._session_pid != os.getpid():
+            with self._lock:
+                if self._session_pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session, self._session_pid = session, os.getpid()
+        return self._session
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method: str, url: str, *, idempotent: bool | None = None, **kwargs) -> requests.Response:
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        host = urlsplit(url).netloc
+        breaker = self._breaker(host)
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                self._record_metrics(host, 'circuit_open', 0)
+                raise CircuitOpenError(f'Circuit of {self.name} ({host}) is open')
+
+            started_at = time.perf_counter()
+            try:
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                finally:
+                    breaker.end_trial()  # an exception other than RequestException skips record() below
+            except requests.RequestException as exc:
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                self._record(breaker, host, type(exc).__name__, elapsed_ms, success=False)
+                logger.debug(f'{self.name} | {method} {url} | {type(exc).__name__} | {elapsed_ms:.1f} ms | '
+                             f'attempt {attempt + 1}')
+                if attempt < self.retries and (idempotent or self._not_sent(exc)):
+                    self._sleep(attempt, method, url, exc)
+                    continue
+                raise
+
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            self._record(breaker, host, str(response.status_code), elapsed_ms, success=response.status_code < 500)
+            logger.debug(f'{self.name} | {method} {url} | {response.status_code} | {elapsed_ms:.1f} ms | '
+                         f'attempt {attempt + 1}')
+            if attempt < self.retries and idempotent and response.status_code in RETRY_STATUSES:
+                self._sleep(attempt, method, url, f'status {response.status_code}')
+                continue
+            return response
+
+    @staticmethod
+    def _not_sent(exc) -> bool:
+        """ The connection wasn't established, the request never reached the host: safe to repeat for any method """
+        if isinstance(exc, requests.ConnectTimeout):
+            return True
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def _record(self, breaker, host, outcome, elapsed_ms, success):
+        self._record_metrics(host, outcome, elapsed_ms)
+        if breaker.record(success):
+            logger.error(f'Circuit of {self.name} ({host}) opened after {self.failure_threshold} failures, '
+                         f'calls are refused for {self.reset_timeout}s')
+
+    def _record_metrics(self, host, outcome, elapsed_ms):
+        if not self.metrics.record(host, outcome, elapsed_ms):
+            return
+        for metrics_host, metrics in self.metrics.snapshot().items():
+            logger.info(f'{self.name} ({metrics_host}) | p50 {metrics["p50_ms"]} ms | p95 {metrics["p95_ms"]} ms | '
+                        f'p99 {metrics["p99_ms"]} ms | outcomes {metrics["outcomes"]}')
+
+    def _sleep(self, attempt, method, url, reason):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))  # full jitter
+        logger.warning(f'{self.name} | {method} {url} failed ({reason}), retry {attempt + 1}/{self.retries} '
+                       f'in {delay * 1000:.0f} ms')
+        time.sleep(delay)
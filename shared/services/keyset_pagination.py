@@ -0,0 +1,85 @@
+import base64
+import json
+import logging
+from dataclasses import dataclass
+
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str | None = None
+    cursor: str | None = None
+    per_page: int = 0
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return self.cursor is None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a composite key sorted in descending order.
+    - cursor holds the key of the last row on the page, page N+1 starts strictly after it
+    - page cost doesn't depend on depth, as long as an index matches the key order
+    - invalid/broken cursor silently falls back to the first page
+    """
+    def __init__(self, queryset, per_page: int, keys=('updated_at', 'price', 'pk')):
+        self.keys = keys
+        self.per_page = per_page
+        self.queryset = queryset.order_by(*[f'-{key}' for key in keys])
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        qs = self.queryset
+        values = self._decode(cursor) if cursor else None
+        if values is not None:
+            qs = qs.filter(self._after(values))
+        else:
+            cursor = None
+
+        rows = list(qs[:self.per_page + 1])  # one extra row tells whether the next page exists
+        object_list = rows[:self.per_page]
+        next_cursor = self._encode(object_list[-1]) if len(rows) > self.per_page else None
+
+        return KeysetPage(object_list=object_list, next_cursor=next_cursor, cursor=cursor, per_page=self.per_page)
+
+    def _after(self, values):
+        # (k1 < v1) OR (k1 = v1 AND k2 < v2) OR (k1 = v1 AND k2 = v2 AND k3 < v3)
+        # leading "k1 <= v1" bounds the index range scan, the rest is the exact row comparison
+        condition = Q()
+        for idx, key in enumerate(self.keys):
+            equal_part = dict(zip(self.keys[:idx], values[:idx]))
+            condition |= Q(**equal_part, **{f'{key}__lt': values[idx]})
+        return Q(**{f'{self.keys[0]}__lte': values[0]}) & condition
+
+    def _get_field(self, key):
+        opts = self.queryset.model._meta
+        return opts.pk if key == 'pk' else opts.get_field(key)
+
+    def _encode(self, obj) -> str:
+        raw = [self._get_field(key).value_to_string(obj) for key in self.keys]
+        return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip('=')
+
+    def _decode(self, cursor: str):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(raw, list) or len(raw) != len(self.keys):
+                raise ValueError('Cursor does not match pagination keys')
+            return [self._get_field(key).to_python(value) for key, value in zip(self.keys, raw)]
+        except Exception as exc:
+            logger.warning(f'Invalid pagination cursor "{cursor}" | exc={exc}')
+            return None
@@ -0,0 +1,92 @@
+import threading
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.test import SimpleTestCase
+
+from shared.services.http_client import CircuitOpenError, HttpClient
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """ Answers with the next status of server.statuses (200 when exhausted), records the client ports """
+    protocol_version = 'HTTP/1.1'
+
+    def _answer(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.ports.append(self.client_address[1])
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpClientTestCase(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+        self.server.statuses, self.server.ports = [], []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/v2/payments'
+        self.client = HttpClient('test', retries=2, backoff=0, failure_threshold=3, reset_timeout=60)
+
+    def test_connections_are_kept_alive(self):
+        for _ in range(3):
+            self.client.get(self.url)
+        self.assertEqual(len(set(self.server.ports)), 1)
+
+    def test_only_idempotent_calls_retry_on_status(self):
+        self.server.statuses = [503, 200]
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.server.statuses = [503, 200]
+        self.assertEqual(self.client.post(self.url, json={}).status_code, 503)
+        self.assertEqual(self.client.post(self.url, json={}, idempotent=True).status_code, 200)
+
+    def test_failed_connect_is_retried_for_any_method(self):
+        with self.assertRaises(requests.ConnectionError):
+            self.client.post('http://127.0.0.1:1/v2/payments', json={})
+        outcomes = self.client.metrics.snapshot()['127.0.0.1:1']['outcomes']
+        self.assertEqual(outcomes, {'ConnectionError': 3})
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        self.server.statuses = [500, 500, 500]
+        for _ in range(3):
+            self.client.post(self.url, json={})
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.get(self.url)
+        self.assertEqual(len(self.server.ports), 3)  # refused without a request
+
+        self.client._breaker(f'127.0.0.1:{self.server.server_address[1]}').reset_timeout = 0
+        self.assertEqual(self.client.get(self.url).status_code, 200)  # half-open trial closes it
+        metrics = self.client.metrics.snapshot()[f'127.0.0.1:{self.server.server_address[1]}']
+        self.assertEqual(metrics['outcomes'], {'500': 3, 'circuit_open': 1, '200': 1})
+        self.assertIn('p95_ms', metrics)
+
+    def test_unexpected_error_in_trial_does_not_keep_circuit_open(self):
+        self.server.statuses = [500, 500, 500]
+        for _ in range(3):
+            self.client.post(self.url, json={})
+        self.client._breaker(f'127.0.0.1:{self.server.server_address[1]}').reset_timeout = 0
+
+        with patch.object(requests.Session, 'request', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                self.client.get(self.url)  # the half-open trial
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_metrics_are_logged_once_per_interval(self):
+        self.client.metrics.REPORT_INTERVAL = 0
+        with self.assertLogs('shared.services.http_client', 'INFO') as logs:
+            self.client.get(self.url)
+        self.assertIn(f'test (127.0.0.1:{self.server.server_address[1]}) | p50', logs.output[0])
+
+        self.client.metrics.REPORT_INTERVAL = 60
+        with self.assertNoLogs('shared.services.http_client', 'INFO'):
+            self.client.get(self.url)
@@ -1,3 +1,4 @@
+from datetime import datetime, time, timedelta
 from urllib.parse import urlencode
 
 from django.conf import settings
@@ -33,4 +34,10 @@ def get_client_ip(request):
         ip = x_forwarded_for.split(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
-    return ip or 'N/A'
\ No newline at end of file
+    return ip or 'N/A'
+
+
+def local_day_range(date):
+    """ [start, end) of a local calendar day: a range predicate can use a timestamp index, "__date" can't """
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    return start, start + timedelta(days=1)